@@ -0,0 +1,133 @@
+"""
+Benchmark of the bot filter strategies of the session listing against catalogue size.
+
+Sessions are either filtered by the Claire API, with every available bot ID sent
+as a repeated bot_ids query parameter, or listed for all bots and filtered locally
+against the precomputed set of available bot IDs. For each catalogue size, the
+benchmark reports the length of the request URL, the time to build it, the time
+to parse its query as the Claire API has to, and the time to filter a page of
+sessions locally. The time the previous implementation spent serializing the bot
+IDs on every request is listed for reference.
+
+The server configuration (.env) must be available, as the services are imported
+from the application.
+
+Usage:
+    uv run python benchmarks/bot_filter_benchmark.py [--sizes 10 50 100 500 1000 5000] [--page-size 20]
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from typing import Callable
+from urllib.parse import parse_qsl
+
+from yarl import URL
+
+from organization_server_demo.modules.base.utils import dump_prefixed_id
+from organization_server_demo.modules.claire.models.bots import BotDefinition, BotID
+from organization_server_demo.modules.claire.services.bot_service import BotFilter
+from organization_server_demo.modules.claire.services.session_service import _filter_by_bot
+
+BASE_URL = URL("https://api-core.nova-ai.de/m2m/client_sessions/")
+URL_LIMIT_BYTES = 8192
+
+
+def _session(bot_id: str) -> dict:
+    """
+    Build a raw chat session of a bot, as returned by the Claire API.
+    
+    Args:
+        bot_id: Serialized ID of the bot.
+    
+    Returns:
+        dict: The chat session.
+    """
+    return {
+        "organization_id": f"org-{uuid.UUID(int=1)}",
+        "session_id": f"session-{uuid.uuid4()}",
+        "messages": [],
+        "bot_configuration": {"bot_id": bot_id},
+        "meta": {},
+    }
+
+
+def timed(function: Callable[[], object], rounds: int) -> float:
+    """
+    Measure the median run time of a function.
+    
+    Args:
+        function: The function to measure.
+        rounds: Number of measured runs.
+    
+    Returns:
+        float: Median run time in milliseconds.
+    """
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure(size: int, page_size: int, rounds: int) -> dict:
+    """
+    Measure both filter strategies for a catalogue size.
+    
+    The unfiltered page contains sessions of available bots and, for half of the
+    sessions, of bots that are no longer available.
+    
+    Args:
+        size: Number of available bots.
+        page_size: Number of sessions per page.
+        rounds: Number of measured runs.
+    
+    Returns:
+        dict: URL length and timings in milliseconds.
+    """
+    bots = [BotDefinition(name=f"Bot {i}", bot_id=uuid.UUID(int=i), meta={}) for i in range(1, size + 1)]
+    bot_filter = BotFilter.from_bots(bots)
+    params = {"external_user_id": "auth0|0123456789abcdef", "bot_ids": list(bot_filter.query)}
+    url = BASE_URL.extend_query(params)
+
+    rng = random.Random(size)
+    retired = [f"bot-{uuid.uuid4()}" for _ in range(size)]
+    page = [_session(rng.choice(bot_filter.query if i % 2 else retired)) for i in range(page_size)]
+
+    return {
+        "url_bytes": len(str(url)),
+        "legacy_serialize_ms": timed(lambda: [dump_prefixed_id(BotID, bot.bot_id) for bot in bots], rounds),
+        "query_build_ms": timed(lambda: str(BASE_URL.extend_query(params)), rounds),
+        "query_parse_ms": timed(
+            lambda: frozenset(value for key, value in parse_qsl(url.raw_query_string) if key == "bot_ids"), rounds
+        ),
+        "local_filter_ms": timed(lambda: _filter_by_bot(page, bot_filter.bot_ids), rounds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 500, 1000, 5000], help="Catalogue sizes")
+    parser.add_argument("--page-size", type=int, default=20, help="Sessions per page")
+    parser.add_argument("--rounds", type=int, default=50, help="Measured runs per combination")
+    args = parser.parse_args()
+
+    print(
+        f"{'bots':>6}{'url bytes':>11}{'> 8 KiB':>9}{'legacy ms':>11}{'build ms':>10}{'parse ms':>10}"
+        f"{'query ms':>10}{'local ms':>10}"
+    )
+    for size in args.sizes:
+        result = measure(size, args.page_size, args.rounds)
+        query_ms = result["query_build_ms"] + result["query_parse_ms"]
+        print(
+            f"{size:>6}{result['url_bytes']:>11}{'yes' if result['url_bytes'] > URL_LIMIT_BYTES else 'no':>9}"
+            f"{result['legacy_serialize_ms']:>11.3f}{result['query_build_ms']:>10.3f}"
+            f"{result['query_parse_ms']:>10.3f}{query_ms:>10.3f}{result['local_filter_ms']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
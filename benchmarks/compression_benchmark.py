@@ -0,0 +1,169 @@
+"""
+Benchmark of response compression per endpoint.
+
+Compares the CPU cost of every available content encoding and level with the
+bytes saved on representative response bodies of the organization server:
+session lists with messages and bot configurations, a single session and the
+bot list. The bot list is served precompressed, so its compression cost is paid
+once per cache period instead of once per request.
+
+The server configuration (.env) must be available, as the compression settings
+are imported from the application.
+
+Usage:
+    uv run python benchmarks/compression_benchmark.py [--sessions 20] [--messages 40] [--bots 50]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+
+from organization_server_demo.modules.base.compression import available_encodings, compress
+from organization_server_demo.settings import CompressionSettings
+
+WORDS = (
+    "photosynthesis light energy plant cell chlorophyll water carbon dioxide oxygen glucose leaf sun reaction "
+    "explain why how does the a of in and is to what example step process student answer question teacher"
+).split()
+
+LEVELS = {
+    "gzip": ("gzip_level", (1, 6, 9)),
+    "br": ("brotli_quality", (1, 4, 6, 11)),
+    "zstd": ("zstd_level", (1, 3, 9, 19)),
+}
+
+
+def _bot_configuration(index: int) -> dict:
+    """
+    Build a representative bot configuration.
+    
+    Args:
+        index: Index of the bot.
+    
+    Returns:
+        dict: The bot configuration.
+    """
+    return {
+        "bot_id": f"bot-{uuid.UUID(int=index)}",
+        "name": f"Tutor {index}",
+        "system_prompt": "You are a friendly tutor helping students with their homework. " * 8,
+        "model": "claire-large",
+        "temperature": 0.7,
+        "device_actions": [{"id": f"action-{i}", "description": "Open the calculator app."} for i in range(5)],
+    }
+
+
+def _text(rng: random.Random, words: int) -> str:
+    """
+    Build a message text of random words.
+    
+    Args:
+        rng: Random number generator.
+        words: Number of words.
+    
+    Returns:
+        str: The message text.
+    """
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _session(index: int, messages: int) -> dict:
+    """
+    Build a representative chat session.
+    
+    Args:
+        index: Index of the session.
+        messages: Number of messages in the session.
+    
+    Returns:
+        dict: The chat session.
+    """
+    rng = random.Random(index)
+    return {
+        "organization_id": f"org-{uuid.UUID(int=1)}",
+        "session_id": f"session-{uuid.uuid4()}",
+        "messages": [
+            {
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": _text(rng, rng.randint(10, 120)),
+                "created_at": "2025-01-01T12:00:00Z",
+            }
+            for i in range(messages)
+        ],
+        "bot_configuration": _bot_configuration(index % 5),
+        "meta": {"course": "biology", "class": index % 3},
+    }
+
+
+def build_payloads(sessions: int, messages: int, bots: int) -> dict[str, bytes]:
+    """
+    Build the response bodies of the benchmarked endpoints.
+    
+    Args:
+        sessions: Number of sessions in the session list.
+        messages: Number of messages per session.
+        bots: Number of bots in the bot list.
+    
+    Returns:
+        dict[str, bytes]: JSON bodies by endpoint.
+    """
+    session_list = {"results": [_session(i, messages) for i in range(sessions)], "next_cursor": "abc"}
+    bot_list = [{"name": f"Tutor {i}", "bot_id": f"bot-{uuid.UUID(int=i)}", "meta": {}} for i in range(bots)]
+    return {
+        "GET /session": json.dumps(session_list).encode("utf-8"),
+        "GET /session/{session_id}": json.dumps(_session(0, messages)).encode("utf-8"),
+        "GET /bots": json.dumps(bot_list).encode("utf-8"),
+    }
+
+
+def measure(body: bytes, encoding: str, settings: CompressionSettings, rounds: int) -> tuple[int, float]:
+    """
+    Measure the compressed size and the median compression time of a body.
+    
+    Args:
+        body: The uncompressed body.
+        encoding: Content encoding.
+        settings: Compression settings with the level to measure.
+        rounds: Number of measured compressions.
+    
+    Returns:
+        tuple[int, float]: Compressed size in bytes and median time in milliseconds.
+    """
+    timings = []
+    compressed = b""
+    for _ in range(rounds):
+        start = time.perf_counter()
+        compressed = compress(body, encoding, settings)
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(compressed), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions per session list")
+    parser.add_argument("--messages", type=int, default=40, help="Messages per session")
+    parser.add_argument("--bots", type=int, default=50, help="Bots in the bot list")
+    parser.add_argument("--rounds", type=int, default=20, help="Measured compressions per combination")
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.sessions, args.messages, args.bots)
+    print(f"{'endpoint':<28}{'encoding':<10}{'level':>6}{'bytes':>12}{'saved':>12}{'ratio':>8}{'ms':>10}{'MB/s':>9}")
+    for endpoint, body in payloads.items():
+        print(f"{endpoint:<28}{'identity':<10}{'-':>6}{len(body):>12}{0:>12}{1.0:>8.2f}{0:>10.3f}{'-':>9}")
+        for encoding in available_encodings():
+            field, levels = LEVELS[encoding]
+            for level in levels:
+                settings = CompressionSettings(**{field: level})
+                size, ms = measure(body, encoding, settings, args.rounds)
+                throughput = len(body) / 1e6 / (ms / 1000) if ms else float("inf")
+                print(
+                    f"{endpoint:<28}{encoding:<10}{level:>6}{size:>12}{len(body) - size:>12}"
+                    f"{len(body) / size:>8.2f}{ms:>10.3f}{throughput:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
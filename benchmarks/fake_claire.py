@@ -0,0 +1,200 @@
+"""
+Local stand-in for the Claire API.
+
+Implements the machine-to-machine endpoints used by the organization server with
+in-memory state, and can add a fixed latency to every response and inject upstream
+errors, slow responses that exceed the client timeout and dropped connections.
+Used by the soak test and benchmarks.
+
+Usage:
+    uv run python benchmarks/fake_claire.py --port 8765 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+
+from aiohttp import web
+
+ORGANIZATION_ID = f"org-{uuid.UUID(int=1)}"
+
+
+class FakeClaire:
+    """
+    In-memory Claire API with fault injection.
+    
+    Attributes:
+        bots: Bot definitions served by the bot endpoint.
+        sessions: Sessions by session ID, as tuples of external user ID and bot ID.
+        session_meta: Meta data of the sessions by session ID.
+        requests: Number of requests received.
+        calls: Method and path of every request received, in order.
+    """
+
+    def __init__(
+        self,
+        bots: int = 10,
+        page_size: int = 20,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 10.0,
+        disconnect_rate: float = 0.0,
+        latency_seconds: float = 0.0,
+        seed: int | None = None,
+    ):
+        """
+        Initialize the fake API.
+        
+        Args:
+            bots: Number of bots of the organization.
+            page_size: Number of sessions per page of the session list.
+            error_rate: Fraction of requests answered with a 500 error.
+            timeout_rate: Fraction of requests answered only after the timeout delay.
+            timeout_seconds: Delay of slow responses in seconds.
+            disconnect_rate: Fraction of requests whose connection is closed without a response.
+            latency_seconds: Delay of every response in seconds.
+            seed: Seed of the fault injection, for reproducible runs.
+        """
+        self.bots = [
+            {"name": f"Bot {i}", "bot_id": f"bot-{uuid.UUID(int=i)}", "meta": {}} for i in range(1, bots + 1)
+        ]
+        self.sessions: dict[str, tuple[str, str]] = {}
+        self.session_meta: dict[str, dict] = {}
+        self.requests = 0
+        self.calls: list[tuple[str, str]] = []
+        self._page_size = page_size
+        self._error_rate = error_rate
+        self._timeout_rate = timeout_rate
+        self._timeout_seconds = timeout_seconds
+        self._disconnect_rate = disconnect_rate
+        self._latency_seconds = latency_seconds
+        self._random = random.Random(seed)
+
+    def app(self) -> web.Application:
+        """
+        Build the aiohttp application serving the fake API.
+        
+        Returns:
+            web.Application: The application.
+        """
+        app = web.Application(middlewares=[self._inject_faults])
+        app.router.add_get("/m2m/organizations/bots", self._get_bots)
+        app.router.add_post("/m2m/client_sessions", self._create_session)
+        app.router.add_get("/m2m/client_sessions/", self._list_sessions)
+        app.router.add_get("/m2m/client_sessions/{session_id}", self._get_session)
+        app.router.add_delete("/m2m/client_sessions/{session_id}", self._delete_session)
+        app.router.add_post("/m2m/client_sessions/{session_id}/renew", self._renew_session)
+        return app
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests += 1
+        self.calls.append((request.method, request.path))
+        if self._latency_seconds:
+            await asyncio.sleep(self._latency_seconds)
+        roll = self._random.random()
+        if roll < self._error_rate:
+            return web.json_response({"detail": "Injected error"}, status=500)
+        roll -= self._error_rate
+        if roll < self._timeout_rate:
+            await asyncio.sleep(self._timeout_seconds)
+        elif roll - self._timeout_rate < self._disconnect_rate:
+            request.transport.close()
+            raise web.HTTPInternalServerError()
+        return await handler(request)
+
+    def _session_dto(self, session_id: str) -> dict:
+        owner, bot_id = self.sessions[session_id]
+        return {
+            "organization_id": ORGANIZATION_ID,
+            "session_id": session_id,
+            "external_user_id": owner,
+            "messages": [{"role": "assistant", "content": "Hello! How can I help you today?"}],
+            "bot_configuration": {"bot_id": bot_id},
+            "meta": self.session_meta.get(session_id, {}),
+        }
+
+    async def _get_bots(self, request: web.Request) -> web.Response:
+        return web.json_response(self.bots)
+
+    async def _create_session(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not any(bot["bot_id"] == body["bot_id"] for bot in self.bots):
+            return web.json_response({"detail": "Unknown bot"}, status=400)
+        session_id = f"session-{uuid.uuid4()}"
+        self.sessions[session_id] = (body["user"]["organization_user_id"], body["bot_id"])
+        self.session_meta[session_id] = body.get("meta", {})
+        return web.json_response({
+            "session": {
+                "organization_id": ORGANIZATION_ID,
+                "session_id": session_id,
+                "editable": body.get("editable", "none"),
+                "meta": body.get("meta", {}),
+            },
+            "token": uuid.uuid4().hex,
+        })
+
+    async def _list_sessions(self, request: web.Request) -> web.Response:
+        user_id = request.query["external_user_id"]
+        bot_ids = set(request.query.getall("bot_ids", []))
+        offset = int(request.query.get("cursor", 0))
+        # Like the Claire API, sessions are listed most recent first.
+        matching = [
+            session_id
+            for session_id, (owner, bot_id) in reversed(self.sessions.items())
+            if owner == user_id and (not bot_ids or bot_id in bot_ids)
+        ]
+        page = matching[offset:offset + self._page_size]
+        next_offset = offset + self._page_size
+        cursor = {"cursor_id": str(next_offset)} if next_offset < len(matching) else None
+        return web.json_response({"cursor": cursor, "results": [self._session_dto(s) for s in page]})
+
+    async def _get_session(self, request: web.Request) -> web.Response:
+        session_id = request.match_info["session_id"]
+        if session_id not in self.sessions:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response(self._session_dto(session_id))
+
+    async def _delete_session(self, request: web.Request) -> web.Response:
+        session_id = request.match_info["session_id"]
+        self.session_meta.pop(session_id, None)
+        if self.sessions.pop(session_id, None) is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response({})
+
+    async def _renew_session(self, request: web.Request) -> web.Response:
+        session_id = request.match_info["session_id"]
+        if session_id not in self.sessions:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response({
+            "session": {"organization_id": ORGANIZATION_ID, "session_id": session_id, "editable": "none", "meta": {}},
+            "token": uuid.uuid4().hex,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bots", type=int, default=10, help="Bots of the organization")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests answered late")
+    parser.add_argument("--timeout-seconds", type=float, default=10.0, help="Delay of late responses")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Fraction of dropped connections")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay of every response")
+    args = parser.parse_args()
+
+    fake = FakeClaire(
+        bots=args.bots,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        disconnect_rate=args.disconnect_rate,
+        latency_seconds=args.latency_ms / 1000,
+    )
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Shared helpers for running the organization server in benchmarks and test harnesses.
+
+The application is pointed at a local Claire API, Auth0 is bypassed by answering
+the JWKS download locally, and the authenticated user is taken from a request
+header instead of a verified access token.
+"""
+
+import asyncio
+import io
+import os
+import time
+import urllib.request
+
+USER_HEADER = "X-Benchmark-User"
+
+
+def configure_environment(claire_url: str, **settings: str):
+    """
+    Point the application at a local Claire API and bypass the Auth0 JWKS download.
+    
+    Must be called before the application is imported. Auth0, CORS and logging
+    settings are only set if they are not configured in the environment.
+    
+    Args:
+        claire_url: Base URL of the local Claire API.
+        **settings: Additional environment variables to set, such as CLAIRE__TIMEOUT_SECONDS.
+    """
+    os.environ["CLAIRE__BASE_URL"] = claire_url
+    os.environ["CLAIRE__API_KEY"] = "benchmark"
+    os.environ.update(settings)
+    os.environ.setdefault("AUTH0__DOMAIN", "benchmark.invalid")
+    os.environ.setdefault("AUTH0__AUDIENCE", "benchmark")
+    os.environ.setdefault("CORS__ALLOWED_ORIGINS", "")
+    os.environ.setdefault("LOGGING__LEVEL", "CRITICAL")
+    os.environ.setdefault("LOGGING__ACCESS_LOG", "false")
+
+    urlopen = urllib.request.urlopen
+
+    def offline_urlopen(url, *args, **kwargs):
+        if isinstance(url, str) and url.endswith("/.well-known/jwks.json"):
+            return io.BytesIO(b'{"keys": []}')
+        return urlopen(url, *args, **kwargs)
+
+    urllib.request.urlopen = offline_urlopen
+
+
+def install_user_override(app):
+    """
+    Authenticate requests as the user named in the USER_HEADER header.
+    
+    Args:
+        app: The FastAPI application.
+    """
+    from fastapi import Request
+    from organization_server_demo.modules.base.authenticated_user_provider import verify_user, OrganizationUser
+
+    async def header_user(request: Request) -> OrganizationUser:
+        return OrganizationUser(sub=request.headers.get(USER_HEADER, "benchmark-user"))
+
+    app.dependency_overrides[verify_user] = header_user
+
+
+async def wait_for_port(port: int, timeout: float = 10.0):
+    """
+    Wait until a local port accepts connections.
+    
+    Args:
+        port: The port.
+        timeout: Maximum time to wait in seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            await writer.wait_closed()
+            return
@@ -0,0 +1,388 @@
+"""
+Deterministic replay of captured traffic for performance regression testing.
+
+Replays a capture written by the traffic capture middleware (CAPTURE__ENABLED)
+against one or more builds of the organization server and reports latency and
+throughput per build, with the deltas of every build against the first one.
+
+Every build runs in its own process from the given source directory, against a
+local stand-in for the Claire API that serves the captured responses. Claire
+API calls are matched with captured responses by method, path, query and user.
+The requests of each user are sent in their captured order, at the captured
+pace divided by the speed factor, or as fast as possible with --speed 0.
+
+Usage:
+    git worktree add /tmp/baseline main
+    uv run python benchmarks/replay.py run captures/traffic.jsonl.gz \\
+        --build baseline=/tmp/baseline/src --build current=src --speed 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from harness import USER_HEADER, configure_environment, install_user_override, wait_for_port  # noqa: E402
+
+# The application is imported lazily: only after the environment is configured, and
+# in the serve processes only from the source directory of the build.
+
+
+def load_capture(path: str) -> list[dict[str, Any]]:
+    """
+    Load the records of a capture file.
+    
+    Args:
+        path: Path of the capture file.
+    
+    Returns:
+        list[dict[str, Any]]: The captured records in capture order.
+    """
+    from organization_server_demo.modules.base.traffic_capture import read_capture
+
+    return sorted(read_capture(path), key=lambda record: record["t"])
+
+
+class StandInClaire:
+    """
+    Stand-in for the Claire API serving captured responses.
+    
+    Attributes:
+        misses: Number of calls without a captured response.
+    """
+
+    def __init__(self, records: list[dict[str, Any]], recorded_latency: bool):
+        """
+        Initialize the stand-in.
+        
+        Args:
+            records: Captured records containing the Claire API calls.
+            recorded_latency: Whether to delay responses by the captured latency.
+        """
+        self._records = records
+        self._recorded_latency = recorded_latency
+        self._responses: dict[str, deque[dict[str, Any]]] = {}
+        self._last: dict[str, dict[str, Any]] = {}
+        self.misses = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Queue all captured responses again, e.g. after warmup rounds.
+        """
+        from organization_server_demo.modules.base.traffic_capture import upstream_key
+
+        self._responses = defaultdict(deque)
+        self._last = {}
+        self.misses = 0
+        for record in self._records:
+            for call in record["upstream"]:
+                if call["status"] is not None:
+                    key = upstream_key(call["method"], call["path"], [tuple(p) for p in call["query"]], call["user"])
+                    self._responses[key].append(call)
+
+    def app(self) -> web.Application:
+        """
+        Build the aiohttp application serving the captured responses.
+        
+        Returns:
+            web.Application: The application.
+        """
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        from organization_server_demo.modules.base.traffic_capture import request_body_user, upstream_key
+
+        body = await request.read()
+        try:
+            request_body = json.loads(body) if body else None
+        except ValueError:
+            request_body = None
+
+        key = upstream_key(
+            request.method, request.path, list(request.query.items()), request_body_user(request_body)
+        )
+        queued = self._responses.get(key)
+        call = queued.popleft() if queued else self._last.get(key)
+        if call is None:
+            self.misses += 1
+            return web.json_response({"detail": "No captured response"}, status=404)
+        self._last[key] = call
+
+        if self._recorded_latency:
+            await asyncio.sleep(call["latency_ms"] / 1000)
+        if call["body"] is None:
+            return web.Response(status=call["status"])
+        return web.json_response(call["body"], status=call["status"])
+
+
+async def replay(records: list[dict[str, Any]], base_url: str, speed: float) -> list[dict[str, Any]]:
+    """
+    Send the captured requests to a running build.
+    
+    Args:
+        records: Captured records.
+        base_url: Base URL of the build.
+        speed: Factor by which the captured pace is accelerated, or 0 for no pacing.
+    
+    Returns:
+        list[dict[str, Any]]: Route, captured status, replayed status and latency of every request.
+    """
+    sequences: dict[str | None, list[dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        sequences[record["user"]].append(record)
+
+    results: list[dict[str, Any]] = []
+    started = time.monotonic()
+
+    async def replay_sequence(client: aiohttp.ClientSession, sequence: list[dict[str, Any]]):
+        for record in sequence:
+            if speed > 0:
+                await asyncio.sleep(max(0.0, started + record["t"] / speed - time.monotonic()))
+            headers = {USER_HEADER: record["user"]} if record["user"] else {}
+            request_start = time.perf_counter()
+            try:
+                async with client.request(
+                        record["method"], record["path"], params=record["query"], headers=headers
+                ) as resp:
+                    await resp.read()
+                    status = resp.status
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            results.append({
+                "route": f"{record['method']} {record['route'] or record['path']}",
+                "captured_status": record["status"],
+                "status": status,
+                "latency_ms": (time.perf_counter() - request_start) * 1000,
+            })
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(base_url=base_url, connector=connector) as client:
+        await asyncio.gather(*(replay_sequence(client, sequence) for sequence in sequences.values()))
+    return results
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    """
+    Compute a percentile of a list of values.
+    
+    Args:
+        values: The values.
+        percentile: The percentile, between 0 and 100.
+    
+    Returns:
+        float: The percentile, or 0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[min(max(int(percentile), 1), 99) - 1]
+
+
+def summarize(results: list[dict[str, Any]], duration_s: float, misses: int) -> dict[str, Any]:
+    """
+    Summarize the replay of a build.
+    
+    Args:
+        results: Results of the replayed requests.
+        duration_s: Wall time of the replay in seconds.
+        misses: Claire API calls without a captured response.
+    
+    Returns:
+        dict[str, Any]: Throughput, latency percentiles overall and per route, and mismatches.
+    """
+    def latency(values: list[float]) -> dict[str, float]:
+        return {
+            "p50_ms": round(_percentile(values, 50), 3),
+            "p95_ms": round(_percentile(values, 95), 3),
+            "p99_ms": round(_percentile(values, 99), 3),
+            "mean_ms": round(statistics.fmean(values), 3) if values else 0.0,
+        }
+
+    by_route: dict[str, list[float]] = defaultdict(list)
+    for result in results:
+        by_route[result["route"]].append(result["latency_ms"])
+    return {
+        "requests": len(results),
+        "duration_s": round(duration_s, 3),
+        "throughput_rps": round(len(results) / duration_s, 2) if duration_s else 0.0,
+        "status_mismatches": sum(1 for result in results if result["status"] != result["captured_status"]),
+        "upstream_misses": misses,
+        "latency": latency([result["latency_ms"] for result in results]),
+        "routes": {route: {"requests": len(values), **latency(values)} for route, values in sorted(by_route.items())},
+    }
+
+
+async def run_build(name: str, src: str, records: list[dict[str, Any]], args: argparse.Namespace) -> dict[str, Any]:
+    """
+    Replay the capture against one build.
+    
+    Args:
+        name: Name of the build.
+        src: Source directory of the build containing the organization_server_demo package.
+        records: Captured records.
+        args: Parsed command line arguments.
+    
+    Returns:
+        dict[str, Any]: Summary of the replay.
+    """
+    stand_in = StandInClaire(records, recorded_latency=args.upstream_latency == "recorded")
+    runner = web.AppRunner(stand_in.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.claire_port).start()
+
+    server = subprocess.Popen(
+        [
+            sys.executable, __file__, "serve",
+            "--src", src,
+            "--port", str(args.port),
+            "--claire-url", f"http://127.0.0.1:{args.claire_port}",
+        ],
+    )
+    try:
+        await wait_for_port(args.port, timeout=30.0)
+        for _ in range(args.warmup_rounds):
+            await replay(records, f"http://127.0.0.1:{args.port}", speed=0)
+        stand_in.reset()
+        started = time.monotonic()
+        results = await replay(records, f"http://127.0.0.1:{args.port}", args.speed)
+        summary = summarize(results, time.monotonic() - started, stand_in.misses)
+    finally:
+        server.terminate()
+        server.wait()
+        await runner.cleanup()
+    print(f"{name}: {json.dumps({k: v for k, v in summary.items() if k != 'routes'})}", flush=True)
+    return summary
+
+
+def _delta(value: float, baseline: float) -> str:
+    """
+    Format the relative change of a value against a baseline.
+    
+    Args:
+        value: The value.
+        baseline: The baseline value.
+    
+    Returns:
+        str: The relative change in percent.
+    """
+    if not baseline:
+        return "n/a"
+    return f"{(value - baseline) / baseline * 100:+.1f}%"
+
+
+def print_comparison(summaries: dict[str, dict[str, Any]]):
+    """
+    Print the latency and throughput of every build with the deltas against the first build.
+    
+    Args:
+        summaries: Replay summaries by build name.
+    """
+    names = list(summaries)
+    baseline = summaries[names[0]]
+    print(f"\n{'build':<16}{'rps':>10}{'delta':>10}{'p50 ms':>10}{'delta':>10}{'p95 ms':>10}{'delta':>10}"
+          f"{'p99 ms':>10}{'delta':>10}{'mismatch':>10}{'misses':>8}")
+    for name in names:
+        summary = summaries[name]
+        lat, base_lat = summary["latency"], baseline["latency"]
+        print(
+            f"{name:<16}{summary['throughput_rps']:>10}"
+            f"{_delta(summary['throughput_rps'], baseline['throughput_rps']):>10}"
+            f"{lat['p50_ms']:>10}{_delta(lat['p50_ms'], base_lat['p50_ms']):>10}"
+            f"{lat['p95_ms']:>10}{_delta(lat['p95_ms'], base_lat['p95_ms']):>10}"
+            f"{lat['p99_ms']:>10}{_delta(lat['p99_ms'], base_lat['p99_ms']):>10}"
+            f"{summary['status_mismatches']:>10}{summary['upstream_misses']:>8}"
+        )
+
+    print(f"\n{'route':<40}{'build':<16}{'requests':>10}{'p50 ms':>10}{'delta':>10}{'p95 ms':>10}{'delta':>10}")
+    for route, base_route in baseline["routes"].items():
+        for name in names:
+            route_summary = summaries[name]["routes"].get(route)
+            if route_summary is None:
+                continue
+            print(
+                f"{route:<40}{name:<16}{route_summary['requests']:>10}"
+                f"{route_summary['p50_ms']:>10}{_delta(route_summary['p50_ms'], base_route['p50_ms']):>10}"
+                f"{route_summary['p95_ms']:>10}{_delta(route_summary['p95_ms'], base_route['p95_ms']):>10}"
+            )
+
+
+def serve(args: argparse.Namespace):
+    """
+    Serve a build against the stand-in Claire API; run in a separate process per build.
+    
+    Args:
+        args: Parsed command line arguments of the serve command.
+    """
+    sys.path.insert(0, os.path.abspath(args.src))
+    configure_environment(args.claire_url, CAPTURE__ENABLED="false")
+
+    import uvicorn
+    from organization_server_demo.app import app
+
+    install_user_override(app)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Replay a capture against one or more builds")
+    run_parser.add_argument("capture", help="Path of the capture file")
+    run_parser.add_argument(
+        "--build", action="append", required=True, metavar="NAME=SRC",
+        help="Build to replay against, as name and source directory; the first build is the baseline",
+    )
+    run_parser.add_argument("--speed", type=float, default=1.0, help="Pace factor, 0 to send as fast as possible")
+    run_parser.add_argument(
+        "--upstream-latency", choices=("recorded", "none"), default="recorded",
+        help="Whether the stand-in Claire API responds with the captured latency",
+    )
+    run_parser.add_argument("--warmup-rounds", type=int, default=0, help="Unmeasured replays before measuring")
+    run_parser.add_argument("--port", type=int, default=8897, help="Port of the replayed build")
+    run_parser.add_argument("--claire-port", type=int, default=8896, help="Port of the stand-in Claire API")
+    run_parser.add_argument("--output", help="Write the summaries of all builds to this JSON file")
+
+    serve_parser = commands.add_parser("serve", help="Serve a build; used internally by run")
+    serve_parser.add_argument("--src", required=True)
+    serve_parser.add_argument("--port", type=int, required=True)
+    serve_parser.add_argument("--claire-url", required=True)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+        return
+
+    builds = [build.split("=", 1) for build in args.build]
+    configure_environment(f"http://127.0.0.1:{args.claire_port}", CAPTURE__ENABLED="false")
+    records = load_capture(args.capture)
+    print(f"Replaying {len(records)} captured requests against {len(builds)} build(s).", flush=True)
+
+    async def run_all() -> dict[str, dict[str, Any]]:
+        return {name: await run_build(name, src, records, args) for name, src in builds}
+
+    summaries = asyncio.run(run_all())
+    print_comparison(summaries)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summaries, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
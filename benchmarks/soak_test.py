@@ -0,0 +1,344 @@
+"""
+Soak test of the organization server with memory and socket leak detection.
+
+Runs the application in-process behind uvicorn against the fake Claire API, which
+runs in a separate process and injects upstream errors, timeouts and dropped
+connections. A mix of bot, session creation, listing, renewal and deletion
+requests is sent for the configured duration, while the resident set size, open
+file descriptors, live aiohttp client sessions and tracemalloc allocations of the
+process are sampled. After the run, the growth since the end of the warmup is
+compared with the thresholds and the allocators that grew most are listed. The
+exit code is 1 if a threshold was exceeded.
+
+Auth0 is bypassed: the JWKS download is answered locally and the authenticated
+user is taken from a request header.
+
+Usage:
+    uv run python benchmarks/soak_test.py --duration 14400 --concurrency 50 --error-rate 0.02 --timeout-rate 0.01
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_claire import FakeClaire  # noqa: E402
+from harness import USER_HEADER, configure_environment, install_user_override, wait_for_port  # noqa: E402
+
+
+def _serve_fake_claire(port: int, args: argparse.Namespace):
+    """
+    Serve the fake Claire API; run in a separate process.
+    
+    Args:
+        port: Port of the fake API.
+        args: Parsed command line arguments with the fault injection rates.
+    """
+    # Handlers of requests the server gave up on fail with connection errors, which are expected here.
+    logging.getLogger("aiohttp").setLevel(logging.CRITICAL)
+    fake = FakeClaire(
+        bots=args.bots,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.upstream_delay,
+        disconnect_rate=args.disconnect_rate,
+        seed=args.seed,
+    )
+    web.run_app(fake.app(), host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+def rss_bytes() -> int:
+    """
+    Get the resident set size of the process.
+    
+    Returns:
+        int: Resident set size in bytes, or the peak size where the current size is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def open_fds() -> int:
+    """
+    Get the number of open file descriptors of the process.
+    
+    Returns:
+        int: Number of open file descriptors.
+    """
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return -1
+
+
+def live_client_sessions(exclude: aiohttp.ClientSession) -> int:
+    """
+    Count the unclosed aiohttp client sessions of the application.
+    
+    Args:
+        exclude: Client session of the load generator.
+    
+    Returns:
+        int: Number of live client sessions.
+    """
+    return sum(
+        1
+        for obj in gc.get_objects()
+        if isinstance(obj, aiohttp.ClientSession) and obj is not exclude and not obj.closed
+    )
+
+
+def sample(client: aiohttp.ClientSession, started: float) -> dict:
+    """
+    Take a resource sample.
+    
+    Args:
+        client: Client session of the load generator.
+        started: Start of the run as returned by time.monotonic.
+    
+    Returns:
+        dict: The sample.
+    """
+    gc.collect()
+    return {
+        "elapsed_s": round(time.monotonic() - started, 1),
+        "rss_mb": round(rss_bytes() / 2 ** 20, 2),
+        "fds": open_fds(),
+        "client_sessions": live_client_sessions(client),
+        "traced_mb": round(tracemalloc.get_traced_memory()[0] / 2 ** 20, 2),
+    }
+
+
+class LoadGenerator:
+    """
+    Simulated client traffic against the organization server.
+    
+    Attributes:
+        outcomes: Number of requests per operation and status or error type.
+    """
+
+    def __init__(self, base_url: str, users: int, bot_ids: list[str], client_timeout: float, seed: int | None):
+        """
+        Initialize the load generator.
+        
+        Args:
+            base_url: Base URL of the organization server.
+            users: Number of simulated users.
+            bot_ids: IDs of the bots sessions are created for.
+            client_timeout: Timeout of client requests in seconds.
+            seed: Seed of the traffic mix.
+        """
+        self.outcomes: Counter[str] = Counter()
+        self.client = aiohttp.ClientSession(base_url=base_url, timeout=aiohttp.ClientTimeout(total=client_timeout))
+        self._users = [f"soak-user-{i}" for i in range(users)]
+        self._bot_ids = bot_ids
+        self._sessions: dict[str, list[str]] = {user: [] for user in self._users}
+        self._random = random.Random(seed)
+
+    async def run(self, deadline: float):
+        """
+        Send requests until the deadline.
+        
+        Args:
+            deadline: End of the run as returned by time.monotonic.
+        """
+        while time.monotonic() < deadline:
+            user = self._random.choice(self._users)
+            sessions = self._sessions[user]
+            roll = self._random.random()
+            if roll < 0.2:
+                await self._send("get_bots", user, "GET", "/bots")
+            elif roll < 0.4 or not sessions:
+                response = await self._send(
+                    "create_session", user, "POST", "/session", params={"bot_id": self._random.choice(self._bot_ids)}
+                )
+                if response is not None and len(sessions) < 50:
+                    sessions.append(response["session"]["session_id"])
+            elif roll < 0.75:
+                await self._send("list_sessions", user, "GET", "/session")
+            elif roll < 0.85:
+                await self._send("renew_session", user, "POST", f"/session/{self._random.choice(sessions)}/renew")
+            else:
+                session_id = sessions.pop(self._random.randrange(len(sessions)))
+                await self._send("delete_session", user, "DELETE", f"/session/{session_id}")
+
+    async def _send(self, operation: str, user: str, method: str, path: str, **kwargs) -> dict | None:
+        """
+        Send a request and record its outcome.
+        
+        Args:
+            operation: Name of the operation.
+            user: Simulated user sending the request.
+            method: HTTP method.
+            path: Path of the request.
+            **kwargs: Additional arguments passed to aiohttp.
+        
+        Returns:
+            dict | None: The JSON response of a successful request, otherwise None.
+        """
+        try:
+            async with self.client.request(method, path, headers={USER_HEADER: user}, **kwargs) as resp:
+                body = await resp.json(content_type=None)
+                self.outcomes[f"{operation} {resp.status}"] += 1
+                return body if resp.status == 200 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.outcomes[f"{operation} {type(e).__name__}"] += 1
+            return None
+
+    async def close(self):
+        await self.client.close()
+
+
+def _print_top_allocators(baseline: tracemalloc.Snapshot, limit: int):
+    """
+    Print the allocation sites that grew most since the baseline.
+    
+    Args:
+        baseline: Snapshot taken at the end of the warmup.
+        limit: Number of allocation sites to print.
+    """
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+    print(f"\nTop {limit} allocators by growth since the warmup:")
+    stats = sorted(snapshot.compare_to(baseline.filter_traces(filters), "traceback"), key=lambda s: -s.size_diff)
+    for stat in stats[:limit]:
+        frame = stat.traceback[-1]
+        print(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  {frame.filename}:{frame.lineno}")
+
+
+async def soak(args: argparse.Namespace) -> bool:
+    """
+    Run the soak test.
+    
+    Args:
+        args: Parsed command line arguments.
+    
+    Returns:
+        bool: Whether all growth thresholds were met.
+    """
+    import uvicorn
+    from organization_server_demo.app import app
+
+    install_user_override(app)
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    await wait_for_port(args.claire_port)
+    bot_ids = [f"bot-00000000-0000-0000-0000-{i:012x}" for i in range(1, args.bots + 1)]
+    generator = LoadGenerator(f"http://127.0.0.1:{args.port}", args.users, bot_ids, args.client_timeout, args.seed)
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    workers = [asyncio.create_task(generator.run(deadline)) for _ in range(args.concurrency)]
+
+    baseline, baseline_snapshot = None, None
+    samples = []
+    try:
+        while not all(worker.done() for worker in workers):
+            await asyncio.sleep(min(args.sample_interval, max(deadline - time.monotonic(), 0.1)))
+            current = sample(generator.client, started)
+            samples.append(current)
+            print(json.dumps(current), flush=True)
+            if baseline is None and current["elapsed_s"] >= args.warmup:
+                baseline, baseline_snapshot = current, tracemalloc.take_snapshot()
+        await asyncio.gather(*workers)
+        final = sample(generator.client, started)
+    finally:
+        await generator.close()
+        server.should_exit = True
+        await server_task
+
+    baseline = baseline or (samples[0] if samples else final)
+    growth = {
+        "rss_mb": round(final["rss_mb"] - baseline["rss_mb"], 2),
+        "fds": final["fds"] - baseline["fds"],
+        "client_sessions": final["client_sessions"] - baseline["client_sessions"],
+        "traced_mb": round(final["traced_mb"] - baseline["traced_mb"], 2),
+    }
+    limits = {
+        "rss_mb": args.max_rss_growth_mb,
+        "fds": args.max_fd_growth,
+        "client_sessions": args.max_session_growth,
+        "traced_mb": args.max_traced_growth_mb,
+    }
+    failures = [name for name, value in growth.items() if value > limits[name]]
+
+    print("\nOutcomes:")
+    for outcome, count in sorted(generator.outcomes.items()):
+        print(f"  {outcome:<40}{count:>10}")
+    print(f"\nGrowth since warmup: {json.dumps(growth)}")
+    print(f"Limits: {json.dumps(limits)}")
+    if baseline_snapshot is not None:
+        _print_top_allocators(baseline_snapshot, args.top)
+    print(f"\n{'FAILED: ' + ', '.join(failures) + ' exceeded' if failures else 'PASSED'}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3600, help="Duration of the run in seconds")
+    parser.add_argument("--warmup", type=float, default=60, help="Seconds before the baseline sample")
+    parser.add_argument("--sample-interval", type=float, default=30, help="Seconds between samples")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent simulated clients")
+    parser.add_argument("--users", type=int, default=200, help="Simulated users")
+    parser.add_argument("--bots", type=int, default=10, help="Bots of the fake organization")
+    parser.add_argument("--port", type=int, default=8899, help="Port of the organization server")
+    parser.add_argument("--claire-port", type=int, default=8898, help="Port of the fake Claire API")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of upstream 500 errors")
+    parser.add_argument("--timeout-rate", type=float, default=0.01, help="Fraction of upstream timeouts")
+    parser.add_argument("--disconnect-rate", type=float, default=0.005, help="Fraction of dropped upstream connections")
+    parser.add_argument("--upstream-delay", type=float, default=3.0, help="Delay of slow upstream responses")
+    parser.add_argument("--upstream-timeout", type=float, default=1.0, help="Claire API timeout of the server")
+    parser.add_argument("--client-timeout", type=float, default=5.0, help="Timeout of simulated client requests")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0, help="Allowed RSS growth")
+    parser.add_argument("--max-fd-growth", type=int, default=20, help="Allowed growth of open file descriptors")
+    parser.add_argument("--max-session-growth", type=int, default=0, help="Allowed growth of live aiohttp sessions")
+    parser.add_argument("--max-traced-growth-mb", type=float, default=20.0, help="Allowed tracemalloc growth")
+    parser.add_argument("--top", type=int, default=15, help="Allocation sites listed after the run")
+    parser.add_argument("--traceback-depth", type=int, default=5, help="Frames kept per traced allocation")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the traffic mix and fault injection")
+    args = parser.parse_args()
+
+    configure_environment(
+        f"http://127.0.0.1:{args.claire_port}",
+        CLAIRE__TIMEOUT_SECONDS=str(args.upstream_timeout),
+        CAPTURE__ENABLED="false",
+    )
+    fake_claire = multiprocessing.Process(target=_serve_fake_claire, args=(args.claire_port, args), daemon=True)
+    fake_claire.start()
+    tracemalloc.start(args.traceback_depth)
+    try:
+        passed = asyncio.run(soak(args))
+    finally:
+        fake_claire.terminate()
+        fake_claire.join()
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,74 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Response
+from starlette import status
+
+from organization_server_demo.modules.admin.profiling_middleware import ProfilingMiddleware
+from organization_server_demo.modules.admin.routers.delete_queue import router as delete_queue_router
+from organization_server_demo.modules.admin.routers.metrics import router as metrics_router
+from organization_server_demo.modules.admin.routers.profiling import router as profiling_router
+from organization_server_demo.modules.base.compression import CompressionMiddleware, warn_unavailable_encodings
+from organization_server_demo.modules.base.cors_middleware import ReloadableCORSMiddleware
+from organization_server_demo.modules.base.lifecycle import InFlightMiddleware, LIFECYCLE
+from organization_server_demo.modules.base.structured_logging import configure_logging, AccessLogMiddleware
+from organization_server_demo.modules.base.traffic_capture import CaptureMiddleware, TRAFFIC_CAPTURE
 from organization_server_demo.modules.claire.routers.bots import router as bots_router
 from organization_server_demo.modules.claire.routers.sessions import router as session_router
+from organization_server_demo.modules.claire.services.delete_queue import DELETE_QUEUE
+from organization_server_demo.modules.claire.services.session_index import SESSION_INDEX
+from organization_server_demo.modules.claire.services.session_service import delete_queued_session, \
+    reconcile_user_sessions
+from organization_server_demo.modules.claire.services.tenant_registry import TENANT_REGISTRY
 from . import __version__ as organization_server_demo_version
-from .settings import SHARED_SETTINGS
+from .settings import SETTINGS_STORE
+from .settings_watcher import SettingsWatcher
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    log_listener = configure_logging(SETTINGS_STORE.current.logging)
+    SETTINGS_STORE.subscribe(log_listener.reload)
+    warn_unavailable_encodings(SETTINGS_STORE.current)
+    SETTINGS_STORE.subscribe(warn_unavailable_encodings)
+    TENANT_REGISTRY.load(SETTINGS_STORE.current)
+    SETTINGS_STORE.subscribe(TENANT_REGISTRY.load)
+    TRAFFIC_CAPTURE.configure(SETTINGS_STORE.current)
+    SETTINGS_STORE.subscribe(TRAFFIC_CAPTURE.configure)
+    DELETE_QUEUE.start(SETTINGS_STORE.current.delete_queue, delete_queued_session)
+    SETTINGS_STORE.subscribe(DELETE_QUEUE.configure)
+    SESSION_INDEX.start(SETTINGS_STORE.current.session_index, reconcile_user_sessions)
+    SETTINGS_STORE.subscribe(SESSION_INDEX.configure)
+    settings_watcher = SettingsWatcher(SETTINGS_STORE)
+    settings_watcher.start()
+    await TENANT_REGISTRY.warm_up(SETTINGS_STORE.current.lifecycle.warm_up_timeout_seconds)
+    LIFECYCLE.start(SETTINGS_STORE.current.lifecycle)
+    try:
+        yield
+    finally:
+        await LIFECYCLE.drain(SETTINGS_STORE.current.lifecycle.drain_timeout_seconds)
+        await settings_watcher.stop()
+        SETTINGS_STORE.unsubscribe(DELETE_QUEUE.configure)
+        await DELETE_QUEUE.close(LIFECYCLE.remaining_seconds())
+        SETTINGS_STORE.unsubscribe(SESSION_INDEX.configure)
+        await SESSION_INDEX.close()
+        SETTINGS_STORE.unsubscribe(TENANT_REGISTRY.load)
+        await TENANT_REGISTRY.close(LIFECYCLE.remaining_seconds())
+        SETTINGS_STORE.unsubscribe(TRAFFIC_CAPTURE.configure)
+        await asyncio.to_thread(TRAFFIC_CAPTURE.close)
+        SETTINGS_STORE.unsubscribe(warn_unavailable_encodings)
+        SETTINGS_STORE.unsubscribe(log_listener.reload)
+        log_listener.stop()
+
 
-app = FastAPI(title="Organization Server Demo", version=organization_server_demo_version)
+app = FastAPI(title="Organization Server Demo", version=organization_server_demo_version, lifespan=lifespan)
 
-if SHARED_SETTINGS.cors.allowed_origins:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=SHARED_SETTINGS.cors.allowed_origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+app.add_middleware(CompressionMiddleware, settings_store=SETTINGS_STORE)
+app.add_middleware(ReloadableCORSMiddleware, settings_store=SETTINGS_STORE)
+app.add_middleware(ProfilingMiddleware, settings_store=SETTINGS_STORE)
+app.add_middleware(AccessLogMiddleware, settings_store=SETTINGS_STORE)
+app.add_middleware(CaptureMiddleware, capture=TRAFFIC_CAPTURE)
+app.add_middleware(InFlightMiddleware, lifecycle=LIFECYCLE)
 
 
 @app.get("/")
@@ -28,5 +81,17 @@ async def health():
     }
 
 
+@app.get("/ready")
+async def ready(response: Response):
+    if not LIFECYCLE.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": LIFECYCLE.state.value,
+    }
+
+
 app.include_router(session_router, prefix="/session")
 app.include_router(bots_router, prefix="/bots")
+app.include_router(profiling_router, prefix="/admin/profiling")
+app.include_router(metrics_router, prefix="/admin/metrics")
+app.include_router(delete_queue_router, prefix="/admin/delete-queue")
@@ -0,0 +1,193 @@
+"""
+Profiling middleware for the organization server demo.
+
+This module provides the middleware recording the timing breakdown of requests,
+keeping slow requests in a ring buffer and writing cProfile dumps on request.
+"""
+
+import asyncio
+import cProfile
+import logging
+import os
+import time
+from collections import deque
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from organization_server_demo.modules.admin.providers.admin_provider import is_admin_key
+from organization_server_demo.modules.base.profiling import RequestProfile, profile_request
+from organization_server_demo.settings import SettingsStore, ProfilingSettings
+
+logger = logging.getLogger(__name__)
+
+CPROFILE_HEADER = "x-profile"
+ADMIN_KEY_HEADER = "x-admin-key"
+
+
+class SlowRequestLog:
+    """
+    Ring buffer of the timing breakdowns of slow requests.
+    """
+
+    def __init__(self, max_size: int = 100):
+        """
+        Initialize an empty ring buffer.
+        
+        Args:
+            max_size: Number of slow requests to keep.
+        """
+        self._entries: deque[RequestProfile] = deque(maxlen=max_size)
+
+    def add(self, profile: RequestProfile, max_size: int):
+        """
+        Add the profile of a slow request, dropping the oldest entry if the buffer is full.
+        
+        Args:
+            profile: Profile of the slow request.
+            max_size: Currently configured number of slow requests to keep.
+        """
+        if self._entries.maxlen != max_size:
+            self._entries = deque(self._entries, maxlen=max_size)
+        self._entries.append(profile)
+
+    def entries(self) -> list[dict[str, Any]]:
+        """
+        Get the kept slow requests, newest first.
+        
+        Returns:
+            list[dict[str, Any]]: Timing breakdowns of the slow requests.
+        """
+        return [profile.to_dict() for profile in reversed(self._entries)]
+
+    def clear(self):
+        """
+        Remove all kept slow requests.
+        """
+        self._entries.clear()
+
+
+SLOW_REQUEST_LOG = SlowRequestLog()
+
+
+class ProfilingMiddleware:
+    """
+    Middleware profiling requests as configured.
+    
+    When profiling is enabled, a timing breakdown is recorded for every request and
+    kept in the slow request log if the request exceeded the threshold. Independently,
+    administrators can request a cProfile dump of a single request with the
+    X-Profile header. As cProfile profiles the whole thread, such a dump also
+    contains the work of other requests handled concurrently, and only one request
+    is profiled at a time.
+    """
+
+    def __init__(self, app: ASGIApp, settings_store: SettingsStore):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: The wrapped ASGI application.
+            settings_store: Store providing the current settings.
+        """
+        self._app = app
+        self._settings_store = settings_store
+        self._cprofile_active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        profiling = self._settings_store.current.profiling
+        cprofile_requested = profiling.cprofile_dir is not None and self._cprofile_requested(scope)
+        if not profiling.enabled and not cprofile_requested:
+            await self._app(scope, receive, send)
+            return
+
+        if cprofile_requested and not self._cprofile_active:
+            await self._call_with_cprofile(scope, receive, send, profiling)
+        else:
+            await self._call_profiled(scope, receive, send, profiling)
+
+    async def _call_profiled(self, scope: Scope, receive: Receive, send: Send, profiling: ProfilingSettings):
+        """
+        Handle a request while recording its timing breakdown if enabled.
+        
+        Args:
+            scope: ASGI connection scope.
+            receive: ASGI receive channel.
+            send: ASGI send channel.
+            profiling: Current profiling settings.
+        """
+        if not profiling.enabled:
+            await self._app(scope, receive, send)
+            return
+
+        with profile_request(scope["method"], scope["path"]) as profile:
+            async def send_with_status(message: Message):
+                if message["type"] == "http.response.start":
+                    profile.status_code = message["status"]
+                await send(message)
+
+            await self._app(scope, receive, send_with_status)
+
+        if profile.duration_ms >= profiling.slow_request_threshold_ms:
+            SLOW_REQUEST_LOG.add(profile, profiling.slow_request_buffer_size)
+
+    async def _call_with_cprofile(self, scope: Scope, receive: Receive, send: Send, profiling: ProfilingSettings):
+        """
+        Handle a request under cProfile and write the statistics to the dump directory.
+        
+        Args:
+            scope: ASGI connection scope.
+            receive: ASGI receive channel.
+            send: ASGI send channel.
+            profiling: Current profiling settings.
+        """
+        self._cprofile_active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self._call_profiled(scope, receive, send, profiling)
+        finally:
+            profiler.disable()
+            self._cprofile_active = False
+            path = scope["path"].strip("/").replace("/", "_") or "root"
+            dump_path = os.path.join(profiling.cprofile_dir, f"{int(time.time() * 1000)}-{scope['method']}-{path}.prof")
+            await asyncio.to_thread(self._dump, profiler, dump_path)
+
+    @staticmethod
+    def _cprofile_requested(scope: Scope) -> bool:
+        """
+        Check whether an administrator requested a cProfile dump of the request.
+        
+        Args:
+            scope: ASGI connection scope.
+            
+        Returns:
+            bool: True if the X-Profile header is set together with a valid admin key.
+        """
+        headers = Headers(scope=scope)
+        return CPROFILE_HEADER in headers and is_admin_key(headers.get(ADMIN_KEY_HEADER))
+
+    @staticmethod
+    def _dump(profiler: cProfile.Profile, dump_path: str):
+        """
+        Write the statistics of a profiler to a file.
+        
+        The dump is written after the response was sent, so errors are logged
+        instead of being raised.
+        
+        Args:
+            profiler: The profiler to dump.
+            dump_path: Path of the dump file.
+        """
+        try:
+            os.makedirs(os.path.dirname(dump_path), exist_ok=True)
+            profiler.dump_stats(dump_path)
+        except OSError:
+            logger.exception("Could not write cProfile dump to %s.", dump_path)
+            return
+        logger.info("Wrote cProfile dump to %s.", dump_path)
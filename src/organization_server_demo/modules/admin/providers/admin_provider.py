@@ -0,0 +1,47 @@
+"""
+Administrator authentication provider for the organization server demo.
+
+This module provides dependency injection for protecting the administrative
+endpoints with the configured admin API key.
+"""
+
+import secrets
+from typing import Annotated
+
+from fastapi import Header
+from starlette import status
+
+from organization_server_demo.modules.base.exceptions import OrganizationServerException
+from organization_server_demo.settings import SETTINGS_STORE
+
+
+def is_admin_key(admin_key: str | None) -> bool:
+    """
+    Check whether a key is the configured admin API key.
+    
+    Args:
+        admin_key: The key sent by the client.
+        
+    Returns:
+        bool: True if administrative endpoints are enabled and the key matches.
+    """
+    api_key = SETTINGS_STORE.current.admin.api_key
+    if api_key is None or admin_key is None:
+        return False
+    return secrets.compare_digest(admin_key.encode("utf-8"), api_key.encode("utf-8"))
+
+
+async def require_admin(x_admin_key: Annotated[str | None, Header()] = None):
+    """
+    Dependency ensuring that the request is made by an administrator.
+    
+    Args:
+        x_admin_key: Admin API key from the X-Admin-Key header.
+        
+    Raises:
+        OrganizationServerException: If administrative endpoints are disabled or the key is invalid.
+    """
+    if SETTINGS_STORE.current.admin.api_key is None:
+        raise OrganizationServerException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_key(x_admin_key):
+        raise OrganizationServerException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key")
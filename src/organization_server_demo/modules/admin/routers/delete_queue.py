@@ -0,0 +1,27 @@
+"""
+Delete queue router for administrators.
+
+This module provides API endpoints for operating the spool of session deletions,
+such as retrying deletions that were given up.
+"""
+
+from fastapi import APIRouter, Depends
+
+from organization_server_demo.modules.admin.providers.admin_provider import require_admin
+from organization_server_demo.modules.claire.services.delete_queue import DELETE_QUEUE
+
+router = APIRouter(tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/retry")
+async def retry_failed_deletions() -> dict[str, int]:
+    """
+    Queue the failed session deletions again.
+    
+    Deletions are marked as failed after the configured number of attempts. They
+    are sent again with a fresh number of attempts. Requires the admin API key.
+    
+    Returns:
+        dict[str, int]: Number of deletions queued again.
+    """
+    return {"retried": await DELETE_QUEUE.retry_failed()}
@@ -0,0 +1,29 @@
+"""
+Metrics router for administrators.
+
+This module provides API endpoints for inspecting the in-process metrics, such
+as the session creation batch sizes, queue wait times and failed deletions.
+"""
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from organization_server_demo.modules.admin.providers.admin_provider import require_admin
+from organization_server_demo.modules.base.metrics import METRICS
+
+router = APIRouter(tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("")
+async def get_metrics() -> dict[str, list[dict[str, Any]]]:
+    """
+    Retrieve the current values of all in-process metrics.
+    
+    Histograms and gauges are grouped by metric name. Histograms contain cumulative
+    bucket counts, gauges their current value. Requires the admin API key.
+    
+    Returns:
+        dict[str, list[dict[str, Any]]]: Histograms and gauges by metric name.
+    """
+    return METRICS.snapshot()
@@ -0,0 +1,43 @@
+"""
+Profiling router for administrators.
+
+This module provides API endpoints for inspecting the timing breakdowns of slow
+requests recorded by the profiling middleware.
+"""
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from organization_server_demo.modules.admin.profiling_middleware import SLOW_REQUEST_LOG
+from organization_server_demo.modules.admin.providers.admin_provider import require_admin
+
+router = APIRouter(tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/slow-requests")
+async def get_slow_requests() -> list[dict[str, Any]]:
+    """
+    Retrieve the timing breakdowns of recent slow requests.
+    
+    Returns the requests that exceeded the configured threshold, newest first.
+    Requires the admin API key.
+    
+    Returns:
+        list[dict[str, Any]]: Timing breakdowns of the slow requests.
+    """
+    return SLOW_REQUEST_LOG.entries()
+
+
+@router.delete("/slow-requests")
+async def clear_slow_requests():
+    """
+    Clear the recorded slow requests.
+    
+    Requires the admin API key.
+    
+    Returns:
+        dict: Empty response object.
+    """
+    SLOW_REQUEST_LOG.clear()
+    return {}
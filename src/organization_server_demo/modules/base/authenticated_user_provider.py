@@ -7,24 +7,63 @@ including dependency injection for authenticated user access.
 
 from typing import Annotated
 
-from fastapi import Security
+from fastapi import Security, Depends
+from fastapi.security import SecurityScopes, HTTPAuthorizationCredentials
 from fastapi_auth0 import Auth0User, Auth0
+from fastapi_auth0.auth import Auth0HTTPBearer
+from pydantic import ConfigDict
 from starlette import status
 
 from organization_server_demo.modules.base.exceptions import OrganizationServerException
-from organization_server_demo.settings import SHARED_SETTINGS
+from organization_server_demo.modules.base.profiling import span
+from organization_server_demo.modules.base.structured_logging import set_log_user
+from organization_server_demo.modules.base.traffic_capture import capture_user
+from organization_server_demo.settings import SETTINGS_STORE
+
+
+class OrganizationUser(Auth0User):
+    """
+    Authenticated Auth0 user including all claims of the access token.
+    
+    Additional claims, such as the claim selecting the organization of the user,
+    are available through ``model_extra``.
+    """
+    model_config = ConfigDict(extra="allow")
+
 
 auth_provider = Auth0(
-    domain=SHARED_SETTINGS.auth0.domain,
-    api_audience=SHARED_SETTINGS.auth0.audience,
+    domain=SETTINGS_STORE.current.auth0.domain,
+    api_audience=SETTINGS_STORE.current.auth0.audience,
     auto_error=True,
     scopes={},
+    auth0user_model=OrganizationUser,
 )
 
 
+async def verify_user(
+    security_scopes: SecurityScopes,
+    creds: Annotated[HTTPAuthorizationCredentials | None, Depends(Auth0HTTPBearer(auto_error=False))],
+) -> OrganizationUser | None:
+    """
+    Verify the bearer token of the request with Auth0.
+    
+    Delegates to the Auth0 provider and records the verification as the "auth"
+    profiling span.
+    
+    Args:
+        security_scopes: Scopes required by the endpoint.
+        creds: Bearer token credentials of the request.
+        
+    Returns:
+        OrganizationUser | None: The verified user.
+    """
+    with span("auth"):
+        return await auth_provider.get_user(security_scopes, creds)
+
+
 async def get_authenticated_user(
-    auth0_user: Annotated[Auth0User, Security(auth_provider.get_user, scopes=[])],
-):
+    auth0_user: Annotated[OrganizationUser, Security(verify_user, scopes=[])],
+) -> OrganizationUser:
     """
     Dependency to get the authenticated user from Auth0.
     
@@ -32,10 +71,10 @@ async def get_authenticated_user(
     object for use in endpoint handlers.
     
     Args:
-        auth0_user: Auth0User instance from the security dependency.
+        auth0_user: OrganizationUser instance from the security dependency.
         
     Returns:
-        Auth0User: The authenticated user object.
+        OrganizationUser: The authenticated user object.
         
     Raises:
         OrganizationServerException: If the user is not authenticated.
@@ -43,4 +82,6 @@ async def get_authenticated_user(
     if auth0_user is None:
         raise OrganizationServerException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authorized")
 
+    set_log_user(auth0_user.id)
+    capture_user(auth0_user.id)
     return auth0_user
\ No newline at end of file
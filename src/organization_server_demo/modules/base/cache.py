@@ -0,0 +1,99 @@
+"""
+In-memory caching utilities for the organization server demo.
+
+This module provides a small bounded cache with per-entry expiry that is used
+for the different process-local caches of the application.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded least-recently-used cache with a time-to-live per entry.
+    
+    Lookups and insertions are O(1). Once the cache holds more than ``max_size``
+    entries, the least recently used entry is evicted. Expired entries are removed
+    lazily when they are looked up.
+    
+    The cache is meant to be used from a single event loop and is therefore not
+    protected by a lock.
+    
+    Attributes:
+        max_size: Maximum number of entries kept in the cache.
+        ttl_seconds: Time in seconds after which an entry expires.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_size: Maximum number of entries kept in the cache.
+            ttl_seconds: Time in seconds after which an entry expires.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """
+        Look up a cached value.
+        
+        Args:
+            key: Key of the entry.
+        
+        Returns:
+            V | None: The cached value, or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl_seconds: float | None = None):
+        """
+        Store a value in the cache.
+        
+        Args:
+            key: Key of the entry.
+            value: Value to store.
+            ttl_seconds: Optional time-to-live overriding the cache default.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """
+        Remove an entry from the cache.
+        
+        Args:
+            key: Key of the entry.
+        
+        Returns:
+            V | None: The removed value, or None if the key was not cached.
+        """
+        entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,325 @@
+"""
+Response compression for the organization server demo.
+
+This module provides negotiated gzip, brotli and zstd compression of response
+bodies, a middleware compressing responses above a size threshold and bodies that
+are compressed once and served repeatedly. Brotli and zstd are only offered if
+the optional brotli and zstandard packages are installed.
+"""
+
+import asyncio
+import gzip
+import logging
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from organization_server_demo.settings import CompressionSettings, OrganizationServerSettings, SettingsStore
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+HAS_BROTLI = brotli is not None
+HAS_ZSTD = zstandard is not None
+
+# Bodies above this size are compressed in a worker thread; all codecs release the GIL.
+THREAD_THRESHOLD_BYTES = 64 * 1024
+
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/")
+
+UPSTREAM_ACCEPT_ENCODING = "gzip, br" if HAS_BROTLI else "gzip"
+
+
+def available_encodings() -> tuple[str, ...]:
+    """
+    Get the content encodings supported by the installed codecs.
+    
+    Returns:
+        tuple[str, ...]: The supported encodings.
+    """
+    encodings = ["gzip"]
+    if HAS_BROTLI:
+        encodings.append("br")
+    if HAS_ZSTD:
+        encodings.append("zstd")
+    return tuple(encodings)
+
+
+def warn_unavailable_encodings(settings: OrganizationServerSettings):
+    """
+    Log a warning for configured content encodings whose codec is not installed.
+    
+    Such encodings are never negotiated, so responses fall back to the remaining encodings.
+    
+    Args:
+        settings: Application settings containing the compression settings.
+    """
+    supported = available_encodings()
+    unavailable = [encoding for encoding in settings.compression.encodings if encoding not in supported]
+    if unavailable:
+        logger.warning(
+            "Configured content encodings are not available, install the compression extra to enable them.",
+            extra={"encodings": unavailable, "available": list(supported)},
+        )
+
+
+def negotiate_encoding(accept_encoding: str | None, encodings: list[str]) -> str | None:
+    """
+    Select the content encoding for a response.
+    
+    The encoding with the highest quality value in the Accept-Encoding header is
+    selected; ties are broken by the order of the preferred encodings. Encodings
+    whose codec is not installed are ignored.
+    
+    Args:
+        accept_encoding: The Accept-Encoding header of the request.
+        encodings: Preferred encodings, most preferred first.
+    
+    Returns:
+        str | None: The selected encoding, or None if the response is sent uncompressed.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    supported = available_encodings()
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        if encoding not in supported:
+            continue
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, settings: CompressionSettings) -> bytes:
+    """
+    Compress a body with the given content encoding.
+    
+    Args:
+        body: The uncompressed body.
+        encoding: Content encoding, one of gzip, br and zstd.
+        settings: Compression settings with the levels of the codecs.
+    
+    Returns:
+        bytes: The compressed body.
+    """
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.gzip_level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.zstd_level).compress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+async def compress_async(body: bytes, encoding: str, settings: CompressionSettings) -> bytes:
+    """
+    Compress a body without blocking the event loop for large bodies.
+    
+    Args:
+        body: The uncompressed body.
+        encoding: Content encoding, one of gzip, br and zstd.
+        settings: Compression settings with the levels of the codecs.
+    
+    Returns:
+        bytes: The compressed body.
+    """
+    if len(body) < THREAD_THRESHOLD_BYTES:
+        return compress(body, encoding, settings)
+    return await asyncio.to_thread(compress, body, encoding, settings)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    """
+    Check whether a response may be compressed.
+    
+    Args:
+        headers: Headers of the response.
+    
+    Returns:
+        bool: Whether the response has a compressible content type and no content encoding.
+    """
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+class PrecompressedBody:
+    """
+    Response body that is compressed at most once per content encoding.
+    
+    Used for bodies that are cached and served repeatedly, such as the bot list.
+    The compressed variants are created on first use and kept with the body.
+    
+    Attributes:
+        body: The uncompressed body.
+        media_type: Media type of the body.
+    """
+    __slots__ = ("body", "media_type", "_variants", "_settings")
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        """
+        Initialize the body.
+        
+        Args:
+            body: The uncompressed body.
+            media_type: Media type of the body.
+        """
+        self.body = body
+        self.media_type = media_type
+        self._variants: dict[str, bytes] = {}
+        self._settings: CompressionSettings | None = None
+
+    async def encoded(self, encoding: str, settings: CompressionSettings) -> bytes:
+        """
+        Get the body compressed with the given content encoding.
+        
+        Variants are recompressed if the compression settings changed.
+        
+        Args:
+            encoding: Content encoding, one of gzip, br and zstd.
+            settings: Compression settings with the levels of the codecs.
+        
+        Returns:
+            bytes: The compressed body.
+        """
+        if settings != self._settings:
+            self._variants = {}
+            self._settings = settings
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = self._variants[encoding] = await compress_async(self.body, encoding, settings)
+        return variant
+
+    async def response(self, request: Request, settings: CompressionSettings) -> Response:
+        """
+        Build the response for a request, using the negotiated content encoding.
+        
+        Args:
+            request: The request the response is sent for.
+            settings: Compression settings.
+        
+        Returns:
+            Response: Response with the compressed or uncompressed body.
+        """
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = None
+        if settings.enabled and len(self.body) >= settings.minimum_size:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding"), settings.encodings)
+        if encoding is None:
+            return Response(self.body, media_type=self.media_type, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(await self.encoded(encoding, settings), media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    Middleware compressing response bodies with the negotiated content encoding.
+    
+    Responses are compressed if they have a compressible content type, are not
+    already encoded and their body reaches the minimum size. Streamed responses
+    are passed through uncompressed.
+    """
+
+    def __init__(self, app: ASGIApp, settings_store: SettingsStore):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: The wrapped ASGI application.
+            settings_store: Store providing the current settings.
+        """
+        self._app = app
+        self._settings_store = settings_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        settings = self._settings_store.current.compression
+        if scope["type"] != "http" or not settings.enabled:
+            await self._app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), settings.encodings)
+        if encoding is None:
+            await self._app(scope, receive, send)
+            return
+
+        await self._app(scope, receive, self._compressing_send(send, encoding, settings))
+
+    @staticmethod
+    def _compressing_send(send: Send, encoding: str, settings: CompressionSettings) -> Callable:
+        """
+        Wrap the send callable to compress the response body.
+        
+        Args:
+            send: The ASGI send callable.
+            encoding: The negotiated content encoding.
+            settings: Compression settings.
+        
+        Returns:
+            The wrapped send callable.
+        """
+        start_message: Message | None = None
+        passthrough = False
+
+        async def compressing_send(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if not _is_compressible(Headers(raw=message["headers"])):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if message.get("more_body", False) or len(body) < settings.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = await compress_async(body, encoding, settings)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        return compressing_send
@@ -0,0 +1,60 @@
+"""
+Reloadable CORS middleware for the organization server demo.
+
+This module provides a CORS middleware that follows the current settings, so
+that allowed origins can be changed without a restart.
+"""
+
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Scope, Receive, Send
+
+from organization_server_demo.settings import SettingsStore, CORSSettings
+
+
+class ReloadableCORSMiddleware:
+    """
+    CORS middleware applying the CORS settings of the current configuration.
+    
+    The wrapped Starlette CORSMiddleware is rebuilt only when the CORS settings
+    change. Without allowed origins, requests are passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, settings_store: SettingsStore):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: The wrapped ASGI application.
+            settings_store: Store providing the current settings.
+        """
+        self._app = app
+        self._settings_store = settings_store
+        self._cors_settings: CORSSettings | None = None
+        self._handler: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        cors_settings = self._settings_store.current.cors
+        if cors_settings is not self._cors_settings:
+            self._handler = self._build_handler(cors_settings)
+            self._cors_settings = cors_settings
+        await self._handler(scope, receive, send)
+
+    def _build_handler(self, cors_settings: CORSSettings) -> ASGIApp:
+        """
+        Build the handler for the given CORS settings.
+        
+        Args:
+            cors_settings: The CORS settings to apply.
+            
+        Returns:
+            ASGIApp: The CORS middleware, or the wrapped application if CORS is disabled.
+        """
+        if not cors_settings.allowed_origins:
+            return self._app
+        return CORSMiddleware(
+            self._app,
+            allow_origins=cors_settings.allowed_origins,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
@@ -0,0 +1,195 @@
+"""
+Process lifecycle for the organization server demo.
+
+This module tracks whether the server is ready to receive traffic and which
+requests are in flight, so that the server only reports ready once it is warmed
+up and drains in-flight requests before it shuts down.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from enum import Enum
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from organization_server_demo.settings import LifecycleSettings
+
+logger = logging.getLogger(__name__)
+
+
+class LifecycleState(str, Enum):
+    """
+    State of the server process.
+    """
+    STARTING = "starting"
+    READY = "ready"
+    DRAINING = "draining"
+
+
+class Lifecycle:
+    """
+    Readiness and in-flight requests of the server process.
+    
+    The server is starting until the lifespan marks it ready, and draining from
+    SIGTERM or the start of the shutdown on. On SIGTERM, the server keeps serving
+    requests for the configured drain delay while it reports not ready, so that
+    load balancers stop routing traffic to it, before the signal is passed on to
+    the server, which then stops accepting connections.
+    
+    Attributes:
+        state: Current state of the process.
+    """
+
+    def __init__(self):
+        """
+        Initialize the lifecycle of a starting process.
+        """
+        self.state = LifecycleState.STARTING
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._previous_sigterm_handler = None
+        self._sigterm_installed = False
+        self._drain_deadline: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the server should receive traffic.
+        
+        Returns:
+            bool: Whether the server is ready and not draining.
+        """
+        return self.state is LifecycleState.READY
+
+    def start(self, settings: LifecycleSettings):
+        """
+        Mark the server ready and listen for SIGTERM.
+        
+        Args:
+            settings: Lifecycle settings.
+        """
+        self.state = LifecycleState.READY
+        loop = asyncio.get_running_loop()
+        previous_handler = signal.getsignal(signal.SIGTERM)
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self._on_sigterm, settings.drain_delay_seconds)
+        except (RuntimeError, NotImplementedError, ValueError) as e:
+            # Signal handlers can only be installed by the main thread of the event loop.
+            logger.warning("Could not listen for SIGTERM: %s", e)
+            return
+        self._previous_sigterm_handler = previous_handler
+        self._sigterm_installed = True
+
+    async def drain(self, timeout_seconds: float):
+        """
+        Stop reporting ready and wait for the in-flight requests to complete.
+        
+        The timeout starts the drain deadline, which the remaining shutdown steps
+        share through remaining_seconds.
+        
+        Args:
+            timeout_seconds: Maximum time in seconds for draining.
+        """
+        self.state = LifecycleState.DRAINING
+        self._restore_sigterm_handler()
+        self._drain_deadline = time.monotonic() + timeout_seconds
+        if self._in_flight:
+            logger.info("Draining in-flight requests.", extra={"requests": self._in_flight})
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning("Shutting down with requests in flight.", extra={"requests": self._in_flight})
+
+    def remaining_seconds(self) -> float:
+        """
+        Get the time left until the drain deadline.
+        
+        Returns:
+            float: Time in seconds until the deadline, 0 if it passed or draining has not started.
+        """
+        if self._drain_deadline is None:
+            return 0.0
+        return max(0.0, self._drain_deadline - time.monotonic())
+
+    def request_started(self):
+        """
+        Count a request as in flight.
+        """
+        self._in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self):
+        """
+        Count a request as completed.
+        """
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self._idle.set()
+
+    def _on_sigterm(self, drain_delay_seconds: float):
+        """
+        Handle SIGTERM by reporting not ready and passing the signal on after the drain delay.
+        
+        Args:
+            drain_delay_seconds: Time in seconds to keep serving requests before passing the signal on.
+        """
+        logger.info("Received SIGTERM, draining.", extra={"drain_delay_seconds": drain_delay_seconds})
+        self.state = LifecycleState.DRAINING
+        asyncio.get_running_loop().call_later(drain_delay_seconds, self._pass_sigterm_on)
+
+    def _pass_sigterm_on(self):
+        """
+        Restore the previous SIGTERM handler and invoke it, or raise the signal again if it had none.
+        """
+        if not self._sigterm_installed:
+            return
+        previous_handler = self._previous_sigterm_handler
+        self._restore_sigterm_handler()
+        if callable(previous_handler):
+            previous_handler(signal.SIGTERM, None)
+        else:
+            signal.raise_signal(signal.SIGTERM)
+
+    def _restore_sigterm_handler(self):
+        """
+        Stop listening for SIGTERM and reinstall the handler that was installed before.
+        """
+        if not self._sigterm_installed:
+            return
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+        signal.signal(signal.SIGTERM, self._previous_sigterm_handler or signal.SIG_DFL)
+        self._previous_sigterm_handler = None
+        self._sigterm_installed = False
+
+
+class InFlightMiddleware:
+    """
+    Middleware counting the HTTP requests in flight for draining.
+    """
+
+    def __init__(self, app: ASGIApp, lifecycle: Lifecycle):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: The wrapped ASGI application.
+            lifecycle: Lifecycle counting the requests.
+        """
+        self._app = app
+        self._lifecycle = lifecycle
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        self._lifecycle.request_started()
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            self._lifecycle.request_finished()
+
+
+LIFECYCLE = Lifecycle()
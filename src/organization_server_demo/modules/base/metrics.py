@@ -0,0 +1,187 @@
+"""
+In-process metrics for the organization server demo.
+
+This module provides histograms with fixed buckets and gauges that are kept in
+memory and exposed by the administrative metrics endpoint.
+"""
+
+import bisect
+from typing import Any
+
+
+class Histogram:
+    """
+    Histogram counting observations in fixed buckets.
+    
+    Attributes:
+        name: Name of the metric.
+        labels: Labels distinguishing this histogram from others of the same metric.
+        buckets: Sorted upper bounds of the buckets. Observations above the last
+                 bound are counted in an additional overflow bucket.
+        counts: Number of observations per bucket.
+        count: Total number of observations.
+        sum: Sum of all observations.
+    """
+    __slots__ = ("name", "labels", "buckets", "counts", "count", "sum")
+
+    def __init__(self, name: str, labels: dict[str, str], buckets: tuple[float, ...]):
+        """
+        Initialize an empty histogram.
+        
+        Args:
+            name: Name of the metric.
+            labels: Labels of the histogram.
+            buckets: Sorted upper bounds of the buckets.
+        """
+        self.name = name
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Record an observation.
+        
+        Args:
+            value: The observed value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert the histogram to a JSON-serializable dictionary.
+        
+        Returns:
+            dict[str, Any]: The labels, count, sum and cumulative bucket counts.
+        """
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"labels": self.labels, "count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class Gauge:
+    """
+    Gauge holding the current value of a quantity.
+    
+    Attributes:
+        name: Name of the metric.
+        labels: Labels distinguishing this gauge from others of the same metric.
+        value: Current value.
+    """
+    __slots__ = ("name", "labels", "value")
+
+    def __init__(self, name: str, labels: dict[str, str]):
+        """
+        Initialize a gauge with the value 0.
+        
+        Args:
+            name: Name of the metric.
+            labels: Labels of the gauge.
+        """
+        self.name = name
+        self.labels = labels
+        self.value = 0.0
+
+    def set(self, value: float):
+        """
+        Set the current value.
+        
+        Args:
+            value: The new value.
+        """
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        """
+        Increase the current value.
+        
+        Args:
+            amount: Amount to add.
+        """
+        self.value += amount
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert the gauge to a JSON-serializable dictionary.
+        
+        Returns:
+            dict[str, Any]: Labels and value of the gauge.
+        """
+        return {"labels": self.labels, "value": self.value}
+
+
+class MetricsRegistry:
+    """
+    Registry of all metrics of the process.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self._gauges: dict[tuple[str, tuple[tuple[str, str], ...]], Gauge] = {}
+
+    def histogram(self, name: str, buckets: tuple[float, ...], **labels: str) -> Histogram:
+        """
+        Get or create the histogram of a metric with the given labels.
+        
+        Args:
+            name: Name of the metric.
+            buckets: Sorted upper bounds of the buckets, used when the histogram is created.
+            **labels: Labels of the histogram.
+        
+        Returns:
+            Histogram: The histogram.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(name, labels, buckets)
+        return histogram
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        """
+        Get or create the gauge of a metric with the given labels.
+        
+        Args:
+            name: Name of the metric.
+            **labels: Labels of the gauge.
+        
+        Returns:
+            Gauge: The gauge.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        gauge = self._gauges.get(key)
+        if gauge is None:
+            gauge = self._gauges[key] = Gauge(name, labels)
+        return gauge
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Get the current values of all metrics.
+        
+        Returns:
+            dict[str, list[dict[str, Any]]]: Histograms and gauges by metric name.
+        """
+        metrics: dict[str, list[dict[str, Any]]] = {}
+        for metric in (*self._histograms.values(), *self._gauges.values()):
+            metrics.setdefault(metric.name, []).append(metric.to_dict())
+        return metrics
+
+    def clear(self):
+        """
+        Remove all metrics.
+        """
+        self._histograms.clear()
+        self._gauges.clear()
+
+
+METRICS = MetricsRegistry()
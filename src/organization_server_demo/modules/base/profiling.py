@@ -0,0 +1,206 @@
+"""
+Request profiling utilities for the organization server demo.
+
+This module provides named timing spans that are recorded per request, for
+example around authentication, Claire API calls, validation and serialization.
+Spans are only recorded while a request profile is active, so instrumented code
+costs a single context variable lookup when profiling is disabled.
+"""
+
+import functools
+import inspect
+import time
+from contextlib import nullcontext, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Iterator
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+_current_profile: ContextVar["RequestProfile | None"] = ContextVar("current_profile", default=None)
+_NO_SPAN = nullcontext()
+
+
+class RequestProfile:
+    """
+    Timing breakdown of a single request.
+    
+    Attributes:
+        method: HTTP method of the request.
+        path: Path of the request.
+        started_at: Unix timestamp at which the request started.
+        status_code: HTTP status code of the response, if one was sent.
+        duration_ms: Total duration of the request in milliseconds.
+        spans: Recorded spans as tuples of name, start offset and duration in milliseconds.
+    """
+    __slots__ = ("method", "path", "started_at", "status_code", "duration_ms", "spans", "_start", "_endpoint_end")
+
+    def __init__(self, method: str, path: str):
+        """
+        Start profiling a request.
+        
+        Args:
+            method: HTTP method of the request.
+            path: Path of the request.
+        """
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.status_code: int | None = None
+        self.duration_ms: float | None = None
+        self.spans: list[tuple[str, float, float]] = []
+        self._start = time.perf_counter()
+        self._endpoint_end: float | None = None
+
+    def add_span(self, name: str, start: float, end: float):
+        """
+        Record a span.
+        
+        Args:
+            name: Name of the span.
+            start: Start of the span as returned by time.perf_counter.
+            end: End of the span as returned by time.perf_counter.
+        """
+        self.spans.append((name, (start - self._start) * 1000, (end - start) * 1000))
+
+    def finish(self):
+        """
+        Record the total duration of the request.
+        """
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert the profile to a JSON-serializable dictionary.
+        
+        Returns:
+            dict[str, Any]: The timing breakdown of the request.
+        """
+        return {
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "status_code": self.status_code,
+            "duration_ms": self.duration_ms,
+            "spans": [
+                {"name": name, "start_ms": start_ms, "duration_ms": duration_ms}
+                for name, start_ms, duration_ms in self.spans
+            ],
+        }
+
+
+class _Span:
+    """
+    Context manager recording a span in a request profile.
+    """
+    __slots__ = ("_profile", "_name", "_start")
+
+    def __init__(self, profile: RequestProfile, name: str):
+        self._profile = profile
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profile.add_span(self._name, self._start, time.perf_counter())
+        return False
+
+
+def span(name: str):
+    """
+    Create a context manager timing the enclosed block as a named span.
+    
+    The span is recorded in the profile of the current request. Without an active
+    profile, a shared no-op context manager is returned.
+    
+    Args:
+        name: Name of the span.
+    
+    Returns:
+        A context manager recording the span.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NO_SPAN
+    return _Span(profile, name)
+
+
+@contextmanager
+def profile_request(method: str, path: str) -> Iterator[RequestProfile]:
+    """
+    Profile the request handled within the context.
+    
+    Args:
+        method: HTTP method of the request.
+        path: Path of the request.
+    
+    Yields:
+        RequestProfile: The active profile of the request.
+    """
+    profile = RequestProfile(method, path)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        profile.finish()
+        _current_profile.reset(token)
+
+
+def _profiled_endpoint(endpoint: Callable[..., Coroutine[Any, Any, Any]]):
+    """
+    Wrap an endpoint function to record its execution as a span.
+    
+    Args:
+        endpoint: The endpoint coroutine function.
+    
+    Returns:
+        The wrapped endpoint with the same signature.
+    """
+    @functools.wraps(endpoint)
+    async def profiled_endpoint(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return await endpoint(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            profile._endpoint_end = time.perf_counter()
+            profile.add_span("endpoint", start, profile._endpoint_end)
+
+    profiled_endpoint.__profiled__ = True
+    return profiled_endpoint
+
+
+class ProfiledAPIRoute(APIRoute):
+    """
+    API route recording the endpoint execution and the response serialization as spans.
+    
+    The serialization span covers the time from the return of the endpoint until
+    the response object is built, which includes response model validation and
+    JSON encoding.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        # Routes are re-created when routers are included, so endpoints may already be wrapped.
+        if inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "__profiled__", False):
+            endpoint = _profiled_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Request) -> Response:
+            profile = _current_profile.get()
+            if profile is None:
+                return await handler(request)
+            response = await handler(request)
+            if profile._endpoint_end is not None:
+                profile.add_span("serialization", profile._endpoint_end, time.perf_counter())
+            return response
+
+        return profiled_handler
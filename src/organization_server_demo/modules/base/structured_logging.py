@@ -0,0 +1,370 @@
+"""
+Structured, non-blocking logging for the organization server demo.
+
+This module provides a logging pipeline that hands log records to a background
+thread through a bounded queue, so that the event loop never blocks on log I/O.
+Records are written as JSON lines, large fields are truncated, repeated errors
+are rate limited and access log records can be sampled.
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from organization_server_demo.settings import LoggingSettings, OrganizationServerSettings, SettingsStore
+
+APP_LOGGER_NAME = "organization_server_demo"
+ACCESS_LOGGER_NAME = f"{APP_LOGGER_NAME}.access"
+
+access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+_STANDARD_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__
+) | {"message", "asctime"}
+
+_request_log_context: ContextVar[dict[str, Any] | None] = ContextVar("request_log_context", default=None)
+
+
+def hash_user_id(user_id: str) -> str:
+    """
+    Pseudonymize a user ID for logging.
+    
+    Args:
+        user_id: The external user ID.
+    
+    Returns:
+        str: A short, stable hash of the user ID.
+    """
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:16]
+
+
+def set_log_user(user_id: str):
+    """
+    Attach the authenticated user to the access log record of the current request.
+    
+    Args:
+        user_id: The external user ID.
+    """
+    context = _request_log_context.get()
+    if context is not None:
+        context["user_hash"] = hash_user_id(user_id)
+
+
+def record_upstream_call(endpoint: str, method: str, path: str, status: int | None, latency_ms: float):
+    """
+    Attach a Claire API call to the access log record of the current request.
+    
+    Args:
+        endpoint: Name of the Claire API endpoint.
+        method: HTTP method of the call.
+        path: Path of the call.
+        status: HTTP status of the response, or None if no response was received.
+        latency_ms: Duration of the call in milliseconds.
+    """
+    context = _request_log_context.get()
+    if context is not None:
+        context["upstream"].append(
+            {"endpoint": endpoint, "method": method, "path": path, "status": status, "latency_ms": latency_ms}
+        )
+
+
+def _truncate(value: Any, max_length: int) -> Any:
+    """
+    Truncate a log field to a maximum length.
+    
+    Strings are truncated directly, other non-scalar values are truncated after
+    JSON encoding.
+    
+    Args:
+        value: The field value.
+        max_length: Maximum length in characters.
+    
+    Returns:
+        Any: The value, or a truncated string representation of it.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if not isinstance(value, str):
+        encoded = json.dumps(value, default=str)
+        if len(encoded) <= max_length:
+            return value
+        value = encoded
+    if len(value) <= max_length:
+        return value
+    return f"{value[:max_length]}...({len(value) - max_length} characters truncated)"
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formatter writing log records as single-line JSON objects.
+    
+    Extra attributes passed to the logger are included as fields. Fields and
+    messages longer than the configured length are truncated.
+    """
+
+    def __init__(self, max_field_length: int):
+        """
+        Initialize the formatter.
+        
+        Args:
+            max_field_length: Maximum length of a field in characters.
+        """
+        super().__init__()
+        self._max_field_length = max_field_length
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _truncate(record.getMessage(), self._max_field_length),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES:
+                entry[key] = _truncate(value, self._max_field_length)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Filter rate limiting repeated warnings and errors.
+    
+    Records are grouped by logger and message template. Within each window, only a
+    burst of records per group is passed; the number of suppressed records is added
+    to the first record passed in the following window.
+    """
+
+    def __init__(self, burst: int, window_seconds: float):
+        """
+        Initialize the filter.
+        
+        Args:
+            burst: Number of records per group passed within a window.
+            window_seconds: Length of a window in seconds.
+        """
+        super().__init__()
+        self._burst = burst
+        self._window_seconds = window_seconds
+        self._groups: dict[tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, str(record.msg))
+        group = self._groups.get(key)
+        if group is None or now - group[0] >= self._window_seconds:
+            suppressed = group[2] if group is not None else 0
+            self._groups[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+
+        if group[1] < self._burst:
+            group[1] += 1
+            return True
+
+        group[2] += 1
+        return False
+
+
+class AccessLogSamplingFilter(logging.Filter):
+    """
+    Filter sampling successful access log records.
+    
+    Records of failed requests (status 500 or above) are always kept.
+    """
+
+    def __init__(self, sample_rate: float):
+        """
+        Initialize the filter.
+        
+        Args:
+            sample_rate: Fraction of successful requests to log, between 0 and 1.
+        """
+        super().__init__()
+        self._sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "status", 0) >= 500:
+            return True
+        return self._sample_rate >= 1.0 or random.random() < self._sample_rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller.
+    
+    Records are put into a bounded queue without formatting; formatting happens in
+    the listener thread. Records are dropped when the queue is full.
+    
+    Attributes:
+        dropped: Number of records dropped because the queue was full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingListener(QueueListener):
+    """
+    Listener writing the queued log records, which applies reloaded logging settings.
+    
+    The level, the filters and the field length apply to the following records.
+    The queue size only applies after a restart.
+    """
+
+    def __init__(self, log_queue: queue.Queue, settings: LoggingSettings):
+        """
+        Initialize the listener writing JSON lines to the standard output.
+        
+        Args:
+            log_queue: Queue of the records to write.
+            settings: Logging settings.
+        """
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JSONFormatter(settings.max_field_length))
+        super().__init__(log_queue, stream_handler, respect_handler_level=True)
+        self._settings = settings
+
+    def reload(self, settings: OrganizationServerSettings):
+        """
+        Apply the logging settings of reloaded application settings.
+        
+        Args:
+            settings: The new application settings.
+        """
+        previous, self._settings = self._settings, settings.logging
+        if settings.logging == previous:
+            return
+
+        _apply_logging_settings(settings.logging, previous)
+        if settings.logging.max_field_length != previous.max_field_length:
+            for handler in self.handlers:
+                handler.setFormatter(JSONFormatter(settings.logging.max_field_length))
+        if settings.logging.queue_size != previous.queue_size:
+            logging.getLogger(__name__).warning("Log queue size changed, a restart is required to apply it.")
+
+
+def _apply_logging_settings(settings: LoggingSettings, previous: LoggingSettings | None = None):
+    """
+    Apply the level and the filters of the logging settings to the application loggers.
+    
+    Args:
+        settings: Logging settings.
+        previous: Logging settings applied before, whose rate limiting state is kept if
+                  the rate limit is unchanged, or None.
+    """
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    app_logger.setLevel(settings.level)
+    if previous is None or (settings.error_burst, settings.error_window_seconds) != (
+        previous.error_burst, previous.error_window_seconds
+    ):
+        for handler in app_logger.handlers:
+            handler.filters = [RateLimitFilter(settings.error_burst, settings.error_window_seconds)]
+
+    access_logger.filters = [AccessLogSamplingFilter(settings.access_sample_rate)]
+    access_logger.disabled = not settings.access_log
+
+
+def configure_logging(settings: LoggingSettings) -> LoggingListener:
+    """
+    Route the application logs through the non-blocking JSON logging pipeline.
+    
+    Args:
+        settings: Logging settings.
+    
+    Returns:
+        LoggingListener: The started listener writing the records, to be subscribed to settings
+                         reloads and stopped on shutdown.
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.queue_size)
+
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    app_logger.handlers = [DroppingQueueHandler(log_queue)]
+    app_logger.propagate = False
+    _apply_logging_settings(settings)
+
+    listener = LoggingListener(log_queue, settings)
+    listener.start()
+    return listener
+
+
+class AccessLogMiddleware:
+    """
+    Middleware writing a structured access log record for every request.
+    
+    The record contains the route, the hashed user ID, the response status, the
+    latency and the Claire API calls made while handling the request.
+    """
+
+    def __init__(self, app: ASGIApp, settings_store: SettingsStore):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: The wrapped ASGI application.
+            settings_store: Store providing the current settings.
+        """
+        self._app = app
+        self._settings_store = settings_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._settings_store.current.logging.access_log:
+            await self._app(scope, receive, send)
+            return
+
+        context: dict[str, Any] = {"user_hash": None, "upstream": []}
+        token = _request_log_context.set(context)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self._app(scope, receive, send_with_status)
+        finally:
+            _request_log_context.reset(token)
+            route = scope.get("route")
+            access_logger.info(
+                "%s %s %d",
+                scope["method"],
+                scope["path"],
+                status,
+                extra={
+                    "method": scope["method"],
+                    "route": getattr(route, "path", None),
+                    "path": scope["path"],
+                    "status": status,
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "user_hash": context["user_hash"],
+                    "upstream": context["upstream"],
+                },
+            )
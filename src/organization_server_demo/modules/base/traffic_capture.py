@@ -0,0 +1,544 @@
+"""
+Traffic capture for performance regression testing.
+
+This module provides an opt-in middleware recording anonymized request sequences
+together with the Claire API responses they caused. Captures are written as
+gzip-compressed JSON lines by a background thread and can be replayed against
+other builds with ``benchmarks/replay.py``.
+
+User IDs and prefixed IDs such as session and bot IDs are replaced by keyed
+pseudonyms that are consistent within a capture, so that request sequences stay
+intact. Other strings, such as message contents and tokens, are replaced by
+filler of the same length, which preserves the size of the bodies.
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Iterator
+from urllib.parse import parse_qsl
+
+import aiohttp
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from organization_server_demo.settings import CaptureSettings, OrganizationServerSettings
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_FORMAT_VERSION = 1
+
+# Values of these keys are needed unchanged for validation or matching.
+KEPT_KEYS = frozenset({"editable", "role", "limit", "since"})
+# Values of these query parameters are key=value pairs of which only the value is filled.
+KEY_VALUE_QUERY_KEYS = frozenset({"meta"})
+# Values of these keys are opaque identifiers and are pseudonymized instead of filled.
+PSEUDONYMIZED_KEYS = frozenset({"cursor", "cursor_id"})
+
+_PREFIXED_ID_PATTERN = re.compile(
+    r"^([a-z]+)-([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})$", re.IGNORECASE
+)
+
+_capture_context: ContextVar[dict[str, Any] | None] = ContextVar("capture_context", default=None)
+
+
+class Anonymizer:
+    """
+    Keyed pseudonymization of the identifiers and contents of captured traffic.
+    
+    The key is random per capture and never written, so pseudonyms cannot be
+    reversed by hashing candidate values.
+    """
+
+    def __init__(self, key: bytes | None = None):
+        """
+        Initialize the anonymizer.
+        
+        Args:
+            key: Key of the pseudonyms, random if not given.
+        """
+        self._key = key or secrets.token_bytes(32)
+
+    def _digest(self, value: str) -> bytes:
+        return hmac.new(self._key, value.encode("utf-8"), hashlib.sha256).digest()
+
+    def user_id(self, user_id: str) -> str:
+        """
+        Pseudonymize an external user ID.
+        
+        Args:
+            user_id: The external user ID.
+        
+        Returns:
+            str: The pseudonym.
+        """
+        return f"user-{self._digest(user_id).hex()[:24]}"
+
+    def token(self, value: str) -> str:
+        """
+        Pseudonymize an opaque identifier, keeping prefixed UUIDs valid.
+        
+        Args:
+            value: The identifier.
+        
+        Returns:
+            str: The pseudonym.
+        """
+        match = _PREFIXED_ID_PATTERN.match(value)
+        if match is not None:
+            prefix, raw_uuid = match.groups()
+            return f"{prefix}-{uuid.UUID(bytes=self._digest(raw_uuid.lower())[:16])}"
+        return f"anon-{self._digest(value).hex()[:24]}"
+
+    def value(self, value: Any, key: str | None = None, user_id: str | None = None) -> Any:
+        """
+        Anonymize a JSON value recursively.
+        
+        Args:
+            value: The JSON value.
+            key: Key of the value in its parent object, if any.
+            user_id: External user ID of the request, replaced wherever it occurs.
+        
+        Returns:
+            Any: The anonymized value.
+        """
+        if isinstance(value, dict):
+            return {k: self.value(v, k, user_id) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.value(item, key, user_id) for item in value]
+        if not isinstance(value, str):
+            return value
+        if user_id is not None and value == user_id:
+            return self.user_id(value)
+        if key in KEPT_KEYS:
+            return value
+        if key in PSEUDONYMIZED_KEYS or _PREFIXED_ID_PATTERN.match(value):
+            return self.token(value)
+        return "x" * len(value)
+
+    def path(self, path: str) -> str:
+        """
+        Anonymize the identifiers in a URL path.
+        
+        Args:
+            path: The URL path.
+        
+        Returns:
+            str: The path with pseudonymized identifiers.
+        """
+        return "/".join(
+            self.token(segment) if _PREFIXED_ID_PATTERN.match(segment) else segment for segment in path.split("/")
+        )
+
+    def query(self, params: list[tuple[str, str]], user_id: str | None) -> list[tuple[str, str]]:
+        """
+        Anonymize query parameters.
+        
+        Meta filters keep their field name, so that they are still valid key=value pairs.
+        
+        Args:
+            params: Query parameters as key-value pairs.
+            user_id: External user ID of the request.
+        
+        Returns:
+            list[tuple[str, str]]: The anonymized query parameters.
+        """
+        anonymized = []
+        for key, value in params:
+            field, separator, field_value = value.partition("=")
+            if key in KEY_VALUE_QUERY_KEYS and separator:
+                anonymized.append((key, f"{field}={self.value(field_value, None, user_id)}"))
+            else:
+                anonymized.append((key, self.value(value, key, user_id)))
+        return anonymized
+
+
+def upstream_key(method: str, path: str, query: list[tuple[str, str]], user: str | None) -> str:
+    """
+    Build the key matching a Claire API call with its captured response.
+    
+    Calls are matched on method, path, query and the user the call was made for.
+    
+    Args:
+        method: HTTP method of the call.
+        path: Path of the call.
+        query: Query parameters of the call.
+        user: External user ID contained in the request body, if any.
+    
+    Returns:
+        str: The key.
+    """
+    return json.dumps([method.upper(), path, sorted(query), user])
+
+
+def request_body_user(body: Any) -> str | None:
+    """
+    Extract the external user ID from the JSON body of a Claire API call.
+    
+    Args:
+        body: Decoded JSON body of the call.
+    
+    Returns:
+        str | None: The external user ID, or None if the body does not contain one.
+    """
+    if not isinstance(body, dict):
+        return None
+    if isinstance(body.get("user"), dict):
+        return body["user"].get("organization_user_id")
+    return body.get("external_user_id")
+
+
+def _query_pairs(params: Any) -> list[tuple[str, str]]:
+    """
+    Normalize the query parameters passed to aiohttp to key-value pairs.
+    
+    Args:
+        params: Query parameters as passed to aiohttp.
+    
+    Returns:
+        list[tuple[str, str]]: The query parameters.
+    """
+    if not params:
+        return []
+    items = params.items() if isinstance(params, dict) else params
+    pairs = []
+    for key, value in items:
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            pairs.append((str(key), str(item)))
+    return pairs
+
+
+def capture_user(user_id: str):
+    """
+    Attach the authenticated user to the captured record of the current request.
+    
+    Args:
+        user_id: The external user ID.
+    """
+    context = _capture_context.get()
+    if context is not None:
+        context["user_id"] = user_id
+
+
+async def capture_upstream_call(
+    endpoint: str, method: str, path: str, request_kwargs: dict[str, Any], response: aiohttp.ClientResponse | None,
+    latency_ms: float, response_body: bytes | None = None,
+):
+    """
+    Attach a Claire API call and its response to the captured record of the current request.
+    
+    Args:
+        endpoint: Name of the Claire API endpoint.
+        method: HTTP method of the call.
+        path: Path of the call.
+        request_kwargs: Arguments passed to aiohttp for the call.
+        response: Response of the call, or None if no response was received.
+        latency_ms: Duration of the call in milliseconds.
+        response_body: Body of the response if it was already read from the stream.
+    """
+    context = _capture_context.get()
+    if context is None:
+        return
+
+    body = None
+    if response is not None:
+        try:
+            body = json.loads(response_body if response_body is not None else await response.read())
+        except (aiohttp.ClientError, TimeoutError, ValueError):
+            body = None
+    try:
+        request_body = json.loads(request_kwargs["data"]) if request_kwargs.get("data") else None
+    except (TypeError, ValueError):
+        request_body = None
+
+    context["upstream"].append({
+        "endpoint": endpoint,
+        "method": method,
+        "path": path,
+        "query": _query_pairs(request_kwargs.get("params")),
+        "user": request_body_user(request_body),
+        "status": None if response is None else response.status,
+        "latency_ms": latency_ms,
+        "body": body,
+    })
+
+
+class TrafficCapture:
+    """
+    Writer of captured traffic.
+    
+    Records are anonymized and encoded in a background thread and written to a
+    gzip-compressed JSON lines file. Records are dropped when the queue is full or
+    the configured number of records was reached.
+    
+    A restarted capture does not wait for the previous writer on the event loop.
+    Instead, the new writer thread joins the previous one before it opens the
+    file, so the previous capture is complete before the file is overwritten, and
+    the counters only count the records of the active capture.
+    
+    Attributes:
+        settings: Capture settings of the active capture, or None if capturing is disabled.
+        written: Number of records written by the active capture.
+        dropped: Number of records dropped by the active capture.
+    """
+
+    def __init__(self):
+        """
+        Initialize an inactive capture.
+        """
+        self.settings: CaptureSettings | None = None
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._previous: threading.Thread | None = None
+        self._started = 0.0
+        self._submitted = 0
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether requests are currently captured.
+        
+        Returns:
+            bool: Whether a capture is active.
+        """
+        return self.settings is not None
+
+    def configure(self, settings: OrganizationServerSettings):
+        """
+        Start, restart or stop capturing as configured.
+        
+        Args:
+            settings: Application settings containing the capture settings.
+        """
+        capture_settings = settings.capture if settings.capture.enabled else None
+        if capture_settings == self.settings:
+            return
+        self.close(wait=False)
+        if capture_settings is not None:
+            self._start(capture_settings)
+
+    def sampled(self, user_id: str | None) -> bool:
+        """
+        Decide whether the requests of a user are captured.
+        
+        Users are sampled instead of requests, so that captured sequences stay complete.
+        
+        Args:
+            user_id: External user ID, or None for unauthenticated requests.
+        
+        Returns:
+            bool: Whether the requests of the user are captured.
+        """
+        sample_rate = self.settings.sample_rate
+        if sample_rate >= 1.0:
+            return True
+        digest = hashlib.sha256((user_id or "").encode("utf-8")).digest()
+        return int.from_bytes(digest[:8]) / 2 ** 64 < sample_rate
+
+    def submit(self, record: dict[str, Any]):
+        """
+        Queue a raw record for anonymization and writing.
+        
+        Args:
+            record: The captured request with its Claire API calls.
+        """
+        if self._queue is None:
+            return
+        if self.settings.max_records is not None and self._submitted >= self.settings.max_records:
+            self.dropped += 1
+            return
+        record["t"] = round(record.pop("started") - self._started, 6)
+        try:
+            self._queue.put_nowait(record)
+            self._submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, wait: bool = True):
+        """
+        Stop the active capture after writing the queued records.
+        
+        Args:
+            wait: Whether to wait until the queued records are written and the file is closed.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            logger.info("Traffic capture stopped.", extra={"dropped": self.dropped})
+            self._previous = self._thread
+        if wait and self._previous is not None:
+            self._previous.join()
+            self._previous = None
+        self.settings = None
+        self._queue = None
+        self._thread = None
+
+    def _start(self, settings: CaptureSettings):
+        """
+        Start a capture.
+        
+        Args:
+            settings: Capture settings.
+        """
+        self.settings = settings
+        self.written = 0
+        self.dropped = 0
+        self._submitted = 0
+        self._started = time.monotonic()
+        self._queue = queue.Queue(maxsize=settings.queue_size)
+        self._thread = threading.Thread(
+            target=self._write,
+            args=(self._queue, settings.path, Anonymizer(), self._previous),
+            name="traffic-capture",
+            daemon=True,
+        )
+        self._previous = None
+        self._thread.start()
+        logger.info("Traffic capture started.", extra={"path": settings.path})
+
+    def _write(
+        self, record_queue: queue.Queue, path: str, anonymizer: Anonymizer, previous: threading.Thread | None
+    ):
+        """
+        Anonymize and write queued records until the capture is closed.
+        
+        Args:
+            record_queue: Queue of raw records, terminated by None.
+            path: Path of the capture file.
+            anonymizer: Anonymizer of the capture.
+            previous: Writer thread of the previous capture, which is joined before the file is opened.
+        """
+        if previous is not None:
+            previous.join()
+        written = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            file.write(json.dumps({"format": CAPTURE_FORMAT_VERSION, "started_at": time.time()}) + "\n")
+            while True:
+                try:
+                    record = record_queue.get(timeout=1.0)
+                except queue.Empty:
+                    file.flush()
+                    continue
+                if record is None:
+                    break
+                file.write(json.dumps(_anonymize_record(record, anonymizer), separators=(",", ":")) + "\n")
+                written += 1
+                if record_queue is self._queue:
+                    self.written = written
+        logger.info("Traffic capture written.", extra={"path": path, "written": written})
+
+
+def _anonymize_record(record: dict[str, Any], anonymizer: Anonymizer) -> dict[str, Any]:
+    """
+    Anonymize a captured request with its Claire API calls.
+    
+    Args:
+        record: The raw record.
+        anonymizer: Anonymizer of the capture.
+    
+    Returns:
+        dict[str, Any]: The anonymized record.
+    """
+    user_id = record.pop("user_id")
+    record["user"] = None if user_id is None else anonymizer.user_id(user_id)
+    record["path"] = anonymizer.path(record["path"])
+    record["query"] = anonymizer.query(record["query"], user_id)
+    for call in record["upstream"]:
+        call["path"] = anonymizer.path(call["path"])
+        call["query"] = anonymizer.query(call["query"], user_id)
+        call["user"] = None if call["user"] is None else anonymizer.user_id(call["user"])
+        call["body"] = anonymizer.value(call["body"], user_id=user_id)
+    return record
+
+
+def read_capture(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Read the records of a capture file.
+    
+    A capture that was not closed properly is read up to its last complete record.
+    
+    Args:
+        path: Path of the capture file.
+    
+    Yields:
+        dict[str, Any]: The captured records, after the header.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        try:
+            header = json.loads(next(file))
+            if header.get("format") != CAPTURE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported capture format: {header.get('format')}")
+            for line in file:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+        except (EOFError, StopIteration):
+            return
+
+
+TRAFFIC_CAPTURE = TrafficCapture()
+
+
+class CaptureMiddleware:
+    """
+    Middleware capturing requests and the Claire API calls made for them.
+    """
+
+    def __init__(self, app: ASGIApp, capture: TrafficCapture):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: The wrapped ASGI application.
+            capture: Writer of the captured traffic.
+        """
+        self._app = app
+        self._capture = capture
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._capture.active:
+            await self._app(scope, receive, send)
+            return
+
+        context: dict[str, Any] = {"user_id": None, "upstream": []}
+        token = _capture_context.set(context)
+        status = 500
+        response_bytes = 0
+        start = time.monotonic()
+
+        async def send_with_status(message: Message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self._app(scope, receive, send_with_status)
+        finally:
+            _capture_context.reset(token)
+            if self._capture.active and self._capture.sampled(context["user_id"]):
+                route = scope.get("route")
+                self._capture.submit({
+                    "started": start,
+                    "method": scope["method"],
+                    "route": getattr(route, "path", None),
+                    "path": scope["path"],
+                    "query": parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True),
+                    "user_id": context["user_id"],
+                    "status": status,
+                    "latency_ms": round((time.monotonic() - start) * 1000, 3),
+                    "response_bytes": response_bytes,
+                    "upstream": context["upstream"],
+                })
@@ -12,11 +12,11 @@ from fastapi_auth0 import Auth0User, Auth0
 from starlette import status
 
 from organization_server_demo.modules.base.exceptions import OrganizationServerException
-from organization_server_demo.settings import SHARED_SETTINGS
+from organization_server_demo.settings import SETTINGS_STORE
 
 auth_provider = Auth0(
-    domain=SHARED_SETTINGS.auth0.domain,
-    api_audience=SHARED_SETTINGS.auth0.audience,
+    domain=SETTINGS_STORE.current.auth0.domain,
+    api_audience=SETTINGS_STORE.current.auth0.audience,
     auto_error=True,
     scopes={},
 )
@@ -6,6 +6,7 @@ requests, responses, and chat session data transfer objects.
 """
 
 import enum
+from datetime import datetime
 from typing import NewType, Any
 
 from pydantic import BaseModel
@@ -109,3 +110,21 @@ class ChatSessionDTO(BaseModel):
     messages: list[Any]
     bot_configuration: Any
     meta: Any
+
+
+class SessionSummaryDTO(BaseModel):
+    """
+    Data transfer object for a session found in the local session index.
+    
+    Holds the indexed fields of a session without its messages.
+    
+    Attributes:
+        session_id: Unique identifier for the session.
+        bot_id: Identifier of the bot used in the session.
+        meta: Additional metadata for the session.
+        first_seen_at: Time at which the session was first seen by this server.
+    """
+    session_id: SessionID
+    bot_id: BotID
+    meta: Any
+    first_seen_at: datetime
@@ -13,13 +13,79 @@ class ClaireSettings(BaseModel):
     Configuration settings for Claire integration.
     
     Contains the necessary configuration for connecting to and interacting
-    with the Claire API.
+    with the Claire API. One instance exists per organization (tenant) served
+    by this process.
     
     Attributes:
         api_key: API key for authenticating with the Claire.
         base_url: Base URL for the Claire API.
         enabled_device_action_ids: List of device action IDs that are enabled.
+        hosts: Host names that are routed to this organization when tenants are
+               resolved by the host header.
+        max_connections: Maximum number of concurrent connections to the Claire API.
+        cache_ttl_seconds: Time in seconds for which Claire responses such as the bot list are cached.
+        session_batch_window_ms: Time in milliseconds session creations are collected into a
+                                 batch, or 0 to send every session creation immediately.
+        session_batch_max_size: Number of session creations after which a batch is sent immediately.
+        session_batch_concurrency: Maximum number of concurrent session creation calls of batches.
+        compress_responses: Whether to request compressed responses from the Claire API.
+        timeout_seconds: Maximum time in seconds for a Claire API call, including reading the response.
+        ownership_index_size: Maximum number of sessions whose owner is kept in memory for
+                              authorizing session renewals and deletions.
+        bot_filter_query_limit: Maximum number of bot IDs sent as query parameters when listing
+                                sessions. With more bots, the sessions of all bots are listed
+                                and filtered locally.
+        concurrent_session_listing: Whether session listings fetch the bot list concurrently with
+                                    the sessions when the bot list is not cached.
+        idempotency_ttl_seconds: Time in seconds for which responses to requests with an
+                                 Idempotency-Key header are replayed to retries.
+        idempotency_store_size: Maximum number of stored responses to requests with an
+                                Idempotency-Key header.
+        negative_cache_ttl_seconds: Time in seconds for which sessions that were not found or are
+                                    forbidden for a user, and bots missing from the bot catalogue,
+                                    are rejected without calling the Claire API again, or 0 to
+                                    disable the negative cache.
+        negative_cache_size: Maximum number of failed session lookups, and of unknown bots, kept in
+                             memory.
+        max_response_bytes: Maximum size in bytes of a Claire API response body. Calls with larger
+                            responses are aborted with a 502 error.
+        endpoint_max_response_bytes: Maximum response body sizes in bytes overriding max_response_bytes,
+                                     by Claire API endpoint name, for instance "get_session".
+        parse_in_thread_bytes: Response body size in bytes from which bodies are parsed in a thread
+                               instead of on the event loop.
+        warm_connections: Number of connections to the Claire API opened at startup, before the
+                          server reports ready.
     """
     api_key: str
     base_url: AnyHttpUrl
     enabled_device_action_ids: list[str] = []
+    hosts: list[str] = []
+    max_connections: int = 100
+    cache_ttl_seconds: float = 60.0
+    session_batch_window_ms: float = 0.0
+    session_batch_max_size: int = 100
+    session_batch_concurrency: int = 20
+    compress_responses: bool = True
+    timeout_seconds: float = 30.0
+    ownership_index_size: int = 100_000
+    bot_filter_query_limit: int = 50
+    concurrent_session_listing: bool = True
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_store_size: int = 10_000
+    negative_cache_ttl_seconds: float = 30.0
+    negative_cache_size: int = 10_000
+    max_response_bytes: int = 16 * 1024 * 1024
+    endpoint_max_response_bytes: dict[str, int] = {}
+    parse_in_thread_bytes: int = 256 * 1024
+    warm_connections: int = 4
+
+    def connection_key(self) -> tuple[str, str, int]:
+        """
+        Key identifying the connection pool required by these settings.
+        
+        Two settings objects with the same key can share the same connection pool.
+        
+        Returns:
+            tuple[str, str, int]: The API key, base URL and connection limit.
+        """
+        return self.api_key, str(self.base_url), self.max_connections
@@ -9,25 +9,23 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from organization_server_demo.modules.claire.models.settings import ClaireSettings
-from organization_server_demo.modules.claire.providers.settings_provider import get_settings
+from organization_server_demo.modules.claire.providers.tenant_provider import get_tenant
 from organization_server_demo.modules.claire.services.bot_service import BotService
+from organization_server_demo.modules.claire.services.tenant_registry import ClaireTenant
 
 
-async def get_bot_service(settings: Annotated[ClaireSettings, Depends(get_settings)]) -> BotService:
+async def get_bot_service(tenant: Annotated[ClaireTenant, Depends(get_tenant)]) -> BotService:
     """
     Dependency provider for bot service instances.
     
-    Creates and returns a BotService instance configured with the Claire
-    API credentials and base URL from the application settings.
+    Creates and returns a BotService instance using the connection pool and
+    Claire API credentials of the tenant serving the request.
     
     Args:
-        settings: Claire settings containing API credentials.
+        tenant: Tenant (organization) serving the request.
         
     Returns:
         BotService: Configured bot service instance.
     """
-    api_key = settings.api_key
-    base_url = settings.base_url
-    return BotService(base_url, api_key)
+    return BotService(tenant)
 
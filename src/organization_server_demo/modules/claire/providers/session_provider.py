@@ -9,24 +9,22 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from organization_server_demo.modules.claire.models.settings import ClaireSettings
-from organization_server_demo.modules.claire.providers.settings_provider import get_settings
+from organization_server_demo.modules.claire.providers.tenant_provider import get_tenant
 from organization_server_demo.modules.claire.services.session_service import SessionService
+from organization_server_demo.modules.claire.services.tenant_registry import ClaireTenant
 
 
-async def get_session_service(settings: Annotated[ClaireSettings, Depends(get_settings)]) -> SessionService:
+async def get_session_service(tenant: Annotated[ClaireTenant, Depends(get_tenant)]) -> SessionService:
     """
     Dependency provider for session service instances.
     
-    Creates and returns a SessionService instance configured with the Claire
-    API credentials and base URL from the application settings.
+    Creates and returns a SessionService instance using the connection pool and
+    Claire API credentials of the tenant serving the request.
     
     Args:
-        settings: Claire settings containing API credentials.
+        tenant: Tenant (organization) serving the request.
         
     Returns:
         SessionService: Configured session service instance.
     """
-    api_key = settings.api_key
-    base_url = settings.base_url
-    return SessionService(base_url, api_key)
\ No newline at end of file
+    return SessionService(tenant)
\ No newline at end of file
@@ -4,18 +4,26 @@ Settings provider for Claire configuration.
 This module provides dependency injection for accessing Claire settings
 in FastAPI route handlers.
 """
+from typing import Annotated
+
+from fastapi import Depends
+
 from organization_server_demo.modules.claire.models.settings import ClaireSettings
-from organization_server_demo.settings import SHARED_SETTINGS
+from organization_server_demo.modules.claire.providers.tenant_provider import get_tenant
+from organization_server_demo.modules.claire.services.tenant_registry import ClaireTenant
 
 
-async def get_settings() -> ClaireSettings:
+async def get_settings(tenant: Annotated[ClaireTenant, Depends(get_tenant)]) -> ClaireSettings:
     """
     Dependency provider for Claire settings.
     
-    Returns the Claire configuration settings for use in FastAPI
-    route handlers through dependency injection.
+    Returns the Claire configuration settings of the tenant serving the request
+    for use in FastAPI route handlers through dependency injection.
     
+    Args:
+        tenant: Tenant (organization) serving the request.
+        
     Returns:
         ClaireSettings: The Claire configuration settings.
     """
-    return SHARED_SETTINGS.claire
+    return tenant.settings
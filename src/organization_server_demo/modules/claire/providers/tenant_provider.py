@@ -0,0 +1,73 @@
+"""
+Tenant provider for multi-organization Claire integration.
+
+This module provides dependency injection for resolving the tenant (organization)
+of a request from an Auth0 claim or the host header.
+"""
+
+from typing import Annotated
+
+from fastapi import Depends, Request
+from starlette import status
+
+from organization_server_demo.modules.base.authenticated_user_provider import get_authenticated_user, \
+    OrganizationUser
+from organization_server_demo.modules.base.exceptions import OrganizationServerException
+from organization_server_demo.modules.claire.services.tenant_registry import ClaireTenant, TENANT_REGISTRY
+
+
+async def get_tenant(
+    request: Request,
+    user: Annotated[OrganizationUser, Depends(get_authenticated_user)],
+) -> ClaireTenant:
+    """
+    Dependency provider for the tenant of the current request.
+    
+    If an Auth0 claim is configured, the tenant is taken from the claim only, and
+    tokens without the claim are rejected, as the host header is controlled by the
+    client. Otherwise the tenant is resolved from the host header if enabled, and
+    requests without a resolved tenant are served by the default organization.
+    
+    Args:
+        request: The incoming request.
+        user: Authenticated user of the request.
+    
+    Returns:
+        ClaireTenant: The tenant serving the request.
+    
+    Raises:
+        OrganizationServerException: If the token lacks the configured claim or the resolved
+                                     organization is not configured.
+    """
+    tenancy = TENANT_REGISTRY.tenancy
+
+    if tenancy.claim is not None:
+        tenant_id = (user.model_extra or {}).get(tenancy.claim)
+        if tenant_id is None:
+            raise OrganizationServerException(status_code=status.HTTP_403_FORBIDDEN, detail="Unknown organization")
+        return _require_tenant(TENANT_REGISTRY.get(str(tenant_id)))
+
+    if tenancy.use_host_header and request.url.hostname:
+        tenant = TENANT_REGISTRY.get_by_host(request.url.hostname)
+        if tenant is not None:
+            return tenant
+
+    return _require_tenant(TENANT_REGISTRY.get_default())
+
+
+def _require_tenant(tenant: ClaireTenant | None) -> ClaireTenant:
+    """
+    Ensure that a tenant was found.
+    
+    Args:
+        tenant: The looked up tenant.
+    
+    Returns:
+        ClaireTenant: The tenant.
+    
+    Raises:
+        OrganizationServerException: If no tenant was found.
+    """
+    if tenant is None:
+        raise OrganizationServerException(status_code=status.HTTP_403_FORBIDDEN, detail="Unknown organization")
+    return tenant
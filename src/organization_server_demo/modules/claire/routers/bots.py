@@ -8,29 +8,61 @@ in the organization server demo.
 from typing import Annotated, List
 
 from fastapi import APIRouter, Depends
+from starlette.requests import Request
+from starlette.responses import Response
 
 from organization_server_demo.modules.base.authenticated_user_provider import get_authenticated_user
-from organization_server_demo.modules.claire.models.bots import BotDefinition
+from organization_server_demo.modules.base.profiling import ProfiledAPIRoute
+from organization_server_demo.modules.claire.models.bots import BotDefinition, BotID
 from organization_server_demo.modules.claire.providers.bot_provider import get_bot_service
 from organization_server_demo.modules.claire.services.bot_service import BotService
+from organization_server_demo.settings import SETTINGS_STORE
 
-router = APIRouter(tags=["Bots"])
+router = APIRouter(tags=["Bots"], route_class=ProfiledAPIRoute)
 
 
 @router.get("", response_model=List[BotDefinition], dependencies=[Depends(get_authenticated_user)])
 async def get_bots(
+    request: Request,
     bot_service: Annotated[BotService, Depends(get_bot_service)],
-):
+) -> Response:
     """
     Retrieve all available bots.
     
     Returns a list of all bot definitions available in the Claire API.
+    The serialized and compressed list is cached, so it is served as bytes.
     Requires authentication.
     
     Args:
+        request: The request, used for negotiating the content encoding.
         bot_service: Bot service dependency for retrieving bot data.
         
     Returns:
-        List[BotDefinition]: List of available bot definitions.
+        Response: JSON list of available bot definitions.
     """
-    return await bot_service.get_bots()
+    body = await bot_service.get_bots_body()
+    return await body.response(request, SETTINGS_STORE.current.compression)
+
+
+@router.get("/{bot_id}", response_model=BotDefinition, dependencies=[Depends(get_authenticated_user)])
+async def get_bot(
+    bot_id: BotID,
+    request: Request,
+    bot_service: Annotated[BotService, Depends(get_bot_service)],
+) -> Response:
+    """
+    Retrieve an available bot.
+    
+    Looks the bot up in the cached bot catalogue and serves its serialized
+    definition as bytes. Requires authentication.
+    
+    Args:
+        bot_id: Identifier of the bot.
+        request: The request, used for negotiating the content encoding.
+        bot_service: Bot service dependency for retrieving bot data.
+        
+    Returns:
+        Response: JSON definition of the bot.
+    """
+    body = await bot_service.get_bot_body(bot_id)
+    return await body.response(request, SETTINGS_STORE.current.compression)
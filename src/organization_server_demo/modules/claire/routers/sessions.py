@@ -5,24 +5,31 @@ This module provides API endpoints for managing chat sessions, including
 creation, listing, renewal, and deletion of sessions.
 """
 
+from datetime import datetime, timezone
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response
 from fastapi_auth0 import Auth0User
+from starlette import status
 
 from organization_server_demo.modules.base.authenticated_user_provider import get_authenticated_user
+from organization_server_demo.modules.base.exceptions import OrganizationServerException
+from organization_server_demo.modules.base.profiling import ProfiledAPIRoute
 from organization_server_demo.modules.base.models import PaginatedResults
+from organization_server_demo.modules.base.utils import dump_prefixed_id
 from organization_server_demo.modules.claire.models.bots import BotID
 from organization_server_demo.modules.claire.models.sessions import ClientSessionResponse, SessionRequest, \
-    MessageEditability, SessionRequestUser, ChatSessionDTO
+    MessageEditability, SessionRequestUser, ChatSessionDTO, SessionSummaryDTO
 from organization_server_demo.modules.claire.models.settings import ClaireSettings
 from organization_server_demo.modules.claire.providers.bot_provider import get_bot_service
 from organization_server_demo.modules.claire.providers.session_provider import get_session_service
 from organization_server_demo.modules.claire.providers.settings_provider import get_settings
 from organization_server_demo.modules.claire.services.bot_service import BotService
+from organization_server_demo.modules.claire.services.delete_queue import DELETE_QUEUE
+from organization_server_demo.modules.claire.services.session_index import SessionQuery
 from organization_server_demo.modules.claire.services.session_service import SessionService
 
-router = APIRouter(tags=["Sessions"])
+router = APIRouter(tags=["Sessions"], route_class=ProfiledAPIRoute)
 
 
 @router.post("", response_model=ClientSessionResponse)
@@ -31,22 +38,29 @@ async def create_session(
     user: Annotated[Auth0User, Depends(get_authenticated_user)],
     settings: Annotated[ClaireSettings, Depends(get_settings)],
     session_service: Annotated[SessionService, Depends(get_session_service)],
+    bot_service: Annotated[BotService, Depends(get_bot_service)],
+    idempotency_key: Annotated[str | None, Header()] = None,
 ):
     """
     Create a new chat session.
     
     Creates a new session for the authenticated user with the specified bot
-    and enabled device actions from the configuration.
+    and enabled device actions from the configuration. Bots missing from the
+    bot catalogue are rejected with 422 without calling the Claire API.
     
     Args:
         bot_id: Identifier of the bot to use for the session.
         user: Authenticated user creating the session.
         settings: Claire settings containing enabled device actions.
         session_service: Session service dependency for session management.
+        bot_service: Bot service dependency for validating the bot.
+        idempotency_key: Optional key identifying retries of the same request, whose
+                         session is then created only once.
         
     Returns:
         ClientSessionResponse: Session information and authentication token.
     """
+    await bot_service.require_bot(bot_id)
     enabled_device_actions = settings.enabled_device_action_ids
 
     response = await session_service.create_session(
@@ -55,7 +69,8 @@ async def create_session(
             enabled_device_actions=enabled_device_actions,
             bot_id=bot_id,
             editable=MessageEditability.all_messages,
-        )
+        ),
+        idempotency_key=idempotency_key,
     )
     return response
 
@@ -71,7 +86,8 @@ async def list_sessions(
     List sessions for the authenticated user.
     
     Retrieves a paginated list of chat sessions for the authenticated user,
-    filtered by available bots.
+    filtered by available bots. On a cold bot cache, the bots and the sessions
+    are fetched concurrently.
     
     Args:
         session_service: Session service dependency for session management.
@@ -82,55 +98,131 @@ async def list_sessions(
     Returns:
         PaginatedResults[ChatSessionDTO]: Paginated list of user sessions.
     """
-    available_bots = [bot.bot_id for bot in await bot_service.get_bots()]
-
     response = await session_service.list_sessions(
-        auth0_user_id=user.id, bot_ids=available_bots, cursor=cursor
+        auth0_user_id=user.id, get_bot_filter=bot_service.get_bot_filter, cursor=cursor
     )
     return response
 
 
+@router.get("/search", response_model=PaginatedResults[SessionSummaryDTO])
+async def search_sessions(
+    session_service: Annotated[SessionService, Depends(get_session_service)],
+    bot_service: Annotated[BotService, Depends(get_bot_service)],
+    user: Annotated[Auth0User, Depends(get_authenticated_user)],
+    response: Response,
+    q: str | None = None,
+    bot_id: BotID | None = None,
+    meta: Annotated[list[str], Query()] = [],
+    since: datetime | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    """
+    Search sessions of the authenticated user.
+    
+    Searches the local session index, most recent sessions first, without calling
+    the Claire API. Sessions are returned as summaries without messages, which can
+    be fetched when a session is opened. The time of the last complete reconciliation of the index with
+    the Claire API is returned in the X-Index-Reconciled-At header; without it,
+    the index may not contain all sessions of the user yet.
+    
+    Args:
+        session_service: Session service dependency for session management.
+        bot_service: Bot service dependency for retrieving available bots.
+        user: Authenticated user searching their sessions.
+        response: Response receiving the reconciliation header.
+        q: Words that must all occur in the meta data of the sessions.
+        bot_id: Identifier of the bot of the sessions.
+        meta: Meta fields the sessions must have, as key=value pairs.
+        since: Earliest time at which the sessions were first seen.
+        limit: Maximum number of sessions.
+        cursor: Optional cursor for pagination.
+        
+    Returns:
+        PaginatedResults[SessionSummaryDTO]: Paginated list of matching sessions.
+    """
+    meta_fields = {}
+    for field in meta:
+        key, separator, value = field.partition("=")
+        if not separator or not key:
+            raise OrganizationServerException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Meta filters must be key=value pairs."}
+            )
+        meta_fields[key] = value
+
+    sessions, reconciled_at = await session_service.search_sessions(
+        user.id,
+        bot_service.get_bot_filter,
+        SessionQuery(
+            text=q,
+            bot_id=dump_prefixed_id(BotID, bot_id) if bot_id is not None else None,
+            meta=meta_fields,
+            since=since.timestamp() if since is not None else None,
+            limit=limit,
+            cursor=cursor,
+        ),
+    )
+    if reconciled_at is not None:
+        response.headers["X-Index-Reconciled-At"] = datetime.fromtimestamp(reconciled_at, timezone.utc).isoformat()
+    return sessions
+
+
 @router.post("/{session_id}/renew", response_model=ClientSessionResponse)
 async def renew_session(
     session_id: str,
     user: Annotated[Auth0User, Depends(get_authenticated_user)],
     claire_service: Annotated[SessionService, Depends(get_session_service)],
+    idempotency_key: Annotated[str | None, Header()] = None,
 ):
     """
     Renew an existing session.
     
     Renews the authentication token for an existing session, allowing
-    continued access to the session.
+    continued access to the session. Only the owner of a session can renew it.
     
     Args:
         session_id: Identifier of the session to renew.
         user: Authenticated user renewing the session.
         claire_service: Session service dependency for session management.
+        idempotency_key: Optional key identifying retries of the same request, which
+                         then receive the token of the original request.
         
     Returns:
         ClientSessionResponse: Updated session information and new token.
     """
-    response = await claire_service.renew_session(session_id, user.id)
+    await claire_service.authorize_session(session_id, user.id)
+    response = await claire_service.renew_session(session_id, user.id, idempotency_key=idempotency_key)
 
     return response
 
 
-@router.delete("/{session_id}", dependencies=[Depends(get_authenticated_user)])
+@router.delete("/{session_id}")
 async def delete_session(
     session_id: str,
+    user: Annotated[Auth0User, Depends(get_authenticated_user)],
     claire_service: Annotated[SessionService, Depends(get_session_service)],
+    response: Response,
 ):
     """
     Delete a session.
     
-    Permanently deletes a chat session. Requires authentication.
+    Permanently deletes a chat session. Only the owner of a session can
+    delete it. If asynchronous deletion is enabled, the deletion is queued
+    and acknowledged with 202 before the Claire API confirmed it.
     
     Args:
         session_id: Identifier of the session to delete.
+        user: Authenticated user deleting the session.
         claire_service: Session service dependency for session management.
+        response: Response whose status code is set for queued deletions.
         
     Returns:
         dict: Empty response object.
     """
-    await claire_service.delete_session(session_id)
+    await claire_service.authorize_session(session_id, user.id)
+    if DELETE_QUEUE.accepting:
+        await claire_service.queue_delete_session(session_id)
+        response.status_code = status.HTTP_202_ACCEPTED
+    else:
+        await claire_service.delete_session(session_id, external_user_id=user.id)
     return {}
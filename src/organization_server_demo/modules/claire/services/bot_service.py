@@ -5,16 +5,121 @@ This module provides service layer functionality for managing bots,
 including retrieving bot definitions from the Claire.
 """
 
+import asyncio
 import logging
+from typing import NamedTuple
+from uuid import UUID
 
 from starlette import status
 
+from organization_server_demo.modules.base.compression import PrecompressedBody
 from organization_server_demo.modules.base.exceptions import OrganizationServerException
-from organization_server_demo.modules.claire.models.bots import BotDefinition
+from organization_server_demo.modules.base.profiling import span
+from organization_server_demo.modules.base.utils import dump_prefixed_id
+from organization_server_demo.modules.claire.models.bots import BotDefinition, BotID
 from organization_server_demo.modules.claire.services.claire_service import ClaireService
+from organization_server_demo.modules.claire.services.tenant_registry import ClaireTenant
 
 logger = logging.getLogger(__name__)
 
+BOT_CATALOGUE_CACHE_KEY = "bot_catalogue"
+
+
+class BotFilter(NamedTuple):
+    """
+    Precomputed filter of the bots available to a tenant.
+    
+    Attributes:
+        query: Serialized IDs of the available bots, sent as query parameters.
+        bot_ids: Set of the serialized IDs, for filtering sessions locally.
+    """
+    query: tuple[str, ...]
+    bot_ids: frozenset[str]
+
+    @classmethod
+    def from_bots(cls, bots: list[BotDefinition]) -> "BotFilter":
+        """
+        Build the filter of a list of bots.
+        
+        Args:
+            bots: The available bot definitions.
+            
+        Returns:
+            BotFilter: The filter.
+        """
+        query = tuple(dump_prefixed_id(BotID, bot.bot_id) for bot in bots)
+        return cls(query=query, bot_ids=frozenset(query))
+
+
+class BotEntry:
+    """
+    Bot of a bot catalogue with its serialized definition.
+    
+    Attributes:
+        definition: Definition of the bot.
+        body: JSON body of the definition.
+    """
+    __slots__ = ("definition", "body")
+
+    def __init__(self, definition: BotDefinition, body: PrecompressedBody):
+        """
+        Initialize the entry.
+        
+        Args:
+            definition: Definition of the bot.
+            body: JSON body of the definition.
+        """
+        self.definition = definition
+        self.body = body
+
+
+class BotCatalogue:
+    """
+    Index of the bots available to a tenant.
+    
+    The catalogue is built once per cache period and never modified. Every bot is
+    serialized once, and the body of the list is joined from the bodies of the
+    bots. A refresh replaces the catalogue in the tenant cache as a whole, so
+    readers always see a complete catalogue without taking a lock.
+    
+    Attributes:
+        bots: The available bot definitions, in the order of the Claire API.
+        body: JSON body of the list of bot definitions.
+        filter: Filter of the available bots for listing sessions.
+    """
+    __slots__ = ("bots", "body", "filter", "_entries")
+
+    def __init__(self, bots: list[BotDefinition]):
+        """
+        Index and serialize a list of bots.
+        
+        Args:
+            bots: The available bot definitions.
+        """
+        entries = [BotEntry(bot, PrecompressedBody(bot.model_dump_json().encode())) for bot in bots]
+        self.bots = tuple(bots)
+        self._entries = {entry.definition.bot_id: entry for entry in entries}
+        self.body = PrecompressedBody(b"[" + b",".join(entry.body.body for entry in entries) + b"]")
+        self.filter = BotFilter.from_bots(bots)
+
+    def get(self, bot_id: UUID) -> BotEntry | None:
+        """
+        Look up a bot by its ID.
+        
+        Args:
+            bot_id: UUID of the bot.
+            
+        Returns:
+            BotEntry | None: The bot, or None if it is not available.
+        """
+        return self._entries.get(bot_id)
+
+    def __contains__(self, bot_id: UUID) -> bool:
+        return bot_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class BotService(ClaireService):
     """
@@ -24,25 +129,166 @@ class BotService(ClaireService):
     including retrieving available bot definitions.
     """
     
+    async def get_catalogue(self) -> BotCatalogue:
+        """
+        Retrieve the catalogue of the available bots.
+        
+        The catalogue is fetched from the Claire and cached per tenant for the
+        configured cache time-to-live.
+        
+        Returns:
+            BotCatalogue: Catalogue of the available bots.
+            
+        Raises:
+            OrganizationServerException: If the API call fails or returns an error.
+        """
+        catalogue = self._tenant.cache.get(BOT_CATALOGUE_CACHE_KEY)
+        if catalogue is not None:
+            return catalogue
+        return await self._fetch_catalogue()
+
     async def get_bots(self) -> list[BotDefinition]:
         """
         Retrieve all available bot definitions from the Claire.
         
-        Makes an API call to the Claire to fetch the list of available bots
-        and returns them as BotDefinition objects.
-        
         Returns:
             list[BotDefinition]: List of available bot definitions.
             
         Raises:
             OrganizationServerException: If the API call fails or returns an error.
         """
-        async with self._client as client:
-            async with client.get("/m2m/organizations/bots") as resp:
-                result = await resp.json()
-                if resp.status != 200:
-                    logger.error("Could not get bots. %s", result)
-                    raise OrganizationServerException(
-                        status_code=status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not get bots."}
-                    )
-        return [BotDefinition.model_validate(bot) for bot in result]
+        return list((await self.get_catalogue()).bots)
+
+    async def get_bot_filter(self) -> BotFilter:
+        """
+        Retrieve the filter of the available bots for listing sessions.
+        
+        The filter is built once per cache period together with the bot catalogue.
+        
+        Returns:
+            BotFilter: Filter of the available bots.
+            
+        Raises:
+            OrganizationServerException: If the API call fails or returns an error.
+        """
+        return (await self.get_catalogue()).filter
+
+    async def get_bots_body(self) -> PrecompressedBody:
+        """
+        Retrieve the serialized list of available bot definitions.
+        
+        The list is serialized once per cache period and its compressed variants are
+        kept with it, so repeated requests are served without encoding work.
+        
+        Returns:
+            PrecompressedBody: JSON body of the bot definitions.
+            
+        Raises:
+            OrganizationServerException: If the API call fails or returns an error.
+        """
+        return (await self.get_catalogue()).body
+
+    async def get_bot_body(self, bot_id: UUID) -> PrecompressedBody:
+        """
+        Retrieve the serialized definition of an available bot.
+        
+        Args:
+            bot_id: UUID of the bot.
+            
+        Returns:
+            PrecompressedBody: JSON body of the bot definition.
+            
+        Raises:
+            OrganizationServerException: If the bot is not available or the API call fails.
+        """
+        entry = (await self.get_catalogue()).get(bot_id)
+        if entry is None:
+            raise OrganizationServerException(
+                status_code=status.HTTP_404_NOT_FOUND, detail={"message": "Bot not found."}
+            )
+        return entry.body
+
+    async def require_bot(self, bot_id: UUID):
+        """
+        Ensure that a bot is available, without calling the Claire if the catalogue is cached.
+        
+        A bot missing from a cached catalogue may have been added since, so the
+        catalogue is refetched once before the bot is rejected. Rejected bots are
+        kept in the negative cache of the tenant, so that unknown IDs cannot force
+        repeated refetches.
+        
+        Args:
+            bot_id: UUID of the bot.
+            
+        Raises:
+            OrganizationServerException: If the bot is not available or the API call fails.
+        """
+        catalogue = self._tenant.cache.get(BOT_CATALOGUE_CACHE_KEY)
+        if catalogue is None:
+            catalogue = await self._fetch_catalogue()
+        elif bot_id not in catalogue and self._tenant.unknown_bots.get(bot_id) is None:
+            catalogue = await self._fetch_catalogue()
+        if bot_id in catalogue:
+            return
+        if self._tenant.settings.negative_cache_ttl_seconds > 0:
+            self._tenant.unknown_bots.set(bot_id, True)
+        raise OrganizationServerException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail={"message": "Unknown bot."}
+        )
+
+    async def _fetch_catalogue(self) -> BotCatalogue:
+        """
+        Fetch the bot catalogue, sharing a fetch of the tenant that is already in progress.
+        
+        Concurrent requests on a cold cache, and concurrent refetches for bots
+        missing from the cached catalogue, wait for a single call to the Claire.
+        The shared fetch is not cancelled if a waiting request is cancelled.
+        
+        Returns:
+            BotCatalogue: Catalogue of the fetched bots.
+            
+        Raises:
+            OrganizationServerException: If the API call fails or returns an error.
+        """
+        tenant = self._tenant
+        while True:
+            task = tenant.catalogue_fetch
+            if task is None:
+                task = tenant.catalogue_fetch = asyncio.ensure_future(self._load_catalogue())
+                task.add_done_callback(lambda done: _clear_catalogue_fetch(tenant, done))
+            await asyncio.wait([task])
+            if not task.cancelled():
+                return task.result()
+
+    async def _load_catalogue(self) -> BotCatalogue:
+        """
+        Fetch the bot definitions from the Claire and cache their catalogue.
+        
+        Returns:
+            BotCatalogue: Catalogue of the fetched bots.
+            
+        Raises:
+            OrganizationServerException: If the API call fails or returns an error.
+        """
+        async with self._request("get_bots", "GET", "/m2m/organizations/bots") as resp:
+            result = await self._read_json("get_bots", resp)
+            if resp.status != 200:
+                raise self._upstream_error("Could not get bots.", resp, result)
+        with span("validation"):
+            bots = [BotDefinition.model_validate(bot) for bot in result]
+        with span("bots.serialization"):
+            catalogue = BotCatalogue(bots)
+        self._tenant.cache.set(BOT_CATALOGUE_CACHE_KEY, catalogue)
+        return catalogue
+
+
+def _clear_catalogue_fetch(tenant: ClaireTenant, task: asyncio.Task):
+    """
+    Forget a finished catalogue fetch of a tenant, so that the next fetch calls the Claire again.
+    
+    Args:
+        tenant: The tenant of the fetch.
+        task: Task of the finished fetch.
+    """
+    if tenant.catalogue_fetch is task:
+        tenant.catalogue_fetch = None
@@ -5,8 +5,32 @@ This module provides the base service class that other Claire services inherit f
 containing common functionality for API communication.
 """
 
+import asyncio
+import json
+import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import aiohttp
-from pydantic import AnyHttpUrl
+from starlette import status as http_status
+
+from organization_server_demo.modules.base.compression import UPSTREAM_ACCEPT_ENCODING
+from organization_server_demo.modules.base.exceptions import OrganizationServerException
+from organization_server_demo.modules.base.metrics import METRICS
+from organization_server_demo.modules.base.profiling import span
+from organization_server_demo.modules.base.structured_logging import record_upstream_call
+from organization_server_demo.modules.base.traffic_capture import capture_upstream_call
+from organization_server_demo.modules.claire.services.tenant_registry import ClaireTenant
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_BYTES = 64 * 1024
+BODY_BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Bodies read by _read_json, so that the traffic capture does not read the consumed stream again.
+_READ_BODIES: weakref.WeakKeyDictionary[aiohttp.ClientResponse, bytes] = weakref.WeakKeyDictionary()
 
 
 class ClaireService:
@@ -17,23 +41,180 @@ class ClaireService:
     Claire API, including automatic bearer token authentication.
     
     Attributes:
-        _client: Configured aiohttp ClientSession for API requests.
+        _tenant: Tenant (organization) the service acts for.
+        _client: Shared aiohttp ClientSession of the tenant for API requests.
     """
     
-    def __init__(self, base_url: AnyHttpUrl, api_key: str):
+    def __init__(self, tenant: ClaireTenant):
         """
-        Initialize the Claire service with API credentials.
+        Initialize the Claire service for a tenant.
         
-        Sets up an aiohttp ClientSession with the Claire base URL and
-        authorization headers for API communication.
+        Uses the connection pool of the tenant, which is configured with the Claire
+        base URL and authorization headers of the tenant for API communication.
         
         Args:
-            base_url: Base URL for the Claire API.
-            api_key: API key for authentication with the Claire.
-        """
-        self._client = aiohttp.ClientSession(
-            base_url=str(base_url),
-            headers={
-                "Authorization": f"Bearer {api_key}",
-            },
+            tenant: Tenant (organization) the service acts for.
+        """
+        self._tenant = tenant
+        self._client = tenant.client
+
+
+    @asynccontextmanager
+    async def _request(self, endpoint: str, method: str, path: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Send a request to the Claire API.
+        
+        The request, including reading the response within the context, is recorded
+        as the "claire.<endpoint>" profiling span and in the access log record of the
+        current request. Compressed responses are requested unless disabled for the
+        tenant; aiohttp decompresses them transparently.
+        
+        Calls exceeding the configured timeout fail with a 504 error, and connection
+        errors with a 502 error, so that neither leaks as an unhandled exception.
+        
+        The call counts as in flight for the tenant until the context is left, so
+        that shutdowns wait for it before closing the connection pool.
+        
+        Args:
+            endpoint: Name of the Claire API endpoint, used for instrumentation.
+            method: HTTP method of the request.
+            path: Path of the request relative to the Claire base URL.
+            **kwargs: Additional arguments passed to aiohttp.
+            
+        Yields:
+            aiohttp.ClientResponse: The response of the Claire API.
+            
+        Raises:
+            OrganizationServerException: If the call timed out or the connection failed.
+        """
+        headers = {
+            "Accept-Encoding": UPSTREAM_ACCEPT_ENCODING if self._tenant.settings.compress_responses else "identity",
+            **kwargs.pop("headers", {}),
+        }
+        status = None
+        start = time.perf_counter()
+        try:
+            with self._tenant.upstream_call(), span(f"claire.{endpoint}"):
+                async with self._client.request(
+                        method,
+                        path,
+                        headers=headers,
+                        timeout=aiohttp.ClientTimeout(total=self._tenant.settings.timeout_seconds),
+                        **kwargs,
+                ) as resp:
+                    status = resp.status
+                    try:
+                        yield resp
+                    finally:
+                        latency_ms = round((time.perf_counter() - start) * 1000, 3)
+                        await capture_upstream_call(
+                            endpoint, method, path, kwargs, resp, latency_ms, _READ_BODIES.get(resp)
+                        )
+        except asyncio.TimeoutError:
+            logger.error("Claire API call timed out.", extra={"endpoint": endpoint})
+            raise OrganizationServerException(
+                status_code=http_status.HTTP_504_GATEWAY_TIMEOUT, detail={"message": "Claire API timed out."}
+            )
+        except aiohttp.ClientError as e:
+            logger.error("Claire API call failed.", extra={"endpoint": endpoint, "error": repr(e)})
+            raise OrganizationServerException(
+                status_code=http_status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not reach the Claire API."}
+            )
+        finally:
+            record_upstream_call(endpoint, method, path, status, round((time.perf_counter() - start) * 1000, 3))
+
+    @staticmethod
+    def _upstream_error(message: str, resp: aiohttp.ClientResponse, body: object = None) -> OrganizationServerException:
+        """
+        Map an error response of the Claire API to an exception.
+        
+        Client errors are passed through with their status code, so that for
+        instance missing and forbidden sessions can be told apart, and are logged
+        as warnings. Authentication errors concern the credentials of this server
+        rather than the request, so they are reported as 502 errors like server
+        errors.
+        
+        Args:
+            message: Message of the error returned to the client.
+            resp: The error response of the Claire API.
+            body: Parsed body of the response, if it was read.
+            
+        Returns:
+            OrganizationServerException: The exception to raise.
+        """
+        extra = {"upstream_status": resp.status, "upstream_body": body}
+        if 400 <= resp.status < 500 and resp.status != http_status.HTTP_401_UNAUTHORIZED:
+            logger.warning(message, extra=extra)
+            return OrganizationServerException(status_code=resp.status, detail={"message": message})
+        logger.error(message, extra=extra)
+        return OrganizationServerException(status_code=http_status.HTTP_502_BAD_GATEWAY, detail={"message": message})
+
+    async def _read_json(self, endpoint: str, resp: aiohttp.ClientResponse) -> object:
+        """
+        Read and parse the JSON body of a Claire API response with a size limit.
+        
+        The body is read incrementally and the call is aborted as soon as the
+        declared or received size exceeds the limit of the endpoint, so that a
+        pathological response cannot exhaust the memory of the worker. Bodies of
+        at least parse_in_thread_bytes are parsed in the default thread pool to
+        keep the event loop responsive. The size of every body is recorded in the
+        "claire_response_bytes" histogram of the endpoint.
+        
+        Args:
+            endpoint: Name of the Claire API endpoint, selecting the size limit.
+            resp: The response of the Claire API.
+            
+        Returns:
+            object: The parsed body, or None if the body of an error response is not valid JSON.
+            
+        Raises:
+            OrganizationServerException: If the body is too large, or the body of a successful
+                                         response is not valid JSON.
+        """
+        settings = self._tenant.settings
+        limit = settings.endpoint_max_response_bytes.get(endpoint, settings.max_response_bytes)
+        body = bytearray()
+        if resp.content_length is not None and resp.content_length > limit:
+            self._response_too_large(endpoint, resp, limit)
+        async for chunk in resp.content.iter_chunked(READ_CHUNK_BYTES):
+            body += chunk
+            if len(body) > limit:
+                self._response_too_large(endpoint, resp, limit)
+        body = bytes(body)
+        _READ_BODIES[resp] = body
+        METRICS.histogram(
+            "claire_response_bytes", BODY_BYTES_BUCKETS, tenant=self._tenant.tenant_id, endpoint=endpoint
+        ).observe(len(body))
+        try:
+            with span("parsing"):
+                if len(body) >= settings.parse_in_thread_bytes:
+                    return await asyncio.to_thread(json.loads, body)
+                return json.loads(body)
+        except ValueError:
+            if not resp.ok:
+                return None
+            logger.error("Claire API returned an invalid body.", extra={"endpoint": endpoint})
+            raise OrganizationServerException(
+                status_code=http_status.HTTP_502_BAD_GATEWAY, detail={"message": "Invalid Claire API response."}
+            )
+
+    @staticmethod
+    def _response_too_large(endpoint: str, resp: aiohttp.ClientResponse, limit: int):
+        """
+        Abort a Claire API call whose response exceeds the size limit.
+        
+        The connection is closed instead of reading the rest of the body.
+        
+        Args:
+            endpoint: Name of the Claire API endpoint.
+            resp: The response of the Claire API.
+            limit: Maximum body size of the endpoint in bytes.
+            
+        Raises:
+            OrganizationServerException: Always, with status 502.
+        """
+        resp.close()
+        logger.error("Claire API response too large.", extra={"endpoint": endpoint, "max_response_bytes": limit})
+        raise OrganizationServerException(
+            status_code=http_status.HTTP_502_BAD_GATEWAY, detail={"message": "Claire API response too large."}
         )
@@ -0,0 +1,400 @@
+"""
+Durable session deletion queue for Claire integration.
+
+This module provides a local SQLite spool of session deletions, which allows
+the delete endpoint to respond before the Claire API confirmed the deletion,
+and a background worker pool draining the spool with bounded concurrency and
+retries.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from organization_server_demo.modules.base.metrics import METRICS
+from organization_server_demo.settings import DeleteQueueSettings, OrganizationServerSettings
+
+logger = logging.getLogger(__name__)
+
+ATTEMPTS_BUCKETS = (1, 2, 3, 5, 8, 13, 20)
+DELAY_MS_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 60000, 300000, 3600000)
+
+DeleteSession = Callable[[str, str], Awaitable[None]]
+
+_NO_PENDING: set[str] = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_deletes (
+    tenant_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed_at REAL,
+    PRIMARY KEY (tenant_id, session_id)
+)
+"""
+
+
+class DeleteQueue:
+    """
+    Spool of session deletions drained by a background worker pool.
+    
+    Deletions are committed to a SQLite database before they are acknowledged,
+    so they survive restarts. Up to the configured number of deletions are sent
+    to the Claire API concurrently. Failed deletions are retried with exponential
+    backoff and jitter. After the configured number of attempts, a deletion is
+    marked as failed and kept in the spool until an operator retries it, so that
+    the session stays hidden instead of reappearing in listings.
+    
+    The IDs of pending and failed deletions are kept in memory per tenant, so that
+    session listings can hide them right away. A spool left over from a previous
+    run is drained even if asynchronous deletion has been disabled since.
+    
+    The number of attempts of finished deletions and the time from queuing to
+    confirmation are recorded as the "delete_queue_attempts" and
+    "delete_queue_delay_ms" histograms, and the number of failed deletions as the
+    "delete_queue_failed" gauge.
+    
+    Attributes:
+        settings: Delete queue settings.
+    """
+
+    def __init__(self):
+        """
+        Initialize a closed queue.
+        """
+        self.settings = DeleteQueueSettings()
+        self._delete: DeleteSession | None = None
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._pending: dict[str, set[str]] = {}
+        self._in_flight: dict[tuple[str, str], asyncio.Task] = {}
+        self._spool_calls: set[asyncio.Future] = set()
+        self._wake = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+
+    @property
+    def accepting(self) -> bool:
+        """
+        Whether deletions are currently queued instead of sent immediately.
+        
+        Returns:
+            bool: Whether asynchronous deletion is enabled and the spool is open.
+        """
+        return self.settings.enabled and self._connection is not None
+
+    def start(self, settings: DeleteQueueSettings, delete: DeleteSession):
+        """
+        Open the spool and start draining it.
+        
+        The spool is only created if asynchronous deletion is enabled, but an
+        existing spool is always opened and drained.
+        
+        Args:
+            settings: Delete queue settings.
+            delete: Coroutine function deleting a session, given the tenant ID and the session ID.
+        """
+        self.settings = settings
+        self._delete = delete
+        if settings.enabled or os.path.exists(settings.path):
+            self._open()
+
+    def configure(self, settings: OrganizationServerSettings):
+        """
+        Apply reloaded delete queue settings.
+        
+        The spool path is only applied on restart.
+        
+        Args:
+            settings: Application settings containing the delete queue settings.
+        """
+        delete_queue_settings = settings.delete_queue
+        if self._connection is not None and delete_queue_settings.path != self.settings.path:
+            logger.warning("Delete queue path changed, a restart is required to apply it.")
+            delete_queue_settings = delete_queue_settings.model_copy(update={"path": self.settings.path})
+        self.settings = delete_queue_settings
+        if delete_queue_settings.enabled and self._connection is None and self._delete is not None:
+            self._open()
+        self._wake.set()
+
+    def pending(self, tenant_id: str) -> set[str]:
+        """
+        Get the sessions of a tenant whose deletion is pending or failed.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+        
+        Returns:
+            set[str]: Serialized IDs of the sessions. The set must not be modified.
+        """
+        return self._pending.get(tenant_id, _NO_PENDING)
+
+    async def enqueue(self, tenant_id: str, session_id: str):
+        """
+        Queue the deletion of a session.
+        
+        Returns once the deletion is committed to the spool. Queuing a deletion
+        that is already pending has no effect.
+        
+        Args:
+            tenant_id: Identifier of the tenant owning the session.
+            session_id: Serialized ID of the session.
+        """
+        now = time.time()
+        await self._spool(
+            self._execute,
+            "INSERT OR IGNORE INTO pending_deletes (tenant_id, session_id, enqueued_at, next_attempt_at) "
+            "VALUES (?, ?, ?, ?)",
+            (tenant_id, session_id, now, now),
+        )
+        self._pending.setdefault(tenant_id, set()).add(session_id)
+        self._wake.set()
+
+    async def retry_failed(self) -> int:
+        """
+        Queue the failed deletions of all tenants again.
+        
+        The deletions are sent again with a fresh number of attempts.
+        
+        Returns:
+            int: Number of deletions queued again.
+        """
+        if self._connection is None:
+            return 0
+        failed = await self._spool(self._reset_failed, time.time())
+        for tenant_id, count in failed:
+            METRICS.gauge("delete_queue_failed", tenant=tenant_id).inc(-count)
+        self._wake.set()
+        retried = sum(count for _, count in failed)
+        if retried:
+            logger.info("Failed deletions queued again.", extra={"retried": retried})
+        return retried
+
+    async def close(self, timeout_seconds: float = 0.0):
+        """
+        Stop draining the spool and close it.
+        
+        No further deletions are started. Deletions in progress are given up to the
+        timeout to complete, then cancelled. Cancelled deletions stay in the spool,
+        so they are sent again after the next start. The spool is closed once the
+        statements started by the cancelled workers have completed.
+        
+        Args:
+            timeout_seconds: Maximum time in seconds to wait for deletions in progress.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        tasks = [*self._in_flight.values()]
+        if tasks and timeout_seconds > 0:
+            await asyncio.wait(tasks, timeout=timeout_seconds)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*self._spool_calls, return_exceptions=True)
+        self._dispatcher = None
+        self._in_flight.clear()
+        if self._connection is not None:
+            with self._lock:
+                self._connection.close()
+            self._connection = None
+        self._pending.clear()
+
+    def _open(self):
+        """
+        Open or create the spool, load the pending deletions and start the dispatcher.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.settings.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.settings.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(_SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(pending_deletes)")}
+        if "failed_at" not in columns:
+            self._connection.execute("ALTER TABLE pending_deletes ADD COLUMN failed_at REAL")
+        self._pending.clear()
+        failed: dict[str, int] = {}
+        for tenant_id, session_id, failed_at in self._connection.execute(
+            "SELECT tenant_id, session_id, failed_at FROM pending_deletes"
+        ):
+            self._pending.setdefault(tenant_id, set()).add(session_id)
+            if failed_at is not None:
+                failed[tenant_id] = failed.get(tenant_id, 0) + 1
+        for tenant_id, count in failed.items():
+            METRICS.gauge("delete_queue_failed", tenant=tenant_id).set(count)
+        logger.info(
+            "Delete queue opened.",
+            extra={
+                "path": self.settings.path,
+                "pending": sum(len(ids) for ids in self._pending.values()),
+                "failed": sum(failed.values()),
+            },
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        """
+        Execute a statement on the spool.
+        
+        Args:
+            sql: The SQL statement.
+            parameters: Parameters of the statement.
+        
+        Returns:
+            list[tuple]: The result rows.
+        """
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _reset_failed(self, now: float) -> list[tuple[str, int]]:
+        """
+        Mark all failed deletions as due with no attempts in a single transaction.
+        
+        Args:
+            now: Time of the next attempt, as returned by time.time.
+        
+        Returns:
+            list[tuple[str, int]]: Tenant IDs and their number of reset deletions.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._connection.execute(
+                    "SELECT tenant_id, COUNT(*) FROM pending_deletes WHERE failed_at IS NOT NULL GROUP BY tenant_id"
+                ).fetchall()
+                self._connection.execute(
+                    "UPDATE pending_deletes SET failed_at = NULL, attempts = 0, next_attempt_at = ? "
+                    "WHERE failed_at IS NOT NULL",
+                    (now,),
+                )
+            except sqlite3.Error:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return failed
+
+    async def _spool(self, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a spool operation in a worker thread.
+        
+        The operation runs to completion even if the caller is cancelled, and
+        close waits for it before closing the spool.
+        
+        Args:
+            function: The operation.
+            *args: Arguments of the operation.
+        
+        Returns:
+            Any: The result of the operation.
+        """
+        call = asyncio.ensure_future(asyncio.to_thread(function, *args))
+        self._spool_calls.add(call)
+        call.add_done_callback(self._spool_calls.discard)
+        return await asyncio.shield(call)
+
+    async def _dispatch(self):
+        """
+        Start due deletions while workers are free, until the queue is closed.
+        """
+        while True:
+            self._wake.clear()
+            free = self.settings.workers - len(self._in_flight)
+            wait_seconds = self.settings.poll_interval_seconds
+            if free > 0:
+                rows = await self._spool(
+                    self._execute,
+                    "SELECT tenant_id, session_id, enqueued_at, next_attempt_at, attempts FROM pending_deletes "
+                    "WHERE failed_at IS NULL ORDER BY next_attempt_at LIMIT ?",
+                    (free + len(self._in_flight),),
+                )
+                now = time.time()
+                for tenant_id, session_id, enqueued_at, next_attempt_at, attempts in rows:
+                    key = (tenant_id, session_id)
+                    if key in self._in_flight:
+                        continue
+                    if next_attempt_at > now:
+                        wait_seconds = min(wait_seconds, next_attempt_at - now)
+                        break
+                    if free == 0:
+                        break
+                    task = asyncio.create_task(self._process(tenant_id, session_id, enqueued_at, attempts + 1))
+                    self._in_flight[key] = task
+                    task.add_done_callback(lambda _, key=key: self._finished(key))
+                    free -= 1
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _finished(self, key: tuple[str, str]):
+        """
+        Free the worker of a finished deletion.
+        
+        Args:
+            key: Tenant ID and session ID of the deletion.
+        """
+        self._in_flight.pop(key, None)
+        self._wake.set()
+
+    async def _process(self, tenant_id: str, session_id: str, enqueued_at: float, attempt: int):
+        """
+        Send a queued deletion to the Claire API and update the spool with the outcome.
+        
+        Args:
+            tenant_id: Identifier of the tenant owning the session.
+            session_id: Serialized ID of the session.
+            enqueued_at: Time at which the deletion was queued, as returned by time.time.
+            attempt: Number of the attempt, starting at 1.
+        """
+        try:
+            await self._delete(tenant_id, session_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            if attempt < self.settings.max_attempts:
+                delay = min(self.settings.retry_max_seconds, self.settings.retry_base_seconds * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(
+                    "Could not delete chat session, retrying.",
+                    extra={"tenant_id": tenant_id, "attempt": attempt, "retry_in_seconds": round(delay, 3)},
+                )
+                await self._spool(
+                    self._execute,
+                    "UPDATE pending_deletes SET attempts = ?, next_attempt_at = ?, last_error = ? "
+                    "WHERE tenant_id = ? AND session_id = ?",
+                    (attempt, time.time() + delay, repr(error), tenant_id, session_id),
+                )
+                return
+            logger.error(
+                "Could not delete chat session, marking the deletion as failed.",
+                extra={"tenant_id": tenant_id, "session_id": session_id, "attempts": attempt, "error": repr(error)},
+            )
+            METRICS.histogram("delete_queue_attempts", ATTEMPTS_BUCKETS, tenant=tenant_id).observe(attempt)
+            await self._spool(
+                self._execute,
+                "UPDATE pending_deletes SET attempts = ?, last_error = ?, failed_at = ? "
+                "WHERE tenant_id = ? AND session_id = ?",
+                (attempt, repr(error), time.time(), tenant_id, session_id),
+            )
+            METRICS.gauge("delete_queue_failed", tenant=tenant_id).inc()
+            return
+        METRICS.histogram("delete_queue_delay_ms", DELAY_MS_BUCKETS, tenant=tenant_id).observe(
+            (time.time() - enqueued_at) * 1000
+        )
+        METRICS.histogram("delete_queue_attempts", ATTEMPTS_BUCKETS, tenant=tenant_id).observe(attempt)
+        await self._spool(
+            self._execute,
+            "DELETE FROM pending_deletes WHERE tenant_id = ? AND session_id = ?",
+            (tenant_id, session_id),
+        )
+        self._pending.get(tenant_id, set()).discard(session_id)
+
+
+DELETE_QUEUE = DeleteQueue()
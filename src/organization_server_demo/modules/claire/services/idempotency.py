@@ -0,0 +1,110 @@
+"""
+Idempotency store for Claire integration.
+
+This module provides a bounded store of the outcomes of requests sent with an
+Idempotency-Key header, which lets retried requests receive the response of the
+original request instead of repeating its side effects.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from starlette import status
+
+from organization_server_demo.modules.base.cache import TTLCache
+from organization_server_demo.modules.base.exceptions import OrganizationServerException
+
+T = TypeVar("T")
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyStore:
+    """
+    Bounded store of idempotent requests by user and idempotency key.
+    
+    The first request with a key runs as a separate task, so that it completes
+    and its response is stored even if its client goes away. Requests with the
+    same key that arrive while it is in flight wait for it, and later ones
+    receive its stored response until the entry expires or is evicted. Failed
+    requests are not stored, so that a retry runs again. A key reused with
+    different parameters is rejected.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Initialize an empty store.
+        
+        Args:
+            max_size: Maximum number of stored requests.
+            ttl_seconds: Time in seconds for which completed requests are stored.
+        """
+        self._entries: TTLCache[tuple[str, str], tuple[Hashable, asyncio.Task]] = TTLCache(max_size, ttl_seconds)
+
+    def configure(self, max_size: int, ttl_seconds: float):
+        """
+        Apply reloaded limits to the store.
+        
+        Args:
+            max_size: Maximum number of stored requests.
+            ttl_seconds: Time in seconds for which completed requests are stored.
+        """
+        self._entries.max_size = max_size
+        self._entries.ttl_seconds = ttl_seconds
+
+    async def run(self, user_id: str, key: str, fingerprint: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a request once per user and idempotency key.
+        
+        Args:
+            user_id: External user ID sending the request.
+            key: Idempotency key sent by the client.
+            fingerprint: Operation and parameters of the request, which must match for every use of the key.
+            call: Coroutine function performing the request.
+        
+        Returns:
+            T: The response of the request, stored or new.
+        
+        Raises:
+            OrganizationServerException: If the key is too long or was used with different parameters,
+                                         or the error of the request.
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise OrganizationServerException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"message": f"Idempotency-Key must have 1 to {MAX_KEY_LENGTH} characters."},
+            )
+        entry_key = (user_id, key)
+        while True:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                task = asyncio.ensure_future(call())
+                self._entries.set(entry_key, (fingerprint, task))
+                task.add_done_callback(lambda done: self._finished(entry_key, done))
+            else:
+                stored_fingerprint, task = entry
+                if stored_fingerprint != fingerprint:
+                    raise OrganizationServerException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail={"message": "Idempotency-Key was already used with different parameters."},
+                    )
+            await asyncio.wait([task])
+            if not task.cancelled():
+                return task.result()
+
+    def _finished(self, entry_key: tuple[str, str], task: asyncio.Task):
+        """
+        Store a completed request from now on, or forget a failed one.
+        
+        Args:
+            entry_key: User ID and idempotency key of the request.
+            task: Task of the request.
+        """
+        failed = task.cancelled() or task.exception() is not None
+        entry = self._entries.get(entry_key)
+        if entry is None or entry[1] is not task:
+            return
+        if failed:
+            self._entries.pop(entry_key)
+        else:
+            self._entries.set(entry_key, entry)
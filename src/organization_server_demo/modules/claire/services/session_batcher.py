@@ -0,0 +1,166 @@
+"""
+Session creation batcher for Claire integration.
+
+This module provides a micro-batching stage for session creation requests, which
+smooths bursts of session creations over a bounded number of concurrent Claire
+API calls.
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, NamedTuple
+
+from organization_server_demo.modules.base.metrics import METRICS
+from organization_server_demo.modules.claire.models.sessions import SessionRequest, ClientSessionResponse
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+CreateSession = Callable[[SessionRequest], Awaitable[ClientSessionResponse]]
+
+
+class _PendingRequest(NamedTuple):
+    """
+    Session creation request waiting to be sent.
+    
+    Attributes:
+        session_request: Session creation request.
+        create_session: Coroutine function creating a single session in the Claire API.
+        future: Future receiving the response or error.
+        context: Context of the caller.
+        enqueued_at: Time at which the request was queued, as returned by time.perf_counter.
+    """
+    session_request: SessionRequest
+    create_session: CreateSession
+    future: asyncio.Future
+    context: contextvars.Context
+    enqueued_at: float
+
+
+class SessionCreateBatcher:
+    """
+    Micro-batcher for session creation requests.
+    
+    Requests are collected for a short window, or until the batch is full, and
+    then sent to the Claire API with a bounded number of concurrent calls shared
+    by all batches. Calls are started in submission order and every caller
+    receives its own response or error. Each call runs in the context of its
+    caller, so profiling spans and access log records are attributed to the
+    right request. Requests whose caller went away before they were sent are
+    skipped.
+    
+    The batch size and the time requests spend queued before being sent are
+    recorded as the "session_batch_size" and "session_batch_queue_wait_ms"
+    histograms.
+    """
+
+    def __init__(self, tenant_id: str, window_seconds: float, max_batch_size: int, max_concurrency: int):
+        """
+        Initialize the batcher.
+        
+        Args:
+            tenant_id: Identifier of the tenant, used as metric label.
+            window_seconds: Time in seconds requests are collected before a batch is sent.
+            max_batch_size: Number of requests after which a batch is sent immediately.
+            max_concurrency: Maximum number of concurrent session creation calls.
+        """
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: list[_PendingRequest] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._batch_size = METRICS.histogram("session_batch_size", BATCH_SIZE_BUCKETS, tenant=tenant_id)
+        self._queue_wait = METRICS.histogram("session_batch_queue_wait_ms", QUEUE_WAIT_MS_BUCKETS, tenant=tenant_id)
+
+    def configure(self, window_seconds: float, max_batch_size: int, max_concurrency: int):
+        """
+        Apply reloaded batching settings.
+        
+        A changed concurrency limit applies to batches sent afterward.
+        
+        Args:
+            window_seconds: Time in seconds requests are collected before a batch is sent.
+            max_batch_size: Number of requests after which a batch is sent immediately.
+            max_concurrency: Maximum number of concurrent session creation calls.
+        """
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        if max_concurrency != self._max_concurrency:
+            self._max_concurrency = max_concurrency
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def submit(self, session_request: SessionRequest, create_session: CreateSession) -> ClientSessionResponse:
+        """
+        Add a session creation request to the current batch and wait for its response.
+        
+        Args:
+            session_request: Session creation request.
+            create_session: Coroutine function creating a single session in the Claire API.
+        
+        Returns:
+            ClientSessionResponse: Created session information and authentication token.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(
+            _PendingRequest(session_request, create_session, future, contextvars.copy_context(), time.perf_counter())
+        )
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    async def close(self):
+        """
+        Send the pending batch and wait for all batches to complete.
+        """
+        self._flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self):
+        """
+        Send the pending requests as a batch.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._batch_size.observe(len(batch))
+        task = asyncio.create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[_PendingRequest]):
+        """
+        Send the requests of a batch with bounded concurrency.
+        
+        Args:
+            batch: Pending requests of the batch.
+        """
+        semaphore = self._semaphore
+
+        async def send(pending: _PendingRequest):
+            async with semaphore:
+                if pending.future.done():
+                    return
+                self._queue_wait.observe((time.perf_counter() - pending.enqueued_at) * 1000)
+                call = asyncio.create_task(pending.create_session(pending.session_request), context=pending.context)
+                try:
+                    response = await call
+                except Exception as e:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                else:
+                    if not pending.future.done():
+                        pending.future.set_result(response)
+
+        await asyncio.gather(*(send(pending) for pending in batch))
@@ -0,0 +1,613 @@
+"""
+Local session index for Claire integration.
+
+This module provides an embedded SQLite index of the chat sessions of users,
+which is synced incrementally from session listings and mutations and
+reconciled with the Claire API in the background, and allows searching the
+sessions of a user by bot, meta fields and recency without calling the Claire API.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from organization_server_demo.modules.base.cache import TTLCache
+from organization_server_demo.settings import OrganizationServerSettings, SessionIndexSettings
+
+logger = logging.getLogger(__name__)
+
+ReconcileUser = Callable[[str, str], Awaitable[None]]
+
+# Seconds between the first-seen times of consecutive new sessions of a listing, which keeps their listing order.
+LISTING_STEP_SECONDS = 0.001
+
+# Listing cursors whose previous page was recorded, for placing the sessions of the next page after it.
+LISTING_TAILS_SIZE = 10_000
+LISTING_TAILS_TTL_SECONDS = 3600
+
+# Version of the schema, stored as the SQLite user_version. Indexes of older versions are dropped and
+# rebuilt from the Claire API, as the index only holds data that can be listed again.
+_SCHEMA_VERSION = 2
+
+_DROP_SCHEMA = """
+DROP TRIGGER IF EXISTS sessions_fts_insert;
+DROP TRIGGER IF EXISTS sessions_fts_delete;
+DROP TRIGGER IF EXISTS sessions_fts_update;
+DROP TABLE IF EXISTS sessions_fts;
+DROP TABLE IF EXISTS sessions;
+DROP TABLE IF EXISTS users;
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    tenant_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    bot_id TEXT,
+    meta TEXT NOT NULL,
+    meta_text TEXT NOT NULL,
+    first_seen_at REAL NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (tenant_id, session_id)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_user ON sessions (tenant_id, user_id, first_seen_at, session_id);
+CREATE TABLE IF NOT EXISTS users (
+    tenant_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    reconciled_at REAL NOT NULL,
+    PRIMARY KEY (tenant_id, user_id)
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(meta_text, content='sessions', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS sessions_fts_insert AFTER INSERT ON sessions BEGIN
+    INSERT INTO sessions_fts (rowid, meta_text) VALUES (new.rowid, new.meta_text);
+END;
+CREATE TRIGGER IF NOT EXISTS sessions_fts_delete AFTER DELETE ON sessions BEGIN
+    INSERT INTO sessions_fts (sessions_fts, rowid, meta_text) VALUES ('delete', old.rowid, old.meta_text);
+END;
+CREATE TRIGGER IF NOT EXISTS sessions_fts_update AFTER UPDATE ON sessions BEGIN
+    INSERT INTO sessions_fts (sessions_fts, rowid, meta_text) VALUES ('delete', old.rowid, old.meta_text);
+    INSERT INTO sessions_fts (rowid, meta_text) VALUES (new.rowid, new.meta_text);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO sessions (tenant_id, session_id, user_id, bot_id, meta, meta_text, first_seen_at, synced_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (tenant_id, session_id) DO UPDATE SET
+    user_id = excluded.user_id, bot_id = excluded.bot_id, meta = excluded.meta, meta_text = excluded.meta_text,
+    synced_at = excluded.synced_at
+"""
+
+
+class IndexedSession(NamedTuple):
+    """
+    Searchable fields of a chat session.
+    
+    Messages and the rest of the bot configuration are not indexed, so that the
+    index neither grows with the conversations nor returns stale copies of them.
+    
+    Attributes:
+        session_id: Serialized ID of the session.
+        bot_id: Serialized ID of the bot of the session, or None if unknown.
+        meta: Meta data of the session.
+    """
+    session_id: str
+    bot_id: str | None
+    meta: Any
+
+
+class SessionQuery(NamedTuple):
+    """
+    Search criteria for the sessions of a user.
+    
+    Attributes:
+        text: Words that must all occur in the meta data, or None.
+        bot_id: Serialized ID of the bot, or None for sessions of all available bots.
+        meta: Meta fields that must have the given values, by field name.
+        since: Earliest time at which the sessions were first seen by this server, as returned by time.time,
+               or None.
+        limit: Maximum number of sessions.
+        cursor: Cursor returned with the previous page, or None.
+    """
+    text: str | None
+    bot_id: str | None
+    meta: dict[str, str]
+    since: float | None
+    limit: int
+    cursor: str | None
+
+
+class SessionSearchResult(NamedTuple):
+    """
+    Page of sessions found in the index.
+    
+    Attributes:
+        sessions: Sessions, most recent first, as dictionaries of the session ID, the bot ID, the meta data
+                  and the time the session was first seen, as returned by time.time.
+        cursor: Cursor of the next page, or None.
+        reconciled_at: Time of the last complete reconciliation of the user, as returned by time.time, or None.
+    """
+    sessions: list[dict[str, Any]]
+    cursor: str | None
+    reconciled_at: float | None
+
+
+class SessionIndex:
+    """
+    Embedded index of the chat sessions of users.
+    
+    The index is updated from every listed page of sessions and every session
+    creation and deletion. Updates are written by a background thread, so they
+    never block requests. Searches of a user whose sessions were not reconciled
+    within the reconciliation interval start a background reconciliation, which
+    lists all sessions of the user from the Claire API, updates them and removes
+    sessions that no longer exist. Searches are always answered from the index.
+    
+    Sessions are ordered by the time they were first seen. As the Claire API
+    lists sessions most recent first, the sessions first seen in a listing are
+    placed in listing order: below the session preceding them in the listing,
+    or at the current time if they lead the first page. Continuation pages
+    resume below the last session of the recorded page their cursor was
+    returned with, or below all sessions of the user if that page is unknown.
+    
+    The meta data of sessions is searchable by full-text if SQLite provides FTS5,
+    and by substring otherwise.
+    
+    Attributes:
+        settings: Session index settings.
+    """
+
+    def __init__(self):
+        """
+        Initialize a closed index.
+        """
+        self.settings = SessionIndexSettings()
+        self._reconcile: ReconcileUser | None = None
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._fts = False
+        self._writes: queue.Queue | None = None
+        self._writer: threading.Thread | None = None
+        # Only used by the writer thread.
+        self._tails: TTLCache[tuple[str, str, str], float] = TTLCache(LISTING_TAILS_SIZE, LISTING_TAILS_TTL_SECONDS)
+        self._reconciling: dict[tuple[str, str], asyncio.Task] = {}
+        self._reconcile_slots: asyncio.Semaphore | None = None
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether sessions are indexed and searchable.
+        
+        Returns:
+            bool: Whether the index is enabled and open.
+        """
+        return self.settings.enabled and self._connection is not None
+
+    def start(self, settings: SessionIndexSettings, reconcile: ReconcileUser):
+        """
+        Open the index if it is enabled.
+        
+        Args:
+            settings: Session index settings.
+            reconcile: Coroutine function reconciling the sessions of a user, given the tenant ID and the user ID.
+        """
+        self.settings = settings
+        self._reconcile = reconcile
+        if settings.enabled:
+            self._open()
+
+    def configure(self, settings: OrganizationServerSettings):
+        """
+        Apply reloaded session index settings.
+        
+        The index path is only applied on restart.
+        
+        Args:
+            settings: Application settings containing the session index settings.
+        """
+        index_settings = settings.session_index
+        if self._connection is not None and index_settings.path != self.settings.path:
+            logger.warning("Session index path changed, a restart is required to apply it.")
+            index_settings = index_settings.model_copy(update={"path": self.settings.path})
+        self.settings = index_settings
+        if index_settings.enabled and self._connection is None and self._reconcile is not None:
+            self._open()
+
+    def record(
+        self,
+        tenant_id: str,
+        user_id: str,
+        sessions: list[IndexedSession],
+        cursor: str | None = None,
+        next_cursor: str | None = None,
+    ):
+        """
+        Add or update listed sessions of a user.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            user_id: External user ID owning the sessions.
+            sessions: The sessions, most recent first.
+            cursor: Listing cursor the sessions were listed with, or None for the first page
+                    and for sessions that were just created.
+            next_cursor: Listing cursor of the next page, or None.
+        """
+        if self.active and sessions:
+            self._writes.put(("record", tenant_id, user_id, sessions, cursor, next_cursor))
+
+    def remove(self, tenant_id: str, session_id: str):
+        """
+        Remove a deleted session.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            session_id: Serialized ID of the session.
+        """
+        if self.active:
+            self._writes.put(("remove", tenant_id, session_id))
+
+    def replace(self, tenant_id: str, user_id: str, sessions: list[IndexedSession], started_at: float | None):
+        """
+        Store the result of a reconciliation of the sessions of a user.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            user_id: External user ID owning the sessions.
+            sessions: Sessions listed from the Claire API, most recent first.
+            started_at: Time at which the listing started, as returned by time.time, if all sessions
+                        were listed, or None if the listing was cut off. Only after a complete listing
+                        are sessions that were not listed and not updated since removed.
+        """
+        if self.active:
+            self._writes.put(("replace", tenant_id, user_id, sessions, started_at))
+
+    async def search(
+        self, tenant_id: str, user_id: str, bot_ids: frozenset[str], excluded: set[str], query: SessionQuery
+    ) -> SessionSearchResult:
+        """
+        Search the indexed sessions of a user.
+        
+        A background reconciliation is started if the sessions of the user were not
+        reconciled within the reconciliation interval.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            user_id: External user ID owning the sessions.
+            bot_ids: Serialized IDs of the bots available to the user.
+            excluded: Serialized IDs of sessions to leave out, such as pending deletions.
+            query: Search criteria.
+        
+        Returns:
+            SessionSearchResult: The page of matching sessions.
+        
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        result = await asyncio.to_thread(self._search, tenant_id, user_id, bot_ids, excluded, query)
+        stale = (
+            result.reconciled_at is None
+            or time.time() - result.reconciled_at > self.settings.reconcile_interval_seconds
+        )
+        if stale:
+            self._schedule_reconciliation(tenant_id, user_id)
+        return result
+
+    async def close(self):
+        """
+        Stop reconciliations, write pending updates and close the index.
+        """
+        tasks = [*self._reconciling.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._reconciling.clear()
+        if self._writer is not None:
+            self._writes.put(None)
+            await asyncio.to_thread(self._writer.join)
+            self._writer = None
+            self._writes = None
+        if self._connection is not None:
+            with self._lock:
+                self._connection.close()
+            self._connection = None
+
+    def _open(self):
+        """
+        Open or create the index and start the writer thread.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.settings.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.settings.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != _SCHEMA_VERSION:
+            self._connection.executescript(_DROP_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._connection.executescript(_SCHEMA)
+        try:
+            self._connection.executescript(_FTS_SCHEMA)
+            self._fts = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite lacks FTS5, meta data is searched by substring.")
+            self._fts = False
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write, args=(self._writes,), name="session-index", daemon=True)
+        self._writer.start()
+        self._reconcile_slots = asyncio.Semaphore(self.settings.reconcile_concurrency)
+        logger.info("Session index opened.", extra={"path": self.settings.path, "fts": self._fts})
+
+    def _write(self, writes: queue.Queue):
+        """
+        Apply queued updates until the index is closed.
+        
+        Updates queued in the meantime are applied in a single transaction.
+        
+        Args:
+            writes: Queue of updates, terminated by None.
+        """
+        while True:
+            batch = [writes.get()]
+            while len(batch) < 1000:
+                try:
+                    batch.append(writes.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                with self._lock:
+                    self._connection.execute("BEGIN")
+                    for update in batch:
+                        if update is not None:
+                            self._apply(update)
+                    self._connection.execute("COMMIT")
+            except sqlite3.Error:
+                logger.exception("Could not update the session index.")
+                with self._lock:
+                    if self._connection.in_transaction:
+                        self._connection.execute("ROLLBACK")
+            if stop:
+                return
+
+    def _apply(self, update: tuple):
+        """
+        Apply a single update. Must be called within a transaction.
+        
+        Args:
+            update: The update as queued by record, remove or replace.
+        """
+        kind, tenant_id = update[0], update[1]
+        if kind == "remove":
+            self._connection.execute(
+                "DELETE FROM sessions WHERE tenant_id = ? AND session_id = ?", (tenant_id, update[2])
+            )
+            return
+        user_id, sessions = update[2], update[3]
+        now = time.time()
+        if kind == "record" and update[4] is not None:
+            last = self._tails.get((tenant_id, user_id, update[4]))
+            if last is None:
+                (last,) = self._connection.execute(
+                    "SELECT MIN(first_seen_at) FROM sessions WHERE tenant_id = ? AND user_id = ?", (tenant_id, user_id)
+                ).fetchone()
+        else:
+            last = None
+        if last is None:
+            last = now + LISTING_STEP_SECONDS
+        known = dict(self._connection.execute(
+            "SELECT session_id, first_seen_at FROM sessions"
+            " WHERE tenant_id = ? AND session_id IN (SELECT value FROM json_each(?))",
+            (tenant_id, json.dumps([session.session_id for session in sessions])),
+        ).fetchall())
+        rows = []
+        for session in sessions:
+            first_seen_at = known.get(session.session_id, last - LISTING_STEP_SECONDS)
+            last = min(last, first_seen_at)
+            rows.append(_row(tenant_id, user_id, session, first_seen_at, now))
+        self._connection.executemany(_UPSERT, rows)
+        if kind == "record" and update[5] is not None:
+            self._tails.set((tenant_id, user_id, update[5]), last)
+        if kind == "replace" and update[4] is not None:
+            started_at = update[4]
+            self._connection.execute(
+                "DELETE FROM sessions WHERE tenant_id = ? AND user_id = ? AND synced_at < ?",
+                (tenant_id, user_id, started_at),
+            )
+            self._connection.execute(
+                "INSERT INTO users (tenant_id, user_id, reconciled_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (tenant_id, user_id) DO UPDATE SET reconciled_at = excluded.reconciled_at",
+                (tenant_id, user_id, started_at),
+            )
+
+    def _search(
+        self, tenant_id: str, user_id: str, bot_ids: frozenset[str], excluded: set[str], query: SessionQuery
+    ) -> SessionSearchResult:
+        """
+        Search the indexed sessions of a user in a worker thread.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            user_id: External user ID owning the sessions.
+            bot_ids: Serialized IDs of the bots available to the user.
+            excluded: Serialized IDs of sessions to leave out.
+            query: Search criteria.
+        
+        Returns:
+            SessionSearchResult: The page of matching sessions.
+        
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        sql = [
+            "SELECT session_id, bot_id, meta, first_seen_at FROM sessions WHERE tenant_id = ? AND user_id = ?",
+            "AND bot_id IN (SELECT value FROM json_each(?))",
+        ]
+        parameters: list[Any] = [tenant_id, user_id, json.dumps(sorted(bot_ids))]
+        if excluded:
+            sql.append("AND session_id NOT IN (SELECT value FROM json_each(?))")
+            parameters.append(json.dumps(sorted(excluded)))
+        if query.bot_id is not None:
+            sql.append("AND bot_id = ?")
+            parameters.append(query.bot_id)
+        if query.since is not None:
+            sql.append("AND first_seen_at >= ?")
+            parameters.append(query.since)
+        for field, value in query.meta.items():
+            # Keys are compared as values rather than spliced into a JSON path, so any key is valid.
+            sql.append(
+                "AND EXISTS (SELECT 1 FROM json_each(sessions.meta) AS field"
+                " WHERE field.key = ? AND CAST(field.value AS TEXT) = ?)"
+            )
+            parameters.extend((field, value))
+        words = query.text.split() if query.text else []
+        if words and self._fts:
+            sql.append("AND rowid IN (SELECT rowid FROM sessions_fts WHERE sessions_fts MATCH ?)")
+            parameters.append(" ".join('"' + word.replace('"', '""') + '"' for word in words))
+        else:
+            for word in words:
+                sql.append("AND meta_text LIKE ? ESCAPE '\\'")
+                parameters.append("%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if query.cursor is not None:
+            first_seen_at, session_id = _parse_cursor(query.cursor)
+            sql.append("AND (first_seen_at, session_id) < (?, ?)")
+            parameters.extend((first_seen_at, session_id))
+        sql.append("ORDER BY first_seen_at DESC, session_id DESC LIMIT ?")
+        parameters.append(query.limit + 1)
+
+        with self._lock:
+            rows = self._connection.execute(" ".join(sql), parameters).fetchall()
+            reconciled = self._connection.execute(
+                "SELECT reconciled_at FROM users WHERE tenant_id = ? AND user_id = ?", (tenant_id, user_id)
+            ).fetchone()
+        cursor = None
+        if len(rows) > query.limit:
+            rows = rows[:query.limit]
+            cursor = f"{rows[-1][3]!r}|{rows[-1][0]}"
+        return SessionSearchResult(
+            sessions=[
+                {"session_id": session_id, "bot_id": bot_id, "meta": json.loads(meta), "first_seen_at": first_seen_at}
+                for session_id, bot_id, meta, first_seen_at in rows
+            ],
+            cursor=cursor,
+            reconciled_at=reconciled[0] if reconciled else None,
+        )
+
+    def _schedule_reconciliation(self, tenant_id: str, user_id: str):
+        """
+        Start a background reconciliation of the sessions of a user unless one is running.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            user_id: External user ID.
+        """
+        key = (tenant_id, user_id)
+        if key in self._reconciling:
+            return
+        task = asyncio.create_task(self._run_reconciliation(tenant_id, user_id))
+        self._reconciling[key] = task
+        task.add_done_callback(lambda _: self._reconciling.pop(key, None))
+
+    async def _run_reconciliation(self, tenant_id: str, user_id: str):
+        """
+        Reconcile the sessions of a user with a bounded number of concurrent reconciliations.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            user_id: External user ID.
+        """
+        async with self._reconcile_slots:
+            try:
+                await self._reconcile(tenant_id, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Could not reconcile the session index.", extra={"tenant_id": tenant_id}, exc_info=True)
+
+
+def indexed_session(session: dict[str, Any]) -> IndexedSession:
+    """
+    Extract the searchable fields of a raw chat session.
+    
+    Args:
+        session: Raw chat session as returned by the Claire API.
+    
+    Returns:
+        IndexedSession: The searchable fields.
+    """
+    configuration = session.get("bot_configuration")
+    bot_id = configuration.get("bot_id") if isinstance(configuration, dict) else None
+    return IndexedSession(session_id=session["session_id"], bot_id=bot_id, meta=session.get("meta") or {})
+
+
+def _row(tenant_id: str, user_id: str, session: IndexedSession, first_seen_at: float, now: float) -> tuple:
+    """
+    Build the index row of a session.
+    
+    Args:
+        tenant_id: Identifier of the tenant.
+        user_id: External user ID owning the session.
+        session: The session.
+        first_seen_at: Time at which the session was first seen, used if it is new to the index.
+        now: Time of the update, as returned by time.time.
+    
+    Returns:
+        tuple: Parameters of the upsert statement.
+    """
+    return (
+        tenant_id,
+        session.session_id,
+        user_id,
+        session.bot_id,
+        json.dumps(session.meta, separators=(",", ":")),
+        " ".join(_meta_words(session.meta)),
+        first_seen_at,
+        now,
+    )
+
+
+def _meta_words(value: Any) -> list[str]:
+    """
+    Collect the searchable text of meta data: the keys and scalar values of all levels.
+    
+    Args:
+        value: Meta data.
+    
+    Returns:
+        list[str]: The keys and values as strings.
+    """
+    if isinstance(value, dict):
+        return [word for key, item in value.items() for word in (str(key), *_meta_words(item))]
+    if isinstance(value, list):
+        return [word for item in value for word in _meta_words(item)]
+    if value is None:
+        return []
+    return [str(value)]
+
+
+def _parse_cursor(cursor: str) -> tuple[float, str]:
+    """
+    Parse a search cursor.
+    
+    Args:
+        cursor: Cursor returned with a previous page.
+    
+    Returns:
+        tuple[float, str]: Time of the last session of the previous page and its ID.
+    
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    first_seen_at, separator, session_id = cursor.partition("|")
+    if not separator or not session_id:
+        raise ValueError("Invalid cursor")
+    return float(first_seen_at), session_id
+
+
+SESSION_INDEX = SessionIndex()
@@ -5,22 +5,68 @@ This module provides service layer functionality for managing chat sessions,
 including creation, listing, retrieval, renewal, and deletion operations.
 """
 
+import asyncio
+import functools
 import json
 import logging
+import time
+from typing import Awaitable, Callable
+from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter, ValidationError
 from starlette import status
 
 from organization_server_demo.modules.base.exceptions import OrganizationServerException
 from organization_server_demo.modules.base.models import PaginatedResults
-from organization_server_demo.modules.base.utils import dump_prefixed_id
+from organization_server_demo.modules.base.profiling import span
 from organization_server_demo.modules.claire.models.bots import BotID
 from organization_server_demo.modules.claire.models.sessions import SessionRequest, ClientSessionResponse, \
-    ChatSessionDTO
+    ChatSessionDTO, SessionID, SessionSummaryDTO
+from organization_server_demo.modules.claire.services.bot_service import BotFilter, BOT_CATALOGUE_CACHE_KEY
 from organization_server_demo.modules.claire.services.claire_service import ClaireService
+from organization_server_demo.modules.claire.services.delete_queue import DELETE_QUEUE
+from organization_server_demo.modules.claire.services.session_index import SESSION_INDEX, IndexedSession, \
+    SessionQuery, indexed_session
+from organization_server_demo.modules.claire.services.tenant_registry import TENANT_REGISTRY
 
 logger = logging.getLogger(__name__)
 
+NEGATIVE_CACHE_STATUSES = frozenset({status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND})
+
+_SESSION_ID_ADAPTER = TypeAdapter(SessionID)
+_BOT_ID_ADAPTER = TypeAdapter(BotID)
+
+
+def _filter_by_bot(sessions: list, bot_ids: frozenset[str]) -> list:
+    """
+    Keep the raw chat sessions whose bot is among the given bots.
+    
+    Args:
+        sessions: Chat sessions as returned by the Claire API.
+        bot_ids: Serialized IDs of the bots to keep sessions of.
+        
+    Returns:
+        list: The matching chat sessions.
+    """
+    return [
+        session for session in sessions
+        if isinstance(configuration := session.get("bot_configuration"), dict)
+        and configuration.get("bot_id") in bot_ids
+    ]
+
+
+def _session_not_found() -> OrganizationServerException:
+    """
+    Build the error for a chat session that does not exist or belongs to another user.
+    
+    Returns:
+        OrganizationServerException: The 404 error.
+    """
+    return OrganizationServerException(
+        status_code=status.HTTP_404_NOT_FOUND, detail={"message": "Chat session not found."}
+    )
+
 
 class SessionService(ClaireService):
     """
@@ -30,12 +76,57 @@ class SessionService(ClaireService):
     including CRUD operations for chat sessions.
     """
 
-    async def create_session(self, session_request: SessionRequest) -> ClientSessionResponse:
+    async def create_session(
+        self, session_request: SessionRequest, idempotency_key: str | None = None
+    ) -> ClientSessionResponse:
         """
         Create a new chat session in the Claire API.
         
         Sends a session creation request to the Claire API with the provided
-        session parameters and returns the created session information.
+        session parameters and returns the created session information. If
+        batching is configured, the request is sent as part of a micro-batch.
+        With an idempotency key, a retried request receives the session created
+        by the original request instead of creating another one.
+        
+        Args:
+            session_request: Session creation request with user and bot information.
+            idempotency_key: Optional Idempotency-Key header of the request.
+            
+        Returns:
+            ClientSessionResponse: Created session information and authentication token.
+            
+        Raises:
+            OrganizationServerException: If the session creation fails or the idempotency key is invalid.
+        """
+        if idempotency_key is not None:
+            return await self._tenant.idempotency.run(
+                session_request.user.organization_user_id,
+                idempotency_key,
+                ("create_session", session_request.bot_id),
+                functools.partial(self._submit_session, session_request),
+            )
+        return await self._submit_session(session_request)
+
+    async def _submit_session(self, session_request: SessionRequest) -> ClientSessionResponse:
+        """
+        Create a chat session, as part of a micro-batch if batching is configured.
+        
+        Args:
+            session_request: Session creation request with user and bot information.
+            
+        Returns:
+            ClientSessionResponse: Created session information and authentication token.
+            
+        Raises:
+            OrganizationServerException: If the session creation fails.
+        """
+        if self._tenant.settings.session_batch_window_ms > 0:
+            return await self._tenant.session_batcher.submit(session_request, self._create_session)
+        return await self._create_session(session_request)
+
+    async def _create_session(self, session_request: SessionRequest) -> ClientSessionResponse:
+        """
+        Send a single session creation request to the Claire API.
         
         Args:
             session_request: Session creation request with user and bot information.
@@ -47,62 +138,320 @@ class SessionService(ClaireService):
             OrganizationServerException: If the session creation fails.
         """
         encoded_body = json.dumps(session_request, default=jsonable_encoder).encode("utf-8")
-        async with self._client as client:
-            async with client.post(
-                    "/m2m/client_sessions",
-                    data=encoded_body,
-                    headers={
-                        "Content-Type": "application/json",
-                    },
-            ) as resp:
-                result = await resp.json()
-                if resp.status != 200:
-                    logger.error("Could not create chat session: %s", result)
-                    raise OrganizationServerException(
-                        status_code=status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not create chat session."}
-                    )
-        return ClientSessionResponse.model_validate(result)
+        async with self._request(
+                "create_session",
+                "POST",
+                "/m2m/client_sessions",
+                data=encoded_body,
+                headers={
+                    "Content-Type": "application/json",
+                },
+        ) as resp:
+            result = await self._read_json("create_session", resp)
+            if resp.status != 200:
+                raise self._upstream_error("Could not create chat session.", resp, result)
+        with span("validation"):
+            response = ClientSessionResponse.model_validate(result)
+        self._tenant.session_owners.set(response.session.session_id, session_request.user.organization_user_id)
+        SESSION_INDEX.record(self._tenant.tenant_id, session_request.user.organization_user_id, [IndexedSession(
+            session_id=_SESSION_ID_ADAPTER.dump_python(response.session.session_id, mode="json"),
+            bot_id=_BOT_ID_ADAPTER.dump_python(session_request.bot_id, mode="json"),
+            meta=response.session.meta,
+        )])
+        return response
 
     async def list_sessions(
-        self, auth0_user_id: str, bot_ids: list[BotID], cursor: str | None
+        self, auth0_user_id: str, get_bot_filter: Callable[[], Awaitable[BotFilter]], cursor: str | None
     ) -> PaginatedResults[ChatSessionDTO]:
         """
-        List chat sessions for a specific user and bot IDs.
+        List chat sessions for a specific user and the available bots.
         
         Retrieves a paginated list of chat sessions filtered by user ID and
-        available bot IDs.
+        available bot IDs. Sessions whose deletion is queued are left out. Up to
+        bot_filter_query_limit bot IDs are sent to the Claire API as query
+        parameters. With more bots, the sessions of all bots are listed and
+        filtered locally before validation, so pages may contain fewer sessions
+        than the Claire API page size.
+        
+        If the bot filter is not cached and concurrent_session_listing is enabled,
+        the bot filter and the sessions of all bots are fetched concurrently and the
+        sessions are filtered locally once both have arrived. If either fetch fails,
+        the other one is cancelled and the first error is raised.
         
         Args:
             auth0_user_id: External user ID from Auth0.
-            bot_ids: List of bot IDs to filter sessions by.
+            get_bot_filter: Coroutine function returning the filter of the bots to list sessions of.
             cursor: Optional cursor for pagination.
             
         Returns:
             PaginatedResults[ChatSessionDTO]: Paginated list of chat sessions.
             
+        Raises:
+            OrganizationServerException: If the session listing or the bot retrieval fails.
+        """
+        catalogue = self._tenant.cache.get(BOT_CATALOGUE_CACHE_KEY)
+        bot_filter = catalogue.filter if catalogue is not None else None
+        if bot_filter is None and self._tenant.settings.concurrent_session_listing:
+            try:
+                async with asyncio.TaskGroup() as task_group:
+                    bot_filter_task = task_group.create_task(get_bot_filter())
+                    result_task = task_group.create_task(self._fetch_sessions(auth0_user_id, None, cursor))
+            except* Exception as errors:
+                raise errors.exceptions[0] from None
+            bot_filter, result, filter_locally = bot_filter_task.result(), result_task.result(), True
+        else:
+            if bot_filter is None:
+                bot_filter = await get_bot_filter()
+            filter_locally = len(bot_filter.query) > self._tenant.settings.bot_filter_query_limit
+            result = await self._fetch_sessions(auth0_user_id, None if filter_locally else bot_filter.query, cursor)
+
+        if result is None:
+            return PaginatedResults[ChatSessionDTO](
+                results=[], cursor=None
+            )
+        if filter_locally:
+            with span("bot_filter"):
+                result["results"] = _filter_by_bot(result.get("results", []), bot_filter.bot_ids)
+        pending_deletes = DELETE_QUEUE.pending(self._tenant.tenant_id)
+        if pending_deletes:
+            result["results"] = [
+                session for session in result.get("results", []) if session.get("session_id") not in pending_deletes
+            ]
+        with span("validation"):
+            sessions = PaginatedResults[ChatSessionDTO].model_validate(result)
+        for session in sessions.results:
+            self._tenant.session_owners.set(session.session_id, auth0_user_id)
+        if len(self._tenant.failed_sessions):
+            for session in sessions.results:
+                self._tenant.failed_sessions.pop((auth0_user_id, session.session_id))
+        SESSION_INDEX.record(
+            self._tenant.tenant_id,
+            auth0_user_id,
+            [indexed_session(session) for session in result["results"]],
+            cursor,
+            sessions.cursor.cursor_id if sessions.cursor is not None else None,
+        )
+        return sessions
+
+    async def _fetch_sessions(
+        self, auth0_user_id: str, bot_ids: tuple[str, ...] | None, cursor: str | None
+    ) -> dict | None:
+        """
+        Fetch a page of chat sessions of a user from the Claire API.
+        
+        Args:
+            auth0_user_id: External user ID from Auth0.
+            bot_ids: Serialized IDs of the bots to list sessions of, or None to list the sessions of all bots.
+            cursor: Optional cursor for pagination.
+            
+        Returns:
+            dict | None: The raw page of chat sessions, or None if the user has no sessions.
+            
         Raises:
             OrganizationServerException: If the session listing fails.
         """
         params = {
             "external_user_id": auth0_user_id,
-            "bot_ids": [dump_prefixed_id(BotID, bot_id) for bot_id in bot_ids],
         }
+        if bot_ids is not None:
+            params["bot_ids"] = list(bot_ids)
         if cursor:
             params["cursor"] = cursor
 
-        async with self._client as client:
-            async with client.get("/m2m/client_sessions/", params=params) as resp:
-                result = await resp.json()
-                if resp.status == 404:
-                    return PaginatedResults[ChatSessionDTO](
-                        results=[], cursor=None
-                    )
-                if resp.status != 200:
-                    logger.error("Could not list chat sessions: %s", result)
-                    raise OrganizationServerException(
-                        status_code=status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not list chat sessions."}
-                    )
-        return PaginatedResults[ChatSessionDTO].model_validate(result)
+        async with self._request("list_sessions", "GET", "/m2m/client_sessions/", params=params) as resp:
+            result = await self._read_json("list_sessions", resp)
+            if resp.status == 404:
+                return None
+            if resp.status != 200:
+                raise self._upstream_error("Could not list chat sessions.", resp, result)
+        return result
+
+    async def search_sessions(
+        self, external_user_id: str, get_bot_filter: Callable[[], Awaitable[BotFilter]], query: SessionQuery
+    ) -> tuple[PaginatedResults[SessionSummaryDTO], float | None]:
+        """
+        Search the sessions of a user in the local session index.
+        
+        Only sessions of the available bots are found, and sessions whose deletion
+        is queued are left out. The Claire API is not called, except for the bot
+        list if it is not cached, so the sessions are returned as summaries
+        without messages.
+        
+        Args:
+            external_user_id: External user ID from Auth0.
+            get_bot_filter: Coroutine function returning the filter of the bots available to the user.
+            query: Search criteria.
+            
+        Returns:
+            tuple[PaginatedResults[SessionSummaryDTO], float | None]: The page of matching sessions, most
+                                                                      recent first, and the time of the last
+                                                                      complete reconciliation of the user, if any.
+            
+        Raises:
+            OrganizationServerException: If the session index is disabled or the cursor is invalid.
+        """
+        if not SESSION_INDEX.active:
+            raise OrganizationServerException(
+                status_code=status.HTTP_404_NOT_FOUND, detail={"message": "Session search is not enabled."}
+            )
+        bot_filter = await get_bot_filter()
+        try:
+            result = await SESSION_INDEX.search(
+                self._tenant.tenant_id,
+                external_user_id,
+                bot_filter.bot_ids,
+                frozenset(DELETE_QUEUE.pending(self._tenant.tenant_id)),
+                query,
+            )
+        except ValueError:
+            raise OrganizationServerException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail={"message": "Invalid cursor."}
+            )
+        with span("validation"):
+            sessions = PaginatedResults[SessionSummaryDTO].model_validate({
+                "cursor": {"cursor_id": result.cursor} if result.cursor is not None else None,
+                "results": result.sessions,
+            })
+        return sessions, result.reconciled_at
+
+    async def reconcile_index(self, external_user_id: str):
+        """
+        Reconcile the indexed sessions of a user with the Claire API.
+        
+        Lists the sessions of all bots of the user, at most reconcile_max_pages
+        pages, and stores them in the session index. Sessions missing from a
+        complete listing are removed from the index.
+        
+        Args:
+            external_user_id: External user ID from Auth0.
+            
+        Raises:
+            OrganizationServerException: If the session listing fails.
+        """
+        started_at = time.time()
+        sessions = []
+        cursor = None
+        for _ in range(SESSION_INDEX.settings.reconcile_max_pages):
+            result = await self._fetch_sessions(external_user_id, None, cursor)
+            if result is None:
+                break
+            page = PaginatedResults[ChatSessionDTO].model_validate(result)
+            sessions.extend(indexed_session(session) for session in result["results"])
+            if page.cursor is None:
+                break
+            cursor = page.cursor.cursor_id
+        else:
+            started_at = None
+        pending_deletes = DELETE_QUEUE.pending(self._tenant.tenant_id)
+        SESSION_INDEX.replace(
+            self._tenant.tenant_id,
+            external_user_id,
+            [session for session in sessions if session.session_id not in pending_deletes],
+            started_at,
+        )
+
+    async def authorize_session(self, session_id: str, external_user_id: str):
+        """
+        Ensure that a chat session belongs to a user.
+        
+        The owner is looked up in the ownership index of the tenant, which is filled
+        by session creations and listings. On a miss, the session is fetched from the
+        Claire API once and its owner is added to the index. Sessions whose deletion
+        is queued are treated as not found.
+        
+        Sessions that were not found or were forbidden for the user recently are
+        rejected with the same error without calling the Claire API, until the
+        entry in the negative cache expires or the session is listed for the user.
+        
+        Args:
+            session_id: Identifier of the session.
+            external_user_id: External user ID from Auth0.
+            
+        Raises:
+            OrganizationServerException: If the session does not exist, belongs to another user or the
+                                         lookup fails.
+        """
+        try:
+            session_uuid = _SESSION_ID_ADAPTER.validate_python(session_id)
+        except ValidationError:
+            session_uuid = None
+
+        owner = None
+        if session_uuid is not None and not self._is_deletion_pending(session_uuid):
+            failure = self._tenant.failed_sessions.get((external_user_id, session_uuid))
+            if failure is not None:
+                status_code, message = failure
+                raise OrganizationServerException(status_code=status_code, detail={"message": message})
+            owner = self._tenant.session_owners.get(session_uuid)
+            if owner is None:
+                owner = await self._fetch_owner(session_uuid)
+        if owner != external_user_id:
+            error = _session_not_found()
+            self._remember_failed_session(session_id, external_user_id, error)
+            raise error
+
+    def _remember_failed_session(self, session_id: str, external_user_id: str, error: OrganizationServerException):
+        """
+        Store a failed session lookup in the negative cache of the tenant.
+        
+        Only errors stating that the session does not exist or is forbidden for the
+        user are stored, and only if the negative cache is enabled.
+        
+        Args:
+            session_id: Identifier of the session.
+            external_user_id: External user ID from Auth0.
+            error: The error of the lookup.
+        """
+        if error.status_code not in NEGATIVE_CACHE_STATUSES or self._tenant.settings.negative_cache_ttl_seconds <= 0:
+            return
+        try:
+            session_uuid = _SESSION_ID_ADAPTER.validate_python(session_id)
+        except ValidationError:
+            return
+        self._tenant.failed_sessions.set((external_user_id, session_uuid), (error.status_code, error.detail["message"]))
+
+    def _is_deletion_pending(self, session_uuid: UUID) -> bool:
+        """
+        Check whether the deletion of a session is queued.
+        
+        Args:
+            session_uuid: UUID of the session.
+            
+        Returns:
+            bool: Whether the deletion is pending.
+        """
+        pending_deletes = DELETE_QUEUE.pending(self._tenant.tenant_id)
+        return bool(pending_deletes) and _SESSION_ID_ADAPTER.dump_python(session_uuid, mode="json") in pending_deletes
+
+    async def _fetch_owner(self, session_uuid: UUID) -> str | None:
+        """
+        Look up the owner of a session in the Claire API and add it to the ownership index.
+        
+        The session is fetched directly, regardless of the bots currently available,
+        so that users keep access to their sessions of bots that were removed.
+        
+        Args:
+            session_uuid: UUID of the session.
+            
+        Returns:
+            str | None: External user ID owning the session, or None if the session does not exist,
+                        is forbidden or has no owner.
+            
+        Raises:
+            OrganizationServerException: If the lookup fails.
+        """
+        session_id = _SESSION_ID_ADAPTER.dump_python(session_uuid, mode="json")
+        async with self._request("get_session", "GET", f"/m2m/client_sessions/{session_id}") as resp:
+            result = await self._read_json("get_session", resp)
+            if resp.status in NEGATIVE_CACHE_STATUSES:
+                return None
+            if resp.status != 200:
+                raise self._upstream_error("Could not get chat session.", resp, result)
+        owner = result.get("external_user_id") if isinstance(result, dict) else None
+        if not isinstance(owner, str):
+            return None
+        self._tenant.session_owners.set(session_uuid, owner)
+        return owner
 
     async def get_session(self, session_id: str) -> ChatSessionDTO:
         """
@@ -120,41 +469,92 @@ class SessionService(ClaireService):
         Raises:
             OrganizationServerException: If the session retrieval fails.
         """
-        async with self._client as client:
-            async with client.get(f"/m2m/client_sessions/{session_id}") as resp:
-                result = await resp.json()
-                if resp.status != 200:
-                    logger.error("Could not get chat session: %s", result)
-                    raise OrganizationServerException(
-                        status_code=status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not get chat session."}
-                    )
-        return ChatSessionDTO.model_validate(result)
+        async with self._request("get_session", "GET", f"/m2m/client_sessions/{session_id}") as resp:
+            result = await self._read_json("get_session", resp)
+            if resp.status != 200:
+                raise self._upstream_error("Could not get chat session.", resp, result)
+        with span("validation"):
+            return ChatSessionDTO.model_validate(result)
 
-    async def delete_session(self, session_id: str):
+    async def delete_session(self, session_id: str, missing_ok: bool = False, external_user_id: str | None = None):
         """
         Delete a chat session.
         
-        Permanently removes a chat session from the Claire API.
+        Permanently removes a chat session from the Claire API. If the user
+        deleting the session is given, repeated deletions and renewals of the
+        session by the user are rejected from the negative cache.
         
         Args:
             session_id: Unique identifier of the session to delete.
+            missing_ok: Whether a session that does not exist anymore counts as deleted.
+            external_user_id: Optional external user ID from Auth0 of the user deleting the session.
             
         Raises:
             OrganizationServerException: If the session deletion fails.
         """
-        async with self._client as client:
-            async with client.delete(f"/m2m/client_sessions/{session_id}") as resp:
-                if resp.status != 200:
-                    raise OrganizationServerException(
-                        status_code=status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not delete chat session."}
-                    )
+        async with self._request("delete_session", "DELETE", f"/m2m/client_sessions/{session_id}") as resp:
+            if resp.status != 200 and not (missing_ok and resp.status == 404):
+                error = self._upstream_error("Could not delete chat session.", resp)
+                if external_user_id is not None:
+                    self._remember_failed_session(session_id, external_user_id, error)
+                raise error
+        if external_user_id is not None:
+            self._remember_failed_session(session_id, external_user_id, _session_not_found())
+        try:
+            session_uuid = _SESSION_ID_ADAPTER.validate_python(session_id)
+        except ValidationError:
+            return
+        self._tenant.session_owners.pop(session_uuid)
+        SESSION_INDEX.remove(self._tenant.tenant_id, _SESSION_ID_ADAPTER.dump_python(session_uuid, mode="json"))
+
+    async def queue_delete_session(self, session_id: str):
+        """
+        Queue the deletion of a chat session.
+        
+        The deletion is committed to the local spool and sent to the Claire API in
+        the background. The session is hidden from listings and searches right away.
+        
+        Args:
+            session_id: Unique identifier of the session to delete.
+        """
+        session_uuid = _SESSION_ID_ADAPTER.validate_python(session_id)
+        serialized_id = _SESSION_ID_ADAPTER.dump_python(session_uuid, mode="json")
+        await DELETE_QUEUE.enqueue(self._tenant.tenant_id, serialized_id)
+        SESSION_INDEX.remove(self._tenant.tenant_id, serialized_id)
 
-    async def renew_session(self, session_id: str, external_user_id: str) -> ClientSessionResponse:
+    async def renew_session(
+        self, session_id: str, external_user_id: str, idempotency_key: str | None = None
+    ) -> ClientSessionResponse:
         """
         Renew an existing chat session.
         
         Refreshes the authentication token for an existing session, allowing
-        continued access to the session.
+        continued access to the session. With an idempotency key, a retried
+        request receives the token of the original request.
+        
+        Args:
+            session_id: Unique identifier of the session to renew.
+            external_user_id: External user ID from Auth0.
+            idempotency_key: Optional Idempotency-Key header of the request.
+            
+        Returns:
+            ClientSessionResponse: Renewed session information and new token.
+            
+        Raises:
+            OrganizationServerException: If the session renewal fails or the idempotency key is invalid.
+        """
+        if idempotency_key is not None:
+            return await self._tenant.idempotency.run(
+                external_user_id,
+                idempotency_key,
+                ("renew_session", session_id),
+                functools.partial(self._renew_session, session_id, external_user_id),
+            )
+        return await self._renew_session(session_id, external_user_id)
+
+    async def _renew_session(self, session_id: str, external_user_id: str) -> ClientSessionResponse:
+        """
+        Send a session renewal request to the Claire API.
         
         Args:
             session_id: Unique identifier of the session to renew.
@@ -171,18 +571,55 @@ class SessionService(ClaireService):
         }
         encoded_body = json.dumps(body, default=jsonable_encoder).encode("utf-8")
 
-        async with self._client as client:
-            async with client.post(
-                    f"/m2m/client_sessions/{session_id}/renew",
-                    data=encoded_body,
-                    headers={
-                        "Content-Type": "application/json",
-                    },
-            ) as resp:
-                result = await resp.json()
-                if resp.status != 200:
-                    logger.error("Could not renew chat session: %s", result)
-                    raise OrganizationServerException(
-                        status_code=status.HTTP_502_BAD_GATEWAY, detail={"message": "Could not renew chat session."}
-                    )
-        return ClientSessionResponse.model_validate(result)
+        async with self._request(
+                "renew_session",
+                "POST",
+                f"/m2m/client_sessions/{session_id}/renew",
+                data=encoded_body,
+                headers={
+                    "Content-Type": "application/json",
+                },
+        ) as resp:
+            result = await self._read_json("renew_session", resp)
+            if resp.status != 200:
+                error = self._upstream_error("Could not renew chat session.", resp, result)
+                self._remember_failed_session(session_id, external_user_id, error)
+                raise error
+        with span("validation"):
+            return ClientSessionResponse.model_validate(result)
+
+
+async def delete_queued_session(tenant_id: str, session_id: str):
+    """
+    Delete a chat session taken from the delete queue.
+    
+    Sessions that do not exist anymore count as deleted.
+    
+    Args:
+        tenant_id: Identifier of the tenant owning the session.
+        session_id: Unique identifier of the session to delete.
+        
+    Raises:
+        LookupError: If the tenant is not configured anymore.
+        OrganizationServerException: If the session deletion fails.
+    """
+    tenant = TENANT_REGISTRY.get(tenant_id)
+    if tenant is None:
+        raise LookupError(f"Unknown tenant {tenant_id}")
+    await SessionService(tenant).delete_session(session_id, missing_ok=True)
+
+
+async def reconcile_user_sessions(tenant_id: str, external_user_id: str):
+    """
+    Reconcile the indexed sessions of a user with the Claire API.
+    
+    Args:
+        tenant_id: Identifier of the tenant of the user.
+        external_user_id: External user ID from Auth0.
+        
+    Raises:
+        OrganizationServerException: If the session listing fails.
+    """
+    tenant = TENANT_REGISTRY.get(tenant_id)
+    if tenant is not None:
+        await SessionService(tenant).reconcile_index(external_user_id)
@@ -0,0 +1,415 @@
+"""
+Tenant registry for multi-organization Claire integration.
+
+This module keeps the per-organization (tenant) state of the process, including
+the Claire settings, the connection pool and the caches of every organization,
+and allows swapping the tenant configuration without a restart.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Coroutine, Iterator, NamedTuple
+from uuid import UUID
+
+import aiohttp
+
+from organization_server_demo.modules.base.cache import TTLCache
+from organization_server_demo.modules.base.metrics import METRICS
+from organization_server_demo.modules.claire.models.settings import ClaireSettings
+from organization_server_demo.modules.claire.services.idempotency import IdempotencyStore
+from organization_server_demo.modules.claire.services.session_batcher import SessionCreateBatcher
+from organization_server_demo.settings import OrganizationServerSettings, TenancySettings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT_ID = "default"
+RETIRED_TENANT_CLOSE_MARGIN_SECONDS = 5.0
+TTFB_MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+def _ttfb_trace_config(tenant_id: str) -> aiohttp.TraceConfig:
+    """
+    Build a trace configuration recording the time to the first byte of Claire API responses.
+    
+    The time from sending a request to receiving the response headers is recorded
+    in the "claire_ttfb_ms" histogram, separately for requests that had to open a
+    new connection and requests that reused a pooled one.
+    
+    Args:
+        tenant_id: Identifier of the tenant, used as metric label.
+    
+    Returns:
+        aiohttp.TraceConfig: The trace configuration.
+    """
+    async def on_request_start(_session: aiohttp.ClientSession, context: SimpleNamespace, _params):
+        context.start = time.perf_counter()
+        context.connection = "reused"
+
+    async def on_connection_create_start(_session: aiohttp.ClientSession, context: SimpleNamespace, _params):
+        context.connection = "new"
+
+    async def on_request_end(_session: aiohttp.ClientSession, context: SimpleNamespace, _params):
+        METRICS.histogram("claire_ttfb_ms", TTFB_MS_BUCKETS, tenant=tenant_id, connection=context.connection).observe(
+            (time.perf_counter() - context.start) * 1000
+        )
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class ClaireTenant:
+    """
+    State of a single organization served by this process.
+    
+    Every tenant owns an isolated connection pool to the Claire API, limited to
+    the configured number of concurrent connections, and its own caches.
+    
+    Attributes:
+        tenant_id: Identifier of the tenant.
+        settings: Claire settings of the tenant.
+        cache: Cache for Claire responses of the tenant.
+        session_batcher: Micro-batcher for session creations of the tenant.
+        session_owners: Bounded index of the external user IDs owning sessions, by session ID.
+        idempotency: Store of the responses to requests with an Idempotency-Key header.
+        failed_sessions: Bounded negative cache of the status code and message of failed session
+                         lookups, by external user ID and session ID.
+        unknown_bots: Bounded negative cache of the IDs of bots that were missing from a refetched
+                      bot catalogue.
+        catalogue_fetch: Fetch of the bot catalogue in progress, shared by all requests waiting
+                         for the catalogue, or None.
+    """
+
+    def __init__(self, tenant_id: str, settings: ClaireSettings):
+        """
+        Initialize the tenant state.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+            settings: Claire settings of the tenant.
+        """
+        self.tenant_id = tenant_id
+        self.settings = settings
+        self.cache: TTLCache[str, object] = TTLCache(max_size=128, ttl_seconds=settings.cache_ttl_seconds)
+        # The owner of a session never changes, so entries only leave the index when it is full.
+        self.session_owners: TTLCache[UUID, str] = TTLCache(
+            max_size=settings.ownership_index_size, ttl_seconds=math.inf
+        )
+        self.idempotency = IdempotencyStore(settings.idempotency_store_size, settings.idempotency_ttl_seconds)
+        self.failed_sessions: TTLCache[tuple[str, UUID], tuple[int, str]] = TTLCache(
+            max_size=settings.negative_cache_size, ttl_seconds=settings.negative_cache_ttl_seconds
+        )
+        self.unknown_bots: TTLCache[UUID, bool] = TTLCache(
+            max_size=settings.negative_cache_size, ttl_seconds=settings.negative_cache_ttl_seconds
+        )
+        self.session_batcher = SessionCreateBatcher(
+            tenant_id,
+            window_seconds=settings.session_batch_window_ms / 1000,
+            max_batch_size=settings.session_batch_max_size,
+            max_concurrency=settings.session_batch_concurrency,
+        )
+        self.catalogue_fetch: asyncio.Task | None = None
+        self._client: aiohttp.ClientSession | None = None
+        self._calls_in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def client(self) -> aiohttp.ClientSession:
+        """
+        Connection pool of the tenant.
+        
+        The aiohttp ClientSession is created lazily, as it must be created inside
+        the running event loop.
+        
+        Returns:
+            aiohttp.ClientSession: Client session configured for the Claire API of the tenant.
+        """
+        if self._client is None:
+            self._client = aiohttp.ClientSession(
+                base_url=str(self.settings.base_url),
+                headers={
+                    "Authorization": f"Bearer {self.settings.api_key}",
+                },
+                connector=aiohttp.TCPConnector(limit=self.settings.max_connections),
+                trace_configs=[_ttfb_trace_config(self.tenant_id)],
+            )
+        return self._client
+
+    @contextmanager
+    def upstream_call(self) -> Iterator[None]:
+        """
+        Count a Claire API call as in flight for the duration of the context.
+        
+        Yields:
+            None
+        """
+        self._calls_in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._calls_in_flight -= 1
+            if self._calls_in_flight == 0:
+                self._idle.set()
+
+    async def warm_up(self):
+        """
+        Open the configured number of connections to the Claire API.
+        
+        The connections are opened concurrently by HEAD requests to the base URL
+        and kept in the pool, so that the first requests do not pay for DNS
+        resolution and TLS handshakes. Failures are logged and otherwise ignored.
+        """
+        count = min(self.settings.warm_connections, self.settings.max_connections)
+        if count <= 0:
+            return
+
+        async def open_connection():
+            async with self.client.head(
+                    "/",
+                    allow_redirects=False,
+                    timeout=aiohttp.ClientTimeout(total=self.settings.timeout_seconds),
+            ) as resp:
+                await resp.read()
+
+        results = await asyncio.gather(*(open_connection() for _ in range(count)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            logger.warning(
+                "Could not open all warm connections to the Claire API.",
+                extra={"tenant_id": self.tenant_id, "failed": len(errors), "error": repr(errors[0])},
+            )
+        logger.info("Warmed up connections.", extra={"tenant_id": self.tenant_id, "connections": count - len(errors)})
+
+    def update(self, settings: ClaireSettings):
+        """
+        Apply reloaded settings that do not require a new connection pool.
+        
+        Args:
+            settings: Reloaded Claire settings with the same connection key.
+        """
+        self.settings = settings
+        self.cache.ttl_seconds = settings.cache_ttl_seconds
+        self.session_owners.max_size = settings.ownership_index_size
+        self.idempotency.configure(settings.idempotency_store_size, settings.idempotency_ttl_seconds)
+        self.failed_sessions.max_size = settings.negative_cache_size
+        self.failed_sessions.ttl_seconds = settings.negative_cache_ttl_seconds
+        self.unknown_bots.max_size = settings.negative_cache_size
+        self.unknown_bots.ttl_seconds = settings.negative_cache_ttl_seconds
+        self.session_batcher.configure(
+            window_seconds=settings.session_batch_window_ms / 1000,
+            max_batch_size=settings.session_batch_max_size,
+            max_concurrency=settings.session_batch_concurrency,
+        )
+
+    async def close(self, timeout_seconds: float = 0.0):
+        """
+        Close the connection pool of the tenant after sending pending session creations.
+        
+        Args:
+            timeout_seconds: Maximum time in seconds to wait for in-flight Claire API calls
+                             before the connection pool is closed.
+        """
+        await self.session_batcher.close()
+        if self._calls_in_flight and timeout_seconds > 0:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Closing connection pool with Claire API calls in flight.",
+                    extra={"tenant_id": self.tenant_id, "calls": self._calls_in_flight},
+                )
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class _TenantTable(NamedTuple):
+    """
+    Immutable snapshot of the tenant configuration.
+    
+    Attributes:
+        tenancy: Tenant routing settings.
+        tenants: Tenants by tenant ID.
+        hosts: Tenants by lower-cased host name.
+        default: Tenant serving requests without a resolved tenant.
+    """
+    tenancy: TenancySettings
+    tenants: dict[str, ClaireTenant]
+    hosts: dict[str, ClaireTenant]
+    default: ClaireTenant | None
+
+
+class TenantRegistry:
+    """
+    Registry of all tenants served by this process.
+    
+    Tenant lookups are O(1) dictionary lookups on an immutable snapshot, which is
+    replaced atomically when the configuration is reloaded.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._table = _TenantTable(tenancy=TenancySettings(), tenants={}, hosts={}, default=None)
+        self._retired: set[ClaireTenant] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def tenancy(self) -> TenancySettings:
+        """
+        Tenant routing settings of the current configuration.
+        
+        Returns:
+            TenancySettings: The tenant routing settings.
+        """
+        return self._table.tenancy
+
+    def load(self, settings: OrganizationServerSettings):
+        """
+        Load or reload the tenant configuration.
+        
+        Tenants whose connection settings did not change keep their connection pool
+        and caches. Tenants that were removed or whose credentials, base URL or
+        connection limit changed are closed once their in-flight Claire API calls
+        completed, so that requests still using them can complete. On reloads, the connection pools of new
+        tenants are warmed up in the background.
+        
+        Args:
+            settings: Application settings containing the tenant configuration.
+        """
+        configured = dict(settings.tenancy.tenants)
+        if settings.claire is not None:
+            configured[DEFAULT_TENANT_ID] = settings.claire
+
+        current = self._table.tenants
+        tenants: dict[str, ClaireTenant] = {}
+        created: list[ClaireTenant] = []
+        for tenant_id, claire_settings in configured.items():
+            tenant = current.get(tenant_id)
+            if tenant is not None and tenant.settings.connection_key() == claire_settings.connection_key():
+                tenant.update(claire_settings)
+            else:
+                tenant = ClaireTenant(tenant_id, claire_settings)
+                created.append(tenant)
+            tenants[tenant_id] = tenant
+
+        hosts = {
+            host.lower(): tenant
+            for tenant in tenants.values()
+            for host in tenant.settings.hosts
+        }
+        retired = [tenant for tenant_id, tenant in current.items() if tenants.get(tenant_id) is not tenant]
+
+        self._table = _TenantTable(
+            tenancy=settings.tenancy,
+            tenants=tenants,
+            hosts=hosts,
+            default=tenants.get(DEFAULT_TENANT_ID),
+        )
+        logger.info("Loaded %d tenant(s), retired %d.", len(tenants), len(retired))
+
+        if retired:
+            self._retired.update(retired)
+            self._spawn(self._close_later(retired))
+        if current and created:
+            self._spawn(self.warm_up(settings.lifecycle.warm_up_timeout_seconds, created))
+
+    def get(self, tenant_id: str) -> ClaireTenant | None:
+        """
+        Look up a tenant by its ID.
+        
+        Args:
+            tenant_id: Identifier of the tenant.
+        
+        Returns:
+            ClaireTenant | None: The tenant, or None if it is not configured.
+        """
+        return self._table.tenants.get(tenant_id)
+
+    def get_by_host(self, host: str) -> ClaireTenant | None:
+        """
+        Look up a tenant by a host name.
+        
+        Args:
+            host: Host name of the request.
+        
+        Returns:
+            ClaireTenant | None: The tenant, or None if no tenant serves the host.
+        """
+        return self._table.hosts.get(host.lower())
+
+    def get_default(self) -> ClaireTenant | None:
+        """
+        Get the tenant serving requests without a resolved tenant.
+        
+        Returns:
+            ClaireTenant | None: The default tenant, or None if it is not configured.
+        """
+        return self._table.default
+
+    async def warm_up(self, timeout_seconds: float, tenants: list[ClaireTenant] | None = None):
+        """
+        Open warm connections to the Claire API for tenants.
+        
+        Args:
+            timeout_seconds: Maximum time in seconds to wait for the connections.
+            tenants: Tenants to warm up, or None for all configured tenants.
+        """
+        if tenants is None:
+            tenants = list(self._table.tenants.values())
+        try:
+            await asyncio.wait_for(asyncio.gather(*(tenant.warm_up() for tenant in tenants)), timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Warming up connections to the Claire API timed out.")
+
+    async def close(self, timeout_seconds: float = 0.0):
+        """
+        Close the connection pools of all tenants.
+        
+        Args:
+            timeout_seconds: Maximum time in seconds to wait for in-flight Claire API calls.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        tenants = [*self._table.tenants.values(), *self._retired]
+        self._table = _TenantTable(tenancy=self._table.tenancy, tenants={}, hosts={}, default=None)
+        self._retired.clear()
+        await asyncio.gather(*(tenant.close(timeout_seconds) for tenant in tenants))
+
+    def _spawn(self, coroutine: Coroutine):
+        """
+        Run a coroutine as a background task that is cancelled when the registry is closed.
+        
+        Args:
+            coroutine: The coroutine to run.
+        """
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _close_later(self, tenants: list[ClaireTenant]):
+        """
+        Close retired tenants once their in-flight Claire API calls completed.
+        
+        A call cannot take longer than the timeout of the tenant, so the wait is
+        bounded by the timeout plus a margin.
+        
+        Args:
+            tenants: Tenants that are no longer part of the configuration.
+        """
+        await asyncio.gather(*(
+            tenant.close(tenant.settings.timeout_seconds + RETIRED_TENANT_CLOSE_MARGIN_SECONDS) for tenant in tenants
+        ))
+        self._retired.difference_update(tenants)
+
+
+TENANT_REGISTRY = TenantRegistry()
@@ -5,11 +5,17 @@ This module defines the configuration classes for the organization server demo,
 including CORS, Auth0, and Claire settings using Pydantic settings.
 """
 
-from pydantic import field_validator, BaseModel
+import importlib.util
+import logging
+from typing import Self, Callable
+
+from pydantic import field_validator, BaseModel, model_validator, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from organization_server_demo.modules.claire.models.settings import ClaireSettings
 
+logger = logging.getLogger(__name__)
+
 
 class CORSSettings(BaseModel):
     """
@@ -52,6 +58,203 @@ class Auth0Settings(BaseModel):
     audience: str
 
 
+class TenancySettings(BaseModel):
+    """
+    Multi-organization (tenant) routing settings.
+    
+    If an Auth0 claim is configured, the tenant of a request is taken from the claim
+    only, and tokens without the claim are rejected. Otherwise the tenant is taken
+    from the host header if enabled. Requests without a resolved tenant are served
+    by the default organization configured in the ``claire`` settings.
+    
+    Attributes:
+        claim: Name of the Auth0 access token claim containing the tenant ID.
+        use_host_header: Whether to resolve the tenant from the host header. Only applies if no
+                         claim is configured.
+        tenants: Claire settings per tenant ID.
+    """
+    claim: str | None = None
+    use_host_header: bool = False
+    tenants: dict[str, ClaireSettings] = {}
+
+
+class ReloadSettings(BaseModel):
+    """
+    Settings for reloading the configuration without a restart.
+    
+    Attributes:
+        poll_interval_seconds: Interval in seconds for checking the environment files
+                               for modifications, or None to disable polling.
+        sighup: Whether to reload the configuration when receiving SIGHUP.
+    """
+    poll_interval_seconds: float | None = None
+    sighup: bool = True
+
+
+class AdminSettings(BaseModel):
+    """
+    Settings for the administrative endpoints.
+    
+    Attributes:
+        api_key: API key required in the X-Admin-Key header, or None to disable the
+                 administrative endpoints.
+    """
+    api_key: str | None = None
+
+
+class ProfilingSettings(BaseModel):
+    """
+    Request profiling settings.
+    
+    Attributes:
+        enabled: Whether to record timing spans for every request.
+        slow_request_threshold_ms: Duration in milliseconds above which the timing
+                                   breakdown of a request is kept.
+        slow_request_buffer_size: Number of slow requests kept in the ring buffer.
+        cprofile_dir: Directory for cProfile dumps of requests sent with the
+                      X-Profile header by an administrator, or None to disable them.
+    """
+    enabled: bool = False
+    slow_request_threshold_ms: float = 1000.0
+    slow_request_buffer_size: int = 100
+    cprofile_dir: str | None = None
+
+
+class LoggingSettings(BaseModel):
+    """
+    Structured logging settings.
+    
+    Attributes:
+        level: Log level of the application loggers.
+        queue_size: Maximum number of log records waiting to be written. Further
+                    records are dropped instead of blocking the event loop.
+        access_log: Whether to write an access log record for every request.
+        access_sample_rate: Fraction of successful requests written to the access log.
+        max_field_length: Maximum length of a log field, such as an upstream error body.
+        error_burst: Number of identical warnings or errors logged per window.
+        error_window_seconds: Length of the rate limiting window in seconds.
+    """
+    level: str = "INFO"
+    queue_size: int = 10000
+    access_log: bool = True
+    access_sample_rate: float = 1.0
+    max_field_length: int = 2048
+    error_burst: int = 10
+    error_window_seconds: float = 60.0
+
+
+def _installed_encodings() -> list[str]:
+    """
+    Get the content encodings whose codecs are installed, most preferred first.
+    
+    Returns:
+        list[str]: zstd and br if the zstandard and brotli packages are installed, followed by gzip.
+    """
+    codecs = (("zstd", "zstandard"), ("br", "brotli"))
+    return [encoding for encoding, module in codecs if importlib.util.find_spec(module) is not None] + ["gzip"]
+
+
+class CompressionSettings(BaseModel):
+    """
+    Response compression settings.
+    
+    Attributes:
+        enabled: Whether to compress responses for clients accepting a supported encoding.
+        minimum_size: Minimum body size in bytes for a response to be compressed.
+        encodings: Offered content encodings, most preferred first. Brotli (br) and
+                   zstd require the optional brotli and zstandard packages of the
+                   compression extra. Defaults to the encodings whose codecs are installed.
+        gzip_level: Compression level of gzip, from 1 to 9.
+        brotli_quality: Compression quality of brotli, from 0 to 11.
+        zstd_level: Compression level of zstd, from 1 to 22.
+    """
+    enabled: bool = True
+    minimum_size: int = 1024
+    encodings: list[str] = Field(default_factory=_installed_encodings)
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    zstd_level: int = 3
+
+
+class CaptureSettings(BaseModel):
+    """
+    Traffic capture settings.
+    
+    Attributes:
+        enabled: Whether to capture anonymized requests and Claire API responses.
+        path: Path of the gzip-compressed capture file, overwritten when a capture starts.
+        sample_rate: Fraction of users whose requests are captured.
+        max_records: Maximum number of captured requests, or None for no limit.
+        queue_size: Maximum number of records waiting to be written. Further records
+                    are dropped instead of blocking requests.
+    """
+    enabled: bool = False
+    path: str = "captures/traffic.jsonl.gz"
+    sample_rate: float = 1.0
+    max_records: int | None = 100_000
+    queue_size: int = 10000
+
+
+class DeleteQueueSettings(BaseModel):
+    """
+    Asynchronous session deletion settings.
+    
+    Attributes:
+        enabled: Whether session deletions are queued in a local spool and acknowledged
+                 with 202 before the Claire API confirmed them.
+        path: Path of the SQLite spool of pending deletions.
+        workers: Maximum number of concurrent deletion calls to the Claire API.
+        max_attempts: Number of attempts after which a deletion is given up.
+        retry_base_seconds: Delay in seconds before the first retry, doubled for every further retry.
+        retry_max_seconds: Maximum delay in seconds between two attempts.
+        poll_interval_seconds: Interval in seconds for checking the spool for due retries.
+    """
+    enabled: bool = False
+    path: str = "spool/deletes.sqlite3"
+    workers: int = 4
+    max_attempts: int = 8
+    retry_base_seconds: float = 1.0
+    retry_max_seconds: float = 300.0
+    poll_interval_seconds: float = 1.0
+
+
+class SessionIndexSettings(BaseModel):
+    """
+    Local session index settings.
+    
+    Attributes:
+        enabled: Whether sessions are indexed locally and searchable.
+        path: Path of the SQLite session index.
+        reconcile_interval_seconds: Time in seconds after which the sessions of a searching
+                                    user are reconciled with the Claire API again.
+        reconcile_max_pages: Maximum number of session pages listed per reconciliation.
+                             Sessions are only removed from the index after a complete listing.
+        reconcile_concurrency: Maximum number of concurrent reconciliations.
+    """
+    enabled: bool = False
+    path: str = "index/sessions.sqlite3"
+    reconcile_interval_seconds: float = 3600.0
+    reconcile_max_pages: int = 50
+    reconcile_concurrency: int = 4
+
+
+class LifecycleSettings(BaseModel):
+    """
+    Startup and shutdown settings.
+    
+    Attributes:
+        warm_up_timeout_seconds: Maximum time in seconds the startup waits for connections to the
+                                 Claire API to be opened before reporting ready anyway.
+        drain_delay_seconds: Time in seconds between SIGTERM and the server stopping to accept
+                             connections, during which it reports not ready but still serves requests.
+        drain_timeout_seconds: Maximum time in seconds the shutdown waits for in-flight requests and
+                               Claire API calls before closing the connection pools.
+    """
+    warm_up_timeout_seconds: float = 10.0
+    drain_delay_seconds: float = 0.0
+    drain_timeout_seconds: float = 25.0
+
+
 class OrganizationServerSettings(BaseSettings):
     """
     Main application settings container.
@@ -61,12 +264,47 @@ class OrganizationServerSettings(BaseSettings):
     
     Attributes:
         auth0: Auth0 authentication settings.
-        claire: Claire communication settings.
+        claire: Claire communication settings of the default organization.
         cors: CORS middleware settings.
+        tenancy: Multi-organization routing settings.
+        reload: Configuration reload settings.
+        admin: Administrative endpoint settings.
+        profiling: Request profiling settings.
+        logging: Structured logging settings.
+        compression: Response compression settings.
+        capture: Traffic capture settings.
+        delete_queue: Asynchronous session deletion settings.
+        session_index: Local session index settings.
+        lifecycle: Startup and shutdown settings.
     """
     auth0: Auth0Settings
-    claire: ClaireSettings
+    claire: ClaireSettings | None = None
     cors: CORSSettings
+    tenancy: TenancySettings = TenancySettings()
+    reload: ReloadSettings = ReloadSettings()
+    admin: AdminSettings = AdminSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    logging: LoggingSettings = LoggingSettings()
+    compression: CompressionSettings = CompressionSettings()
+    capture: CaptureSettings = CaptureSettings()
+    delete_queue: DeleteQueueSettings = DeleteQueueSettings()
+    session_index: SessionIndexSettings = SessionIndexSettings()
+    lifecycle: LifecycleSettings = LifecycleSettings()
+
+    @model_validator(mode="after")
+    def validate_organizations(self) -> Self:
+        """
+        Validate that at least one organization is configured.
+        
+        Returns:
+            The validated settings.
+        
+        Raises:
+            ValueError: If neither a default organization nor tenants are configured.
+        """
+        if self.claire is None and not self.tenancy.tenants:
+            raise ValueError("Either claire or tenancy.tenants must be configured")
+        return self
 
     model_config = SettingsConfigDict(
         env_file=[
@@ -78,4 +316,72 @@ class OrganizationServerSettings(BaseSettings):
     )
 
 
-SHARED_SETTINGS = OrganizationServerSettings()
+class SettingsStore:
+    """
+    Holder of the current application settings.
+    
+    The settings object is never modified. A reload validates a complete new
+    settings object and swaps it in atomically, so readers always see a consistent
+    configuration. Listeners are notified after every swap.
+    """
+
+    def __init__(self, settings: OrganizationServerSettings):
+        """
+        Initialize the store with the initial settings.
+        
+        Args:
+            settings: The initial application settings.
+        """
+        self._current = settings
+        self._listeners: list[Callable[[OrganizationServerSettings], None]] = []
+
+    @property
+    def current(self) -> OrganizationServerSettings:
+        """
+        The current application settings.
+        
+        Returns:
+            OrganizationServerSettings: The current settings.
+        """
+        return self._current
+
+    def subscribe(self, listener: Callable[[OrganizationServerSettings], None]):
+        """
+        Register a listener that is called with the new settings after each reload.
+        
+        Args:
+            listener: Callable receiving the new settings.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[OrganizationServerSettings], None]):
+        """
+        Remove a previously registered listener.
+        
+        Args:
+            listener: The registered listener.
+        """
+        self._listeners.remove(listener)
+
+    def swap(self, settings: OrganizationServerSettings):
+        """
+        Swap in newly loaded and validated settings.
+        
+        A failing listener is logged and does not keep the remaining listeners
+        from applying the new settings.
+        
+        Args:
+            settings: The new application settings.
+        """
+        if settings.auth0 != self._current.auth0:
+            logger.warning("Auth0 settings changed, a restart is required to apply them.")
+
+        self._current = settings
+        for listener in list(self._listeners):
+            try:
+                listener(settings)
+            except Exception:
+                logger.exception("Settings listener failed.", extra={"listener": repr(listener)})
+
+
+SETTINGS_STORE = SettingsStore(OrganizationServerSettings())
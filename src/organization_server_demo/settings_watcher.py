@@ -0,0 +1,132 @@
+"""
+Settings watcher for reloading the configuration without a restart.
+
+This module watches the environment files for modifications and listens for
+SIGHUP, and swaps newly validated settings into the settings store.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+
+from pydantic import ValidationError
+
+from organization_server_demo.settings import SettingsStore, OrganizationServerSettings
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsWatcher:
+    """
+    Watcher reloading the application settings on modification or SIGHUP.
+    
+    Settings are loaded in a worker thread and validated before they are swapped in.
+    Invalid settings are rejected and the current settings are kept.
+    """
+
+    def __init__(self, store: SettingsStore):
+        """
+        Initialize the watcher.
+        
+        Args:
+            store: Settings store to swap reloaded settings into.
+        """
+        self._store = store
+        self._env_files = [str(path) for path in OrganizationServerSettings.model_config["env_file"]]
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        self._sighup_installed = False
+
+    def start(self):
+        """
+        Start polling the environment files and listening for SIGHUP as configured.
+        """
+        reload_settings = self._store.current.reload
+
+        if reload_settings.sighup and hasattr(signal, "SIGHUP"):
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self._on_sighup)
+                self._sighup_installed = True
+            except (RuntimeError, NotImplementedError) as e:
+                # Signal handlers can only be installed by the main thread of the event loop.
+                logger.warning("Could not listen for SIGHUP: %s", e)
+
+        if reload_settings.poll_interval_seconds:
+            self._spawn(self._poll(reload_settings.poll_interval_seconds))
+
+    async def stop(self):
+        """
+        Stop watching for modifications.
+        """
+        if self._sighup_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._sighup_installed = False
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def reload(self) -> bool:
+        """
+        Load, validate and swap in the settings.
+        
+        Returns:
+            bool: True if new settings were swapped in.
+        """
+        async with self._lock:
+            try:
+                settings = await asyncio.to_thread(OrganizationServerSettings)
+            except ValidationError as e:
+                logger.error("Rejected invalid settings, keeping the current settings: %s", e)
+                return False
+            self._store.swap(settings)
+        logger.info("Settings reloaded.")
+        return True
+
+    def _on_sighup(self):
+        """
+        Handle SIGHUP by reloading the settings.
+        """
+        logger.info("Received SIGHUP, reloading settings.")
+        self._spawn(self.reload())
+
+    async def _poll(self, interval_seconds: float):
+        """
+        Reload the settings whenever an environment file was modified.
+        
+        Args:
+            interval_seconds: Interval in seconds between two checks.
+        """
+        modification_times = self._modification_times()
+        while True:
+            await asyncio.sleep(interval_seconds)
+            current_modification_times = self._modification_times()
+            if current_modification_times != modification_times:
+                modification_times = current_modification_times
+                await self.reload()
+
+    def _modification_times(self) -> tuple[int | None, ...]:
+        """
+        Get the modification times of the environment files.
+        
+        Returns:
+            tuple[int | None, ...]: Modification time in nanoseconds per file, None for missing files.
+        """
+        modification_times = []
+        for path in self._env_files:
+            try:
+                modification_times.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                modification_times.append(None)
+        return tuple(modification_times)
+
+    def _spawn(self, coroutine):
+        """
+        Run a coroutine as a background task that is cancelled on stop.
+        
+        Args:
+            coroutine: The coroutine to run.
+        """
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,180 @@
+"""
+Shared fixtures of the organization server tests.
+
+The application runs in-process against the fake Claire API of the benchmarks,
+which is served by a background thread on a free local port for every test.
+Auth0 is bypassed like in the benchmarks: the JWKS download is answered locally,
+and the authenticated user and any additional token claims are taken from request
+headers.
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from fake_claire import FakeClaire  # noqa: E402
+from harness import USER_HEADER, configure_environment  # noqa: E402
+
+# Replaced by the URL of the fake Claire API of each test.
+configure_environment("http://127.0.0.1:9")
+
+from fastapi import Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from organization_server_demo.app import app  # noqa: E402
+from organization_server_demo.modules.base.authenticated_user_provider import verify_user, \
+    OrganizationUser  # noqa: E402
+from organization_server_demo.settings import SETTINGS_STORE, OrganizationServerSettings  # noqa: E402
+from tests.helpers import CLAIMS_HEADER  # noqa: E402
+
+
+async def _header_user(request: Request) -> OrganizationUser:
+    claims = json.loads(request.headers.get(CLAIMS_HEADER, "{}"))
+    return OrganizationUser(sub=request.headers.get(USER_HEADER, "user-1"), **claims)
+
+
+app.dependency_overrides[verify_user] = _header_user
+
+
+class FakeClaireServer:
+    """
+    Fake Claire API served by a background thread.
+    
+    Attributes:
+        fake: The fake API.
+        url: Base URL of the fake API.
+    """
+
+    def __init__(self, fake: FakeClaire):
+        """
+        Start serving the fake API on a free port.
+        
+        Args:
+            fake: The fake API.
+        """
+        self.fake = fake
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._runner = web.AppRunner(fake.app(), access_log=None)
+        self._call(self._runner.setup())
+        self._call(web.TCPSite(self._runner, "127.0.0.1", 0).start())
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    def _call(self, coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self):
+        """
+        Stop serving the fake API.
+        """
+        self._call(self._runner.cleanup())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _merge(values: dict, updates: dict) -> dict:
+    merged = dict(values)
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+@pytest.fixture
+def claire_factory() -> Callable[..., FakeClaireServer]:
+    """
+    Start fake Claire APIs, which are stopped after the test.
+    
+    Returns:
+        Callable[..., FakeClaireServer]: Function starting a fake API, given the FakeClaire arguments.
+    """
+    servers = []
+
+    def start(**kwargs: Any) -> FakeClaireServer:
+        server = FakeClaireServer(FakeClaire(**{"bots": 3, "page_size": 5, **kwargs}))
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def claire(claire_factory) -> FakeClaireServer:
+    """
+    Fake Claire API of the default organization.
+    
+    Returns:
+        FakeClaireServer: The running fake API.
+    """
+    return claire_factory()
+
+
+@pytest.fixture
+def settings_factory(claire, tmp_path) -> Callable[..., OrganizationServerSettings]:
+    """
+    Build application settings for the fake Claire API with local state in a temporary directory.
+    
+    Returns:
+        Callable[..., OrganizationServerSettings]: Function building the settings, given updates of
+                                                   settings sections as nested dictionaries.
+    """
+    def build(**updates: Any) -> OrganizationServerSettings:
+        values = SETTINGS_STORE.current.model_dump()
+        values = _merge(values, {
+            "claire": {"api_key": "test", "base_url": claire.url, "warm_connections": 0},
+            "delete_queue": {"path": str(tmp_path / "spool" / "deletes.sqlite3")},
+            "session_index": {"path": str(tmp_path / "index" / "sessions.sqlite3")},
+            "capture": {"path": str(tmp_path / "captures" / "traffic.jsonl.gz")},
+            "reload": {"sighup": False, "poll_interval_seconds": None},
+        })
+        return OrganizationServerSettings.model_validate(_merge(values, updates))
+
+    return build
+
+
+@pytest.fixture
+def make_client(settings_factory) -> Callable[..., TestClient]:
+    """
+    Create test clients of the application with custom settings.
+    
+    The application starts when the client is entered as a context manager and
+    shuts down when it is left, so a test can restart it with the same state
+    directory.
+    
+    Returns:
+        Callable[..., TestClient]: Function creating a client, given updates of settings sections.
+    """
+    original = SETTINGS_STORE.current
+
+    def make(**updates: Any) -> TestClient:
+        SETTINGS_STORE.swap(settings_factory(**updates))
+        return TestClient(app)
+
+    yield make
+    SETTINGS_STORE.swap(original)
+
+
+@pytest.fixture
+def client(make_client) -> TestClient:
+    """
+    Started test client of the application with the default settings.
+    
+    Returns:
+        TestClient: The client.
+    """
+    with make_client() as started:
+        yield started
@@ -0,0 +1,31 @@
+"""
+Helpers shared by the organization server tests.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from harness import USER_HEADER  # noqa: E402
+
+CLAIMS_HEADER = "X-Test-Claims"
+
+
+def as_user(user_id: str, **claims: Any) -> dict[str, str]:
+    """
+    Build the headers authenticating a request as a user.
+    
+    Args:
+        user_id: External user ID of the user.
+        **claims: Additional claims of the access token.
+    
+    Returns:
+        dict[str, str]: The request headers.
+    """
+    headers = {USER_HEADER: user_id}
+    if claims:
+        headers[CLAIMS_HEADER] = json.dumps(claims)
+    return headers
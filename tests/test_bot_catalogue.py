@@ -0,0 +1,46 @@
+"""
+Tests of the sharing of bot catalogue fetches.
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.helpers import as_user
+
+BOTS_CALL = ("GET", "/m2m/organizations/bots")
+
+
+@pytest.fixture
+def claire(claire_factory):
+    """Fake Claire API answering slowly enough for concurrent requests to overlap."""
+    return claire_factory(latency_seconds=0.2)
+
+
+def test_concurrent_requests_share_one_fetch(client, claire):
+    """Concurrent requests on a cold catalogue cache call the Claire API once."""
+    def get_bots(user_id: str) -> int:
+        return client.get("/bots", headers=as_user(user_id)).status_code
+
+    with ThreadPoolExecutor(8) as executor:
+        statuses = list(executor.map(get_bots, [f"user-{i}" for i in range(8)]))
+
+    assert statuses == [200] * 8
+    assert claire.fake.calls.count(BOTS_CALL) == 1
+
+
+def test_concurrent_refetches_share_one_fetch(client, claire):
+    """Concurrent session creations for a bot missing from the cached catalogue refetch it once."""
+    assert client.get("/bots", headers=as_user("alice")).status_code == 200
+    added = f"bot-{uuid.UUID(int=4)}"
+    claire.fake.bots.append({"name": "Bot 4", "bot_id": added, "meta": {}})
+
+    def create(user_id: str) -> int:
+        return client.post("/session", params={"bot_id": added}, headers=as_user(user_id)).status_code
+
+    with ThreadPoolExecutor(8) as executor:
+        statuses = list(executor.map(create, [f"user-{i}" for i in range(8)]))
+
+    assert statuses == [200] * 8
+    assert claire.fake.calls.count(BOTS_CALL) == 2
@@ -0,0 +1,97 @@
+"""
+Tests of the response compression.
+"""
+
+import logging
+
+import pytest
+
+from organization_server_demo.modules.base import compression
+from organization_server_demo.modules.base.compression import HAS_BROTLI, HAS_ZSTD, available_encodings, \
+    negotiate_encoding, warn_unavailable_encodings
+from organization_server_demo.settings import CompressionSettings
+from tests.helpers import as_user
+
+
+@pytest.fixture
+def claire(claire_factory):
+    """
+    Fake Claire API with enough bots for the bot list to exceed the minimum compressed size.
+    """
+    return claire_factory(bots=50)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encodings, expected",
+    [
+        (None, ["gzip"], None),
+        ("identity", ["gzip"], None),
+        ("gzip", ["gzip"], "gzip"),
+        ("gzip;q=0", ["gzip"], None),
+        ("*", ["gzip"], "gzip"),
+        ("gzip;q=0.5, deflate", ["gzip"], "gzip"),
+        ("compress", ["gzip"], None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, encodings, expected):
+    assert negotiate_encoding(accept_encoding, encodings) == expected
+
+
+@pytest.mark.skipif(not HAS_BROTLI or not HAS_ZSTD, reason="brotli and zstandard are not installed")
+def test_negotiate_encoding_prefers_quality_then_configured_order():
+    assert negotiate_encoding("gzip, br, zstd", ["zstd", "br", "gzip"]) == "zstd"
+    assert negotiate_encoding("gzip, br, zstd", ["br", "zstd", "gzip"]) == "br"
+    assert negotiate_encoding("gzip, br;q=0.5", ["br", "gzip"]) == "gzip"
+
+
+def test_large_responses_are_compressed(client):
+    """Responses above the minimum size are compressed with the negotiated encoding."""
+    plain = client.get("/bots", headers={**as_user("alice"), "Accept-Encoding": "identity"})
+    compressed = client.get("/bots", headers={**as_user("alice"), "Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    assert compressed.json() == plain.json()
+    assert "accept-encoding" in compressed.headers["vary"].lower()
+
+
+def test_small_responses_are_not_compressed(client):
+    """Responses below the minimum size are sent uncompressed."""
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+
+
+def test_compression_can_be_disabled(make_client):
+    """With compression disabled, responses are sent uncompressed."""
+    with make_client(compression={"enabled": False}) as client:
+        response = client.get("/bots", headers={**as_user("alice"), "Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+
+
+def test_unconfigured_encoding_is_not_used(make_client):
+    """Encodings missing from the configured encodings are never selected."""
+    with make_client(compression={"encodings": ["gzip"]}) as client:
+        response = client.get("/bots", headers={**as_user("alice"), "Accept-Encoding": "br, zstd"})
+
+    assert "content-encoding" not in response.headers
+
+
+def test_default_encodings_are_installed_codecs():
+    """By default, exactly the encodings whose codecs are installed are offered."""
+    assert sorted(CompressionSettings().encodings) == sorted(available_encodings())
+    assert CompressionSettings().encodings[-1] == "gzip"
+
+
+def test_missing_codec_is_logged(settings_factory, monkeypatch, caplog):
+    """Configured encodings whose codec is not installed are reported."""
+    monkeypatch.setattr(compression, "HAS_ZSTD", False)
+    settings = settings_factory(compression={"encodings": ["zstd", "gzip"]})
+
+    with caplog.at_level(logging.WARNING, logger=compression.__name__):
+        warn_unavailable_encodings(settings)
+
+    (record,) = caplog.records
+    assert record.encodings == ["zstd"]
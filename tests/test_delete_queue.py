@@ -0,0 +1,152 @@
+"""
+Tests of the durable session deletion queue.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from organization_server_demo.modules.base.metrics import METRICS
+from organization_server_demo.modules.claire.services.delete_queue import DeleteQueue
+from organization_server_demo.settings import DeleteQueueSettings
+from tests.helpers import as_user
+
+
+class StubDelete:
+    """
+    Deletion function recording its calls and failing a given number of times.
+    """
+
+    def __init__(self, failures: int = 0, block: bool = False):
+        self.failures = failures
+        self.block = block
+        self.calls: list[tuple[str, str]] = []
+
+    async def __call__(self, tenant_id: str, session_id: str):
+        self.calls.append((tenant_id, session_id))
+        if self.block:
+            await asyncio.Event().wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Claire API unavailable")
+
+
+@pytest.fixture
+def settings(tmp_path) -> DeleteQueueSettings:
+    return DeleteQueueSettings(
+        enabled=True,
+        path=str(tmp_path / "deletes.sqlite3"),
+        max_attempts=3,
+        retry_base_seconds=0.01,
+        retry_max_seconds=0.01,
+        poll_interval_seconds=0.01,
+    )
+
+
+async def _until(condition, timeout_seconds: float = 5.0):
+    deadline = time.monotonic() + timeout_seconds
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def _failed(tenant_id: str) -> float:
+    return METRICS.gauge("delete_queue_failed", tenant=tenant_id).value
+
+
+@pytest.mark.asyncio
+async def test_failed_deletion_is_retried(settings):
+    """Failed deletions are retried until they succeed."""
+    queue, delete = DeleteQueue(), StubDelete(failures=2)
+    queue.start(settings, delete)
+
+    await queue.enqueue("retry", "session-1")
+    assert queue.pending("retry") == {"session-1"}
+    await _until(lambda: not queue.pending("retry"))
+
+    assert delete.calls == [("retry", "session-1")] * 3
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_given_up_deletion_stays_hidden_until_retried(settings):
+    """Deletions failing every attempt are kept as failed, counted, and sent again when retried."""
+    queue, delete = DeleteQueue(), StubDelete(failures=3)
+    queue.start(settings, delete)
+
+    await queue.enqueue("give-up", "session-1")
+    await _until(lambda: _failed("give-up") == 1)
+    await asyncio.sleep(0.05)
+
+    assert len(delete.calls) == 3
+    assert queue.pending("give-up") == {"session-1"}
+
+    assert await queue.retry_failed() == 1
+    await _until(lambda: not queue.pending("give-up"))
+    assert len(delete.calls) == 4
+    assert _failed("give-up") == 0
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_deletions_survive_restart(settings):
+    """Failed deletions are still hidden and counted after a restart, and not sent again."""
+    queue, delete = DeleteQueue(), StubDelete(failures=3)
+    queue.start(settings, delete)
+    await queue.enqueue("failed-restart", "session-1")
+    await _until(lambda: _failed("failed-restart") == 1)
+    await queue.close()
+    METRICS.gauge("delete_queue_failed", tenant="failed-restart").set(0)
+
+    restarted, delete = DeleteQueue(), StubDelete()
+    restarted.start(settings, delete)
+    await asyncio.sleep(0.05)
+
+    assert restarted.pending("failed-restart") == {"session-1"}
+    assert _failed("failed-restart") == 1
+    assert delete.calls == []
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_deletion_is_sent_after_restart(settings):
+    """Deletions cancelled on shutdown stay in the spool and are sent after the next start."""
+    queue, delete = DeleteQueue(), StubDelete(block=True)
+    queue.start(settings, delete)
+    await queue.enqueue("restart", "session-1")
+    await _until(lambda: bool(delete.calls))
+    await queue.close(timeout_seconds=0.01)
+
+    restarted, delete = DeleteQueue(), StubDelete()
+    restarted.start(settings.model_copy(update={"enabled": False}), delete)
+    assert restarted.pending("restart") == {"session-1"}
+    await _until(lambda: not restarted.pending("restart"))
+
+    assert delete.calls == [("restart", "session-1")]
+    await restarted.close()
+
+
+def test_queued_deletion_is_hidden_from_listings(make_client, claire):
+    """Sessions are hidden from listings once their deletion is queued, and deleted in the background."""
+    with make_client(delete_queue={"enabled": True, "poll_interval_seconds": 0.01}) as client:
+        created = client.post("/session", params={"bot_id": claire.fake.bots[0]["bot_id"]}, headers=as_user("alice"))
+        session_id = created.json()["session"]["session_id"]
+
+        assert client.delete(f"/session/{session_id}", headers=as_user("alice")).status_code == 202
+        assert client.get("/session", headers=as_user("alice")).json()["results"] == []
+
+        deadline = time.monotonic() + 5
+        while session_id in claire.fake.sessions and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert session_id not in claire.fake.sessions
+
+
+def test_admin_retries_failed_deletions(make_client):
+    """Failed deletions are retried through the admin endpoint."""
+    with make_client(admin={"api_key": "admin"}) as client:
+        assert client.post("/admin/delete-queue/retry").status_code in (401, 403)
+        response = client.post("/admin/delete-queue/retry", headers={"X-Admin-Key": "admin"})
+
+    assert response.status_code == 200
+    assert response.json() == {"retried": 0}
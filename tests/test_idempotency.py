@@ -0,0 +1,76 @@
+"""
+Tests of the Idempotency-Key handling of session creations and renewals.
+"""
+
+import uuid
+
+from tests.helpers import as_user
+
+BOT_1 = f"bot-{uuid.UUID(int=1)}"
+BOT_2 = f"bot-{uuid.UUID(int=2)}"
+
+
+def _creations(claire) -> int:
+    return claire.fake.calls.count(("POST", "/m2m/client_sessions"))
+
+
+def test_retried_creation_returns_original_session(client, claire):
+    """Retries with the same key receive the original session, which is created only once."""
+    headers = {**as_user("alice"), "Idempotency-Key": "create-1"}
+
+    first = client.post("/session", params={"bot_id": BOT_1}, headers=headers)
+    retry = client.post("/session", params={"bot_id": BOT_1}, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert first.json() == retry.json()
+    assert _creations(claire) == 1
+
+
+def test_key_reused_with_different_bot_is_rejected(client, claire):
+    """A key cannot be reused for a request with different parameters."""
+    headers = {**as_user("alice"), "Idempotency-Key": "create-1"}
+
+    client.post("/session", params={"bot_id": BOT_1}, headers=headers)
+    reused = client.post("/session", params={"bot_id": BOT_2}, headers=headers)
+
+    assert reused.status_code == 422
+    assert _creations(claire) == 1
+
+
+def test_keys_are_scoped_to_users(client, claire):
+    """The same key sent by different users creates separate sessions."""
+    alice = client.post("/session", params={"bot_id": BOT_1}, headers={**as_user("alice"), "Idempotency-Key": "k"})
+    bob = client.post("/session", params={"bot_id": BOT_1}, headers={**as_user("bob"), "Idempotency-Key": "k"})
+
+    assert alice.json()["session"]["session_id"] != bob.json()["session"]["session_id"]
+    assert _creations(claire) == 2
+
+
+def test_retried_renewal_returns_original_token(client, claire):
+    """Retried renewals receive the token of the original renewal."""
+    created = client.post("/session", params={"bot_id": BOT_1}, headers=as_user("alice"))
+    session_id = created.json()["session"]["session_id"]
+    headers = {**as_user("alice"), "Idempotency-Key": "renew-1"}
+
+    first = client.post(f"/session/{session_id}/renew", headers=headers)
+    retry = client.post(f"/session/{session_id}/renew", headers=headers)
+
+    assert first.json()["token"] == retry.json()["token"]
+    assert claire.fake.calls.count(("POST", f"/m2m/client_sessions/{session_id}/renew")) == 1
+
+
+def test_key_reused_for_other_endpoint_is_rejected(client):
+    """A key used for a creation cannot be used for a renewal."""
+    headers = {**as_user("alice"), "Idempotency-Key": "k"}
+    created = client.post("/session", params={"bot_id": BOT_1}, headers=headers)
+    session_id = created.json()["session"]["session_id"]
+
+    assert client.post(f"/session/{session_id}/renew", headers=headers).status_code == 422
+
+
+def test_overlong_key_is_rejected(client, claire):
+    """Keys longer than the maximum length are rejected before calling the Claire API."""
+    headers = {**as_user("alice"), "Idempotency-Key": "k" * 256}
+
+    assert client.post("/session", params={"bot_id": BOT_1}, headers=headers).status_code == 400
+    assert _creations(claire) == 0
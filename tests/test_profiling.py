@@ -0,0 +1,28 @@
+"""
+Tests of the cProfile dumps of requests.
+"""
+
+import os
+
+from tests.helpers import as_user
+
+PROFILE_HEADERS = {**as_user("alice"), "X-Profile": "1", "X-Admin-Key": "admin"}
+
+
+def test_cprofile_dump_is_written(make_client, tmp_path):
+    """Requests sent with the X-Profile header by an administrator are dumped to the configured directory."""
+    dump_dir = tmp_path / "profiles"
+    with make_client(admin={"api_key": "admin"}, profiling={"cprofile_dir": str(dump_dir)}) as client:
+        assert client.get("/bots", headers=PROFILE_HEADERS).status_code == 200
+
+    dumps = os.listdir(dump_dir)
+    assert len(dumps) == 1
+    assert dumps[0].endswith("-GET-bots.prof")
+
+
+def test_failing_cprofile_dump_is_ignored(make_client, tmp_path):
+    """A dump that cannot be written does not fail the request."""
+    blocked = tmp_path / "blocked"
+    blocked.write_text("not a directory")
+    with make_client(admin={"api_key": "admin"}, profiling={"cprofile_dir": str(blocked)}) as client:
+        assert client.get("/bots", headers=PROFILE_HEADERS).status_code == 200
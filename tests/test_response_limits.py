@@ -0,0 +1,44 @@
+"""
+Tests of the size limits of Claire API responses.
+"""
+
+import pytest
+
+from tests.helpers import as_user
+
+
+@pytest.fixture
+def claire(claire_factory):
+    """
+    Fake Claire API whose bot list exceeds the small limits of the tests.
+    """
+    return claire_factory(bots=50)
+
+
+def test_oversized_response_is_rejected(make_client):
+    """Responses exceeding the maximum size of their endpoint are aborted with 502."""
+    with make_client(claire={"max_response_bytes": 512}) as client:
+        response = client.get("/bots", headers=as_user("alice"))
+
+    assert response.status_code == 502
+    assert response.json()["detail"]["message"] == "Claire API response too large."
+
+
+def test_endpoint_limit_overrides_default(make_client):
+    """Per-endpoint limits take precedence over the default limit."""
+    settings = {"claire": {"max_response_bytes": 512, "endpoint_max_response_bytes": {"get_bots": 1 << 20}}}
+    with make_client(**settings) as client:
+        bots = client.get("/bots", headers=as_user("alice"))
+        sessions = client.get("/session", headers=as_user("alice"))
+
+    assert bots.status_code == 200
+    assert sessions.status_code == 200
+
+
+def test_large_bodies_are_parsed_in_thread(make_client):
+    """Bodies parsed in a worker thread yield the same result."""
+    with make_client(claire={"parse_in_thread_bytes": 1}) as client:
+        response = client.get("/bots", headers=as_user("alice"))
+
+    assert response.status_code == 200
+    assert len(response.json()) == 50
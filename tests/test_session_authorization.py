@@ -0,0 +1,101 @@
+"""
+Tests of the ownership checks of session renewals and deletions.
+"""
+
+import uuid
+
+from tests.helpers import as_user
+
+
+def _add_session(claire, owner: str, bot_index: int = 1) -> str:
+    session_id = f"session-{uuid.uuid4()}"
+    claire.fake.sessions[session_id] = (owner, f"bot-{uuid.UUID(int=bot_index)}")
+    return session_id
+
+
+def _session_lookups(claire, session_id: str) -> int:
+    return claire.fake.calls.count(("GET", f"/m2m/client_sessions/{session_id}"))
+
+
+def _listings(claire) -> int:
+    return claire.fake.calls.count(("GET", "/m2m/client_sessions/"))
+
+
+def test_owner_renews_and_deletes_created_session(client, claire):
+    """The creator of a session is authorized from the ownership index without a lookup."""
+    created = client.post("/session", params={"bot_id": f"bot-{uuid.UUID(int=1)}"}, headers=as_user("alice"))
+    session_id = created.json()["session"]["session_id"]
+
+    assert client.post(f"/session/{session_id}/renew", headers=as_user("alice")).status_code == 200
+    assert client.delete(f"/session/{session_id}", headers=as_user("alice")).status_code == 200
+    assert session_id not in claire.fake.sessions
+    assert _session_lookups(claire, session_id) == 0
+
+
+def test_other_user_cannot_renew_or_delete(client, claire):
+    """Sessions of other users are reported as not found and left untouched."""
+    session_id = _add_session(claire, "alice")
+
+    renewed = client.post(f"/session/{session_id}/renew", headers=as_user("mallory"))
+    deleted = client.delete(f"/session/{session_id}", headers=as_user("mallory"))
+
+    assert renewed.status_code == 404
+    assert deleted.status_code == 404
+    assert session_id in claire.fake.sessions
+    assert ("POST", f"/m2m/client_sessions/{session_id}/renew") not in claire.fake.calls
+
+
+def test_owner_is_looked_up_once_on_cache_miss(client, claire):
+    """An unknown owner costs a single session lookup and no listings, and is remembered."""
+    session_id = _add_session(claire, "alice")
+
+    assert client.post(f"/session/{session_id}/renew", headers=as_user("alice")).status_code == 200
+    assert client.post(f"/session/{session_id}/renew", headers=as_user("alice")).status_code == 200
+
+    assert _session_lookups(claire, session_id) == 1
+    assert _listings(claire) == 0
+
+
+def test_owner_deletes_session_of_removed_bot(client, claire):
+    """Sessions of bots that are no longer available can still be deleted by their owner."""
+    session_id = _add_session(claire, "alice", bot_index=3)
+    claire.fake.bots = [bot for bot in claire.fake.bots if bot["bot_id"] != f"bot-{uuid.UUID(int=3)}"]
+
+    assert client.delete(f"/session/{session_id}", headers=as_user("alice")).status_code == 200
+    assert session_id not in claire.fake.sessions
+
+
+def test_missing_session_is_negatively_cached(client, claire):
+    """Repeated requests for a missing session are rejected without calling the Claire API again."""
+    session_id = f"session-{uuid.uuid4()}"
+
+    for _ in range(3):
+        assert client.post(f"/session/{session_id}/renew", headers=as_user("alice")).status_code == 404
+
+    assert _session_lookups(claire, session_id) == 1
+
+
+def test_negative_cache_is_per_user(client, claire):
+    """A failed lookup by one user does not reject the owner of the session."""
+    session_id = _add_session(claire, "alice")
+
+    assert client.post(f"/session/{session_id}/renew", headers=as_user("mallory")).status_code == 404
+    assert client.post(f"/session/{session_id}/renew", headers=as_user("alice")).status_code == 200
+
+
+def test_deleted_session_is_rejected_locally(client, claire):
+    """Renewals of a session deleted by the user are rejected from the negative cache."""
+    session_id = _add_session(claire, "alice")
+    assert client.delete(f"/session/{session_id}", headers=as_user("alice")).status_code == 200
+    calls = len(claire.fake.calls)
+
+    assert client.post(f"/session/{session_id}/renew", headers=as_user("alice")).status_code == 404
+    assert len(claire.fake.calls) == calls
+
+
+def test_invalid_session_id_is_not_found(client, claire):
+    """Malformed session IDs are rejected without calling the Claire API."""
+    calls = len(claire.fake.calls)
+
+    assert client.post("/session/not-a-session/renew", headers=as_user("alice")).status_code == 404
+    assert len(claire.fake.calls) == calls
@@ -0,0 +1,90 @@
+"""
+Tests of the micro-batching of session creations.
+"""
+
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from organization_server_demo.modules.base.exceptions import OrganizationServerException
+from organization_server_demo.modules.claire.models.sessions import ClientSessionResponse, SessionDto, \
+    SessionRequest, SessionRequestUser
+from organization_server_demo.modules.claire.services.session_batcher import SessionCreateBatcher
+from tests.helpers import as_user
+
+
+def _request(user_id: str) -> SessionRequest:
+    return SessionRequest(
+        user=SessionRequestUser(organization_user_id=user_id),
+        bot_id=f"bot-{uuid.UUID(int=1)}",
+        enabled_device_actions=[],
+    )
+
+
+def _response(user_id: str) -> ClientSessionResponse:
+    return ClientSessionResponse(
+        session=SessionDto(
+            organization_id=f"org-{uuid.UUID(int=1)}",
+            session_id=f"session-{uuid.uuid4()}",
+            editable="none",
+        ),
+        token=user_id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_every_caller_receives_its_own_response():
+    """Responses and errors of a batch are delivered to the caller that submitted the request."""
+    batcher = SessionCreateBatcher("test", window_seconds=0.01, max_batch_size=100, max_concurrency=2)
+    in_flight, peak = 0, 0
+
+    async def create(session_request: SessionRequest) -> ClientSessionResponse:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.005)
+        in_flight -= 1
+        user_id = session_request.user.organization_user_id
+        if user_id == "user-3":
+            raise OrganizationServerException(status_code=502, detail={"message": "Could not create chat session."})
+        return _response(user_id)
+
+    users = [f"user-{i}" for i in range(8)]
+    results = await asyncio.gather(*(batcher.submit(_request(user), create) for user in users), return_exceptions=True)
+
+    assert isinstance(results[3], OrganizationServerException)
+    assert [result.token for i, result in enumerate(results) if i != 3] == [u for i, u in enumerate(users) if i != 3]
+    assert peak == 2
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_before_window_ends():
+    """A batch reaching the maximum size is sent without waiting for the window."""
+    batcher = SessionCreateBatcher("test", window_seconds=60, max_batch_size=3, max_concurrency=10)
+
+    async def create(session_request: SessionRequest) -> ClientSessionResponse:
+        return _response(session_request.user.organization_user_id)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(_request(f"user-{i}"), create) for i in range(3))), timeout=5
+    )
+
+    assert [result.token for result in results] == ["user-0", "user-1", "user-2"]
+    await batcher.close()
+
+
+def test_batched_creations_are_owned_by_their_users(make_client, claire):
+    """Concurrent batched creations each create one session owned by the requesting user."""
+    users = [f"user-{i}" for i in range(10)]
+    with make_client(claire={"session_batch_window_ms": 20}) as client:
+        def create(user_id: str) -> str:
+            response = client.post("/session", params={"bot_id": f"bot-{uuid.UUID(int=1)}"}, headers=as_user(user_id))
+            return response.json()["session"]["session_id"]
+
+        with ThreadPoolExecutor(len(users)) as executor:
+            session_ids = list(executor.map(create, users))
+
+    assert [claire.fake.sessions[session_id][0] for session_id in session_ids] == users
@@ -0,0 +1,106 @@
+"""
+Tests of the local session index and the session search.
+"""
+
+import sqlite3
+import time
+import uuid
+
+import pytest
+
+from tests.helpers import as_user
+
+
+@pytest.fixture
+def client(make_client):
+    """
+    Started test client with the session index enabled.
+    """
+    with make_client(session_index={"enabled": True}) as started:
+        yield started
+
+
+def _search(client, user_id: str, expected: int, **params) -> list[str]:
+    """
+    Search until the index holds the expected number of matching sessions, as updates are written asynchronously.
+    """
+    deadline = time.monotonic() + 5
+    while True:
+        response = client.get("/session/search", params={"limit": 100, **params}, headers=as_user(user_id))
+        assert response.status_code == 200
+        session_ids = [session["session_id"] for session in response.json()["results"]]
+        if len(session_ids) >= expected or time.monotonic() > deadline:
+            return session_ids
+        time.sleep(0.01)
+
+
+def test_search_keeps_listing_order_across_pages(client, claire):
+    """Sessions first seen in a listing of several pages are found in the order of the listing."""
+    for _ in range(8):
+        claire.fake.sessions[f"session-{uuid.uuid4()}"] = ("alice", f"bot-{uuid.UUID(int=1)}")
+
+    first = client.get("/session", headers=as_user("alice")).json()
+    second = client.get(
+        "/session", params={"cursor": first["cursor"]["cursor_id"]}, headers=as_user("alice")
+    ).json()
+    listed = [session["session_id"] for page in (first, second) for session in page["results"]]
+
+    assert len(listed) == 8
+    assert _search(client, "alice", 8) == listed
+
+
+def test_created_sessions_are_found_first(client, claire):
+    """Sessions created through the server precede the sessions listed before."""
+    for _ in range(3):
+        claire.fake.sessions[f"session-{uuid.uuid4()}"] = ("alice", f"bot-{uuid.UUID(int=1)}")
+    listed = [session["session_id"] for session in client.get("/session", headers=as_user("alice")).json()["results"]]
+
+    created = client.post("/session", params={"bot_id": f"bot-{uuid.UUID(int=2)}"}, headers=as_user("alice"))
+
+    assert _search(client, "alice", 4) == [created.json()["session"]["session_id"], *listed]
+
+
+def test_search_pages_follow_order(client, claire):
+    """Search cursors continue after the last session of the previous page."""
+    for _ in range(8):
+        claire.fake.sessions[f"session-{uuid.uuid4()}"] = ("alice", f"bot-{uuid.UUID(int=1)}")
+    listed = _search(client, "alice", 8)
+    assert listed == list(reversed(claire.fake.sessions))
+
+    first = client.get("/session/search", params={"limit": 5}, headers=as_user("alice")).json()
+    second = client.get(
+        "/session/search", params={"limit": 5, "cursor": first["cursor"]["cursor_id"]}, headers=as_user("alice")
+    ).json()
+
+    assert [session["session_id"] for session in first["results"] + second["results"]] == listed
+    assert second["cursor"] is None
+
+
+def test_search_returns_summaries(client, claire):
+    """Search results hold the indexed fields of sessions, but no messages."""
+    created = client.post("/session", params={"bot_id": f"bot-{uuid.UUID(int=2)}"}, headers=as_user("alice"))
+    session_id = created.json()["session"]["session_id"]
+    _search(client, "alice", 1)
+
+    (result,) = client.get("/session/search", headers=as_user("alice")).json()["results"]
+
+    assert result.keys() == {"session_id", "bot_id", "meta", "first_seen_at"}
+    assert result["session_id"] == session_id
+    assert result["bot_id"] == f"bot-{uuid.UUID(int=2)}"
+
+
+def test_index_of_older_schema_is_rebuilt(make_client, claire, tmp_path):
+    """An index with an older schema is dropped on startup and filled again from the Claire API."""
+    path = tmp_path / "index" / "sessions.sqlite3"
+    path.parent.mkdir()
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sessions (tenant_id TEXT, session_id TEXT, body TEXT)")
+    session_id = f"session-{uuid.uuid4()}"
+    claire.fake.sessions[session_id] = ("alice", f"bot-{uuid.UUID(int=1)}")
+
+    with make_client(session_index={"enabled": True}) as client:
+        assert _search(client, "alice", 1) == [session_id]
+
+    with sqlite3.connect(path) as connection:
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(sessions)")]
+    assert "body" not in columns
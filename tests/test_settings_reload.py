@@ -0,0 +1,45 @@
+"""
+Tests of the notification of settings reloads.
+"""
+
+import logging
+
+from organization_server_demo.modules.base.structured_logging import APP_LOGGER_NAME, access_logger
+from organization_server_demo.settings import SETTINGS_STORE, SettingsStore
+
+
+def test_failing_listener_does_not_stop_the_others(settings_factory, caplog):
+    """A listener raising an error is logged and the following listeners still receive the settings."""
+    store = SettingsStore(settings_factory())
+    received = []
+
+    def fail(_settings):
+        raise RuntimeError("listener failed")
+
+    store.subscribe(fail)
+    store.subscribe(received.append)
+    settings_logger = logging.getLogger("organization_server_demo.settings")
+    settings_logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.ERROR, logger=settings_logger.name):
+            settings = settings_factory()
+            store.swap(settings)
+    finally:
+        settings_logger.removeHandler(caplog.handler)
+
+    assert received == [settings]
+    assert store.current is settings
+    assert any(record.message == "Settings listener failed." for record in caplog.records)
+
+
+def test_logging_settings_are_reloaded(client, settings_factory):
+    """Reloaded logging settings apply to the running logging pipeline."""
+    SETTINGS_STORE.swap(settings_factory(logging={"level": "WARNING", "access_log": False}))
+
+    assert logging.getLogger(APP_LOGGER_NAME).level == logging.WARNING
+    assert access_logger.disabled
+
+    SETTINGS_STORE.swap(settings_factory(logging={"level": "INFO", "access_log": True}))
+
+    assert logging.getLogger(APP_LOGGER_NAME).level == logging.INFO
+    assert not access_logger.disabled
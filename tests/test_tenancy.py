@@ -0,0 +1,117 @@
+"""
+Tests of the tenant resolution and the isolation of tenants.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from organization_server_demo.modules.claire.services.tenant_registry import TenantRegistry
+from tests.helpers import as_user
+
+CLAIM = "https://example.net/org_id"
+
+
+@pytest.fixture
+def tenants(claire_factory):
+    """
+    Fake Claire APIs of the tenants "a" and "b", which serve different numbers of bots.
+    """
+    return {"a": claire_factory(bots=2), "b": claire_factory(bots=4)}
+
+
+def _tenancy(tenants, **tenancy) -> dict:
+    return {
+        "claire": None,
+        "tenancy": {
+            **tenancy,
+            "tenants": {
+                tenant_id: {
+                    "api_key": f"key-{tenant_id}",
+                    "base_url": server.url,
+                    "hosts": [f"{tenant_id}.example.net"],
+                    "warm_connections": 0,
+                }
+                for tenant_id, server in tenants.items()
+            },
+        },
+    }
+
+
+def test_tenant_from_claim(make_client, tenants):
+    """Every token is served by the tenant named in its claim."""
+    with make_client(**_tenancy(tenants, claim=CLAIM)) as client:
+        bots_a = client.get("/bots", headers=as_user("alice", **{CLAIM: "a"}))
+        bots_b = client.get("/bots", headers=as_user("alice", **{CLAIM: "b"}))
+
+    assert len(bots_a.json()) == 2
+    assert len(bots_b.json()) == 4
+
+
+@pytest.mark.parametrize("claims", [{}, {CLAIM: "unknown"}])
+def test_missing_or_unknown_claim_is_forbidden(make_client, tenants, claims):
+    """Tokens without the configured claim, or with an unknown tenant, are rejected."""
+    with make_client(**_tenancy(tenants, claim=CLAIM)) as client:
+        response = client.get("/bots", headers=as_user("alice", **claims))
+
+    assert response.status_code == 403
+    assert all(server.fake.requests == 0 for server in tenants.values())
+
+
+def test_claim_takes_precedence_over_host(make_client, tenants):
+    """With a claim configured, the client-controlled host header cannot select a tenant."""
+    with make_client(**_tenancy(tenants, claim=CLAIM, use_host_header=True)) as client:
+        without_claim = client.get("http://b.example.net/bots", headers=as_user("alice"))
+        with_claim = client.get("http://b.example.net/bots", headers=as_user("alice", **{CLAIM: "a"}))
+
+    assert without_claim.status_code == 403
+    assert len(with_claim.json()) == 2
+
+
+def test_tenant_from_host(make_client, claire, tenants):
+    """Without a claim, the host header selects the tenant and unknown hosts use the default organization."""
+    settings = _tenancy(tenants, use_host_header=True)
+    settings["claire"] = {"api_key": "default", "base_url": claire.url, "warm_connections": 0}
+    with make_client(**settings) as client:
+        bots_b = client.get("http://b.example.net/bots", headers=as_user("alice"))
+        bots_default = client.get("http://other.example.net/bots", headers=as_user("alice"))
+
+    assert len(bots_b.json()) == 4
+    assert len(bots_default.json()) == 3
+
+
+def test_sessions_are_isolated_between_tenants(make_client, tenants):
+    """A session of one tenant cannot be renewed or deleted through another tenant by the same user."""
+    with make_client(**_tenancy(tenants, claim=CLAIM)) as client:
+        created = client.post(
+            "/session", params={"bot_id": f"bot-{uuid.UUID(int=1)}"}, headers=as_user("alice", **{CLAIM: "a"})
+        )
+        session_id = created.json()["session"]["session_id"]
+
+        renewed = client.post(f"/session/{session_id}/renew", headers=as_user("alice", **{CLAIM: "b"}))
+        deleted = client.delete(f"/session/{session_id}", headers=as_user("alice", **{CLAIM: "b"}))
+        listed = client.get("/session", headers=as_user("alice", **{CLAIM: "b"}))
+
+    assert renewed.status_code == 404
+    assert deleted.status_code == 404
+    assert listed.json()["results"] == []
+    assert session_id in tenants["a"].fake.sessions
+    assert not any(path.startswith(f"/m2m/client_sessions/{session_id}/") for _, path in tenants["a"].fake.calls)
+
+
+@pytest.mark.asyncio
+async def test_retired_tenant_is_closed_after_its_calls(settings_factory):
+    """A tenant replaced by a reload keeps its connection pool until its in-flight calls complete."""
+    registry = TenantRegistry()
+    registry.load(settings_factory())
+    client = registry.get_default().client
+
+    with registry.get_default().upstream_call():
+        registry.load(settings_factory(claire={"api_key": "rotated"}))
+        await asyncio.sleep(0.05)
+        assert not client.closed
+
+    await asyncio.sleep(0.05)
+    assert client.closed
+    await registry.close()
@@ -0,0 +1,44 @@
+"""
+Tests of the traffic capture writer.
+"""
+
+import threading
+import time
+
+from organization_server_demo.modules.base.traffic_capture import TrafficCapture, read_capture
+
+
+def _record(path: str) -> dict:
+    return {
+        "started": time.monotonic(),
+        "method": "GET",
+        "route": path,
+        "path": path,
+        "query": [],
+        "user_id": "alice",
+        "status": 200,
+        "latency_ms": 1.0,
+        "response_bytes": 2,
+        "upstream": [],
+    }
+
+
+def test_restart_waits_for_previous_writer(settings_factory):
+    """A restarted capture overwrites the file only after the previous capture was written."""
+    settings = settings_factory(capture={"enabled": True, "queue_size": 100_000, "max_records": None})
+    capture = TrafficCapture()
+    capture.configure(settings)
+    for _ in range(20_000):
+        capture.submit(_record("/bots"))
+
+    capture.configure(settings.model_copy(update={"capture": settings.capture.model_copy(update={"sample_rate": 0.5})}))
+    for _ in range(10):
+        capture.submit(_record("/session"))
+    capture.close()
+    for thread in threading.enumerate():
+        if thread.name == "traffic-capture":
+            thread.join()
+
+    records = list(read_capture(settings.capture.path))
+    assert [record["path"] for record in records] == ["/session"] * 10
+    assert capture.written == 10